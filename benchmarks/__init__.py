@@ -0,0 +1,10 @@
+"""
+Benchmarks of the log analyzer (run from the program folder):
+
+    python -m benchmarks.generate D:/bench --files 2000 --size 500MB
+    python -m benchmarks.run D:/bench --output bench.json --compare baseline.json
+
+generate writes a synthetic corpus of KVPanel*.log and SedecalSerial.log*
+files; run times scanning, dispatch, every module, a full engine run and
+startup, and writes the results as JSON.
+"""
@@ -0,0 +1,140 @@
+"""
+Generator of synthetic XVI log corpora for the benchmarks.
+
+    python -m benchmarks.generate D:/bench --files 100000 --size 2GB --days 30
+
+Writes KVPanel<N>.log files (pot readings and panel states) and a rotation
+set SedecalSerial.log, SedecalSerial.log.1, ... (serial traffic with the kV
+generator, with occasional timeouts, retries and disconnects), plus a few
+files no module wants. The files split the period evenly: every file covers
+its own slice of time and gets the modification time of its last line, as on
+a real system. The same seed always gives the same corpus.
+"""
+import os
+import sys
+import random
+import argparse
+import datetime
+
+LINE_BYTES = 48             # average length of a generated line, used to size the files
+OTHER_FILE_RATIO = 0.05     # share of files that match no module
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(value):
+    """Parses sizes like "500MB" or "2GB" into bytes."""
+    text = value.strip().upper()
+    number = text.rstrip("KMGB")
+    unit = text[len(number):]
+    if unit not in SIZE_UNITS:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def _timestamp(moment):
+    return moment.strftime("%Y-%m-%d %H:%M:%S.") + f"{moment.microsecond // 1000:03d}"
+
+
+def kvpanel_lines(rng, start, step, count):
+    """Pot readings around their nominal value, a rare out-of-range reading and state changes."""
+    state = "Idle"
+    pot_a, pot_b = 2.0 + rng.random() * 0.2, 2.3 + rng.random() * 0.2
+    moment = start
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.00002:
+            state = "Fault"
+        elif roll < 0.01:
+            state = rng.choice(("Idle", "Ready", "Exposure", "Idle"))
+        value_a = pot_a + rng.gauss(0, 0.01) if roll > 0.0005 else 12.5
+        yield (f"{_timestamp(moment)} PotA={value_a:.3f} PotB={pot_b + rng.gauss(0, 0.01):.3f} "
+               f"State={state}\n")
+        moment += step
+
+
+def serial_lines(rng, start, step, count):
+    """TX/RX pairs with realistic round trips, occasional timeouts, retries and reconnects."""
+    moment = start
+    written = 0
+    while written < count:
+        yield f"{_timestamp(moment)} TX: 02 4B 56 {rng.randrange(40, 151):02X} 03\n"
+        roll = rng.random()
+        if roll < 0.0005:
+            yield f"{_timestamp(moment + datetime.timedelta(seconds=2))} Timeout waiting for response\n"
+            yield f"{_timestamp(moment + datetime.timedelta(seconds=2, milliseconds=1))} Retry 1\n"
+            written += 3
+        elif roll < 0.0006:
+            yield f"{_timestamp(moment + datetime.timedelta(milliseconds=5))} Port closed (disconnected)\n"
+            yield f"{_timestamp(moment + datetime.timedelta(seconds=30))} Port opened\n"
+            written += 3
+        else:
+            # Mostly fast answers with a slow tail
+            rtt = datetime.timedelta(milliseconds=rng.randint(10, 60) if roll < 0.99 else rng.randint(100, 400))
+            yield f"{_timestamp(moment + rtt)} RX: 06\n"
+            written += 2
+        moment += step * 2
+
+
+def write_file(path, lines, mtime):
+    with open(path, "w", encoding="ascii", newline="") as f:
+        f.writelines(lines)
+    os.utime(path, (mtime, mtime))
+
+
+def generate_corpus(directory, files=200, total_bytes=100 * 1024 ** 2, days=7, end_date=None, seed=1):
+    """
+    Writes a corpus of about files files and total_bytes bytes covering the days
+    before end_date (default: today). Returns (file count, bytes written).
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    end_date = end_date or datetime.date.today()
+    end = datetime.datetime.combine(end_date, datetime.time.min) + datetime.timedelta(days=1)
+    begin = end - datetime.timedelta(days=days)
+
+    other = int(files * OTHER_FILE_RATIO)
+    panels = (files - other) // 2
+    serials = files - other - panels
+    lines_per_file = max(1, total_bytes // max(1, files - other) // LINE_BYTES)
+
+    def slices(count):
+        """(start, step, mtime) of each of count files splitting the period evenly, oldest first."""
+        span = (end - begin) / max(1, count)
+        step = span / lines_per_file
+        for index in range(count):
+            start = begin + span * index
+            yield start, step, (start + span - step).timestamp()
+
+    for index, (start, step, mtime) in enumerate(slices(panels)):
+        write_file(os.path.join(directory, f"KVPanel{index}.log"),
+                   kvpanel_lines(rng, start, step, lines_per_file), mtime)
+    # SedecalSerial.log is the newest file, higher rotation numbers are older
+    for index, (start, step, mtime) in enumerate(slices(serials)):
+        rotation = serials - 1 - index
+        name = "SedecalSerial.log" + (f".{rotation}" if rotation else "")
+        write_file(os.path.join(directory, name), serial_lines(rng, start, step, lines_per_file), mtime)
+    for index, (start, step, mtime) in enumerate(slices(other)):
+        write_file(os.path.join(directory, f"Service{index}.txt"),
+                   (f"{_timestamp(start + step * line)} Service message {line}\n" for line in range(100)), mtime)
+
+    written = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+    return panels + serials + other, written
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Write a synthetic XVI log corpus for the benchmarks.")
+    parser.add_argument("directory", help="output folder (created if missing)")
+    parser.add_argument("--files", type=int, default=200, help="number of files (default: 200)")
+    parser.add_argument("--size", type=parse_size, default="100MB", help="total size, e.g. 500MB or 2GB")
+    parser.add_argument("--days", type=int, default=7, help="days covered by the corpus (default: 7)")
+    parser.add_argument("--end", type=lambda v: datetime.datetime.strptime(v, "%Y-%m-%d").date(),
+                        help="last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    args = parser.parse_args(argv)
+    count, written = generate_corpus(args.directory, args.files, args.size, args.days, args.end, args.seed)
+    print(f"{count} files, {written / 1024 ** 2:.1f} MiB written to {args.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
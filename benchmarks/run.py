@@ -0,0 +1,196 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run D:/bench --output bench.json
+    python -m benchmarks.run D:/bench --compare baseline.json --tolerance 0.2
+
+Measures on a log folder (see benchmarks.generate):
+  startup_cli    python XVI_logs_004.py --list-modules in a new process
+  startup_gui    importing gui.main_window in a new process (if PyQt5 is installed)
+  scan           listing the folder into a FileCatalog
+  rescan         FileCatalog.refresh() with nothing changed
+  time_index     scan plus reading the time span of every file (no parse cache)
+  select         date and module filter of the file list (update_file_list)
+  dispatch       assigning the files to the modules
+  module:<id>    the module run on its own through the plugin API (core.plugin_api)
+  engine         all modules through the AnalysisEngine (shared read, no caches)
+
+"seconds" is the best of --repeat runs; "peak_bytes" is the peak of Python
+allocations during one more run under tracemalloc. The results are written
+as JSON. With --compare the exit code is 1 if any measurement is slower than
+the baseline by more than the tolerance.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import tracemalloc
+import subprocess
+try:
+    import resource
+except ImportError:
+    resource = None  # not available on Windows
+
+from core.catalog import FileCatalog
+from core.matcher import ModuleMatcher
+from core.engine import AnalysisEngine, AnalysisJob
+from core.plugin_api import Context, plugin_for, run_plugin
+from core.plugins import PluginRegistry
+from core.versions import LOCAL_VERSION
+
+PROGRAM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIN_COMPARED_SECONDS = 0.01    # faster measurements are too noisy to flag as regressions
+
+
+def measure(name, func, repeat=3, memory=True, **fields):
+    """Runs func repeat times (plus once under tracemalloc) and returns (record, last return value)."""
+    runs = []
+    value = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        value = func()
+        runs.append(time.perf_counter() - started)
+    record = {"name": name, "seconds": min(runs), "mean_seconds": sum(runs) / len(runs), "runs": runs}
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    record.update(fields)
+    if fields.get("bytes") and record["seconds"] > 0:
+        record["mb_per_second"] = fields["bytes"] / 1024 ** 2 / record["seconds"]
+    print(f"{name:<32} {record['seconds']:9.3f} s" +
+          (f"  {record['peak_bytes'] / 1024 ** 2:8.1f} MiB peak" if "peak_bytes" in record else ""),
+          file=sys.stderr)
+    return record, value
+
+
+def measure_process(name, args, repeat=3):
+    """Times a command in a new Python process; None if the command fails (e.g. PyQt5 missing)."""
+    def start():
+        completed = subprocess.run([sys.executable] + args, cwd=PROGRAM_DIR, capture_output=True)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.decode("utf-8", "replace").strip().splitlines()[-1:])
+    try:
+        return measure(name, start, repeat, memory=False)[0]
+    except RuntimeError as e:
+        print(f"{name:<32} skipped: {e}", file=sys.stderr)
+        return None
+
+
+def run_benchmarks(directory, start_date, end_date, module_names=None, repeat=3, memory=True):
+    """Runs all measurements on a log folder; returns the list of records."""
+    records = []
+    records.append(measure_process("startup_cli", ["XVI_logs_004.py", "--list-modules"], repeat))
+    records.append(measure_process("startup_gui", ["-c", "import gui.main_window"], repeat))
+
+    plugins = PluginRegistry()
+    modules = [info for info in plugins.scan() if not module_names or info["id"] in module_names]
+    plugins.load(modules)
+    modules = [info for info in modules if info.get("module") is not None]
+    matcher = ModuleMatcher(modules)
+
+    record, catalog = measure("scan", lambda: FileCatalog(directory), repeat, memory)
+    record["files"] = len(catalog)
+    records.append(record)
+    records.append(measure("rescan", catalog.refresh, repeat, memory, files=len(catalog))[0])
+    records.append(measure("time_index", lambda: FileCatalog(directory).time_index(), repeat, memory,
+                           files=len(catalog))[0])
+    catalog.time_index()
+
+    record, selected = measure("select", lambda: catalog.select(start_date, end_date, matcher), repeat, memory)
+    files = [entry.path for entry in selected]
+    total_bytes = sum(entry.size for entry in selected)
+    record.update(files=len(files), bytes=total_bytes)
+    records.append(record)
+
+    record, files_per_module = measure("dispatch", lambda: ModuleMatcher(modules).dispatch(files), repeat, memory,
+                                       files=len(files))
+    records.append(record)
+
+    for info, module_files in zip(modules, files_per_module):
+        module_bytes = sum(os.path.getsize(path) for path in module_files if os.path.isfile(path))
+        records.append(measure(f"module:{info['id']}",
+                               lambda: run_plugin(plugin_for(info), Context(info, module_files, start_date, end_date)),
+                               repeat, memory, files=len(module_files), bytes=module_bytes)[0])
+
+    def engine_run():
+        jobs = [AnalysisJob(info, module_files) for info, module_files in zip(modules, files_per_module)]
+        AnalysisEngine().run(jobs, start_date, end_date, lambda job, result, status: None)
+    records.append(measure("engine", engine_run, repeat, memory, files=len(files), bytes=total_bytes)[0])
+    return [record for record in records if record is not None]
+
+
+def compare(records, baseline, tolerance):
+    """Returns the (name, baseline seconds, seconds) of measurements slower than the baseline allows."""
+    previous = {record["name"]: record for record in baseline.get("results", [])}
+    regressions = []
+    for record in records:
+        old = previous.get(record["name"])
+        if old is None or old["seconds"] < MIN_COMPARED_SECONDS:
+            continue
+        if record["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append((record["name"], old["seconds"], record["seconds"]))
+    return regressions
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the log analyzer on a log folder.")
+    parser.add_argument("directory", help="log folder, e.g. written by benchmarks.generate")
+    parser.add_argument("--start", type=parse_date, help="first day, YYYY-MM-DD (default: 6 days before --end)")
+    parser.add_argument("--end", type=parse_date, help="last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--modules", nargs="+", metavar="ID", help="modules to benchmark (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run of each measurement")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON results to a file instead of stdout")
+    parser.add_argument("--compare", metavar="FILE", help="earlier results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown against --compare, 0.2 = 20%% (default)")
+    args = parser.parse_args(argv)
+
+    end_date = args.end or datetime.date.today()
+    start_date = args.start or end_date - datetime.timedelta(days=6)
+    records = run_benchmarks(args.directory, start_date, end_date, args.modules, args.repeat, not args.no_memory)
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "program_version": LOCAL_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "directory": os.path.abspath(args.directory),
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "results": records,
+    }
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux
+        report["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(records, json.load(f), args.tolerance)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:.3f} s -> {new:.3f} s ({new / old - 1:+.0%})", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,3 @@
+"""
+GUI-free building blocks used by the log analyzer.
+"""
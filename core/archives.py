@@ -0,0 +1,150 @@
+"""
+Transparent access to compressed and archived logs.
+
+Service logs often arrive as .gz/.bz2 files, .zip bundles or tarballs. The
+members of such archives are catalogued as virtual files with a path of the
+form "<archive path>!/<member name>" and are decompressed as a stream when
+they are read, so nothing is ever extracted to disk.
+"""
+import os
+import io
+import gzip
+import bz2
+import struct
+import tarfile
+import zipfile
+import datetime
+
+ARCHIVE_SEPARATOR = "!/"
+READ_BUFFER_SIZE = 1 << 20
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2")
+ZIP_SUFFIXES = (".zip",)
+# Single compressed files; checked after the tar suffixes
+COMPRESSED_SUFFIXES = {".gz": gzip.open, ".bz2": bz2.open}
+COMPRESSED_SUFFIXES_KINDS = tuple(suffix[1:] for suffix in COMPRESSED_SUFFIXES)
+
+
+def archive_kind(name):
+    """Returns "tar", "zip", "gz", "bz2" or None for a file name."""
+    lower = name.lower()
+    if lower.endswith(TAR_SUFFIXES):
+        return "tar"
+    if lower.endswith(ZIP_SUFFIXES):
+        return "zip"
+    for suffix in COMPRESSED_SUFFIXES:
+        if lower.endswith(suffix):
+            return suffix[1:]
+    return None
+
+
+def is_virtual(path):
+    """True if the path points inside an archive."""
+    return ARCHIVE_SEPARATOR in path
+
+
+def split_virtual(path):
+    """Splits a virtual path into (archive path, member name)."""
+    archive, member = path.split(ARCHIVE_SEPARATOR, 1)
+    return archive, member
+
+
+def display_name(path):
+    """Short name for the file list: the file name, or "archive!/member" for archive members."""
+    if is_virtual(path):
+        archive, member = split_virtual(path)
+        return os.path.basename(archive) + ARCHIVE_SEPARATOR + member
+    return os.path.basename(path)
+
+
+def _gzip_size(path, default):
+    """Uncompressed size from the gzip trailer (modulo 4 GiB), without decompressing."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return struct.unpack("<I", f.read(4))[0]
+    except (OSError, struct.error):
+        return default
+
+
+def list_members(path, size, mtime, read_member=None):
+    """
+    Yields (member name, virtual path, size, mtime) for the regular files in an archive.
+    Single compressed files have one member named like the file without its suffix.
+    Unreadable archives yield nothing. A tar can only be read front to back, so
+    read_member(virtual path, open member) is called for every tar member while
+    the listing passes it (before the member is yielded).
+    """
+    kind = archive_kind(path)
+    try:
+        if kind in COMPRESSED_SUFFIXES_KINDS:
+            member = os.path.basename(path)[:-(len(kind) + 1)]
+            member_size = _gzip_size(path, size) if kind == "gz" else size
+            yield member, path + ARCHIVE_SEPARATOR + member, member_size, mtime
+        elif kind == "zip":
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    member_mtime = datetime.datetime(*info.date_time).timestamp()
+                    yield (os.path.basename(info.filename), path + ARCHIVE_SEPARATOR + info.filename,
+                           info.file_size, member_mtime)
+        elif kind == "tar":
+            with tarfile.open(path, "r:*") as archive:
+                for info in archive:
+                    if not info.isfile():
+                        continue
+                    member_path = path + ARCHIVE_SEPARATOR + info.name
+                    if read_member is not None:
+                        read_member(member_path, archive.extractfile(info))
+                    yield os.path.basename(info.name), member_path, info.size, float(info.mtime)
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, ValueError) as e:
+        print(f"Error reading archive {path}: {e}")
+
+
+class _MemberStream(io.BufferedReader):
+    """Buffered stream over an archive member that also closes the archive."""
+
+    def __init__(self, raw, archive):
+        super(_MemberStream, self).__init__(raw, READ_BUFFER_SIZE)
+        self._archive = archive
+
+    def close(self):
+        try:
+            super(_MemberStream, self).close()
+        finally:
+            self._archive.close()
+
+
+def open_log(path, buffer_size=READ_BUFFER_SIZE):
+    """
+    Opens a log file for binary reading. Archive members are decompressed as a
+    stream while they are read; plain files are opened with a large buffer.
+    """
+    if not is_virtual(path):
+        return open(path, "rb", buffering=buffer_size)
+
+    archive_path, member = split_virtual(path)
+    kind = archive_kind(archive_path)
+    if kind in COMPRESSED_SUFFIXES_KINDS:
+        return io.BufferedReader(COMPRESSED_SUFFIXES["." + kind](archive_path, "rb"), buffer_size)
+    if kind == "zip":
+        archive = zipfile.ZipFile(archive_path)
+        try:
+            return _MemberStream(archive.open(member), archive)
+        except Exception:
+            archive.close()
+            raise
+    if kind == "tar":
+        # Stream mode: members are decompressed in order, without seeking back
+        archive = tarfile.open(archive_path, "r|*")
+        try:
+            for info in archive:
+                if info.name == member:
+                    return _MemberStream(archive.extractfile(info), archive)
+        except Exception:
+            archive.close()
+            raise
+        archive.close()
+        raise FileNotFoundError(f"{member} not found in {archive_path}")
+    raise FileNotFoundError(path)
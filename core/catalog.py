@@ -0,0 +1,190 @@
+"""
+In-memory catalog of the files in the log directory.
+
+The directory is listed with a single scandir pass and the name, size and
+modification time of every file are stored once. Date and module changes in
+the GUI are then answered from memory, and the catalog is refreshed
+incrementally when the directory reports a change.
+
+Archives (.gz, .bz2, .zip, .tar...) are not catalogued themselves; their
+members are, as virtual files (see core.archives), so date filters and
+module patterns apply to them exactly like to normal files.
+
+Date filters go by the time span of the log entries in each file, not by its
+modification time (see core.timeindex). Spans are read once per file and
+kept in the parse cache when one is given; tar members are dated while the
+tar is listed. Files without timestamped lines are dated by their
+modification time.
+"""
+import os
+import datetime
+from collections import namedtuple
+
+from core.archives import archive_kind, list_members
+from core.timeindex import IntervalIndex, read_span, stream_span, finish_span
+
+# One catalogued file. "name" is the base name matched against module patterns,
+# "path" is the real or virtual path; size and mtime tell when it changed.
+CatalogEntry = namedtuple("CatalogEntry", "name path size mtime")
+
+
+def date_to_timestamp(day):
+    """Returns the local timestamp of midnight at the beginning of the given date."""
+    return datetime.datetime.combine(day, datetime.time.min).timestamp()
+
+
+def is_log_name(name):
+    """True for names the old glob("*.*") matched: a dot in the name and not hidden."""
+    return "." in name and not name.startswith(".")
+
+
+class FileCatalog:
+    """
+    Keeps the files of one log directory in memory.
+    Only names that the old glob("*.*") would have matched are catalogued:
+    regular files with a dot in the name that are not hidden.
+    """
+
+    def __init__(self, directory, span_cache=None):
+        self.directory = directory
+        self.span_cache = span_cache    # ParseCache storing the spans, or None
+        self.entries = {}        # path -> CatalogEntry
+        self._archives = {}      # archive path -> (size, mtime, list of member entries)
+        self._spans = {}         # path -> (size, mtime, first, last) of the log entries
+        self._index = None       # IntervalIndex of the entries by span (built lazily)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _scan(self):
+        """Yields (name, path, size, mtime) for every file in the directory."""
+        try:
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    name = dir_entry.name
+                    if not is_log_name(name):
+                        continue
+                    try:
+                        if not dir_entry.is_file():
+                            continue
+                        # On Windows the stat result comes with the directory
+                        # listing, so this does not touch the file itself.
+                        st = dir_entry.stat()
+                    except OSError:
+                        continue
+                    yield name, dir_entry.path, st.st_size, st.st_mtime
+        except OSError:
+            return
+
+    def refresh(self):
+        """
+        Re-lists the directory and updates only the entries that changed.
+        Archives are re-listed only when their own size or mtime changed.
+        Returns a tuple (added, removed, modified) with lists of paths.
+        """
+        old_entries = self.entries
+        new_entries = {}
+        new_archives = {}
+        added = []
+        modified = []
+
+        def add(entry):
+            old = old_entries.get(entry.path)
+            new_entries[entry.path] = entry
+            if old is None:
+                added.append(entry.path)
+            elif old.size != entry.size or old.mtime != entry.mtime:
+                modified.append(entry.path)
+
+        for name, path, size, mtime in self._scan():
+            if archive_kind(name):
+                cached = self._archives.get(path)
+                if cached is not None and cached[0] == size and cached[1] == mtime:
+                    members = cached[2]
+                else:
+                    found = {}    # virtual path -> (first, last) of tar members
+
+                    def read_member(member_path, f):
+                        if is_log_name(os.path.basename(member_path)):
+                            found[member_path] = stream_span(f)
+                    members = [CatalogEntry(member_name, member_path, member_size, member_mtime)
+                               for member_name, member_path, member_size, member_mtime
+                               in list_members(path, size, mtime, read_member) if is_log_name(member_name)]
+                    for entry in members:
+                        if entry.path in found:
+                            span = finish_span(*found[entry.path], entry.mtime)
+                            self._spans[entry.path] = (entry.size, entry.mtime) + span
+                new_archives[path] = (size, mtime, members)
+                for entry in members:
+                    add(entry)
+                continue
+            entry = old_entries.get(path)
+            if entry is not None and entry.size == size and entry.mtime == mtime:
+                new_entries[path] = entry
+                continue
+            add(CatalogEntry(name, path, size, mtime))
+        removed = [path for path in old_entries if path not in new_entries]
+
+        self.entries = new_entries
+        self._archives = new_archives
+        if added or removed or modified:
+            self._index = None
+        return added, removed, modified
+
+    def _update_spans(self):
+        """Finds the span of every entry that has none for its current size and mtime."""
+        spans = {}
+        missing = []
+        for path, entry in self.entries.items():
+            span = self._spans.get(path)
+            if span is not None and span[0] == entry.size and span[1] == entry.mtime:
+                spans[path] = span
+            else:
+                missing.append(entry)
+        if missing and self.span_cache is not None:
+            stored = self.span_cache.get_spans((e.path, e.size, e.mtime) for e in missing)
+            for entry in missing:
+                if entry.path in stored:
+                    spans[entry.path] = (entry.size, entry.mtime) + tuple(stored[entry.path])
+            missing = [entry for entry in missing if entry.path not in stored]
+        rows = []
+        for entry in missing:
+            first, last = read_span(entry.path, entry.size, entry.mtime)
+            spans[entry.path] = (entry.size, entry.mtime, first, last)
+            rows.append((entry.path, entry.size, entry.mtime, first, last))
+        if rows and self.span_cache is not None:
+            self.span_cache.put_spans(rows)
+        self._spans = spans
+
+    def time_index(self):
+        """Returns the IntervalIndex of the entries by span (cached until the next change)."""
+        if self._index is None:
+            self._update_spans()
+            spans = self._spans
+            self._index = IntervalIndex((spans[path][2], spans[path][3], self.entries[path])
+                                        for path in sorted(self.entries))
+        return self._index
+
+    def span(self, path):
+        """(first, last) timestamps of the log entries of a catalogued file."""
+        self.time_index()
+        return self._spans[path][2:]
+
+    def in_date_range(self, start_date, end_date):
+        """
+        Returns the entries with log entries between start_date and end_date
+        (inclusive), sorted by their first entry.
+        """
+        return self.time_index().overlapping(
+            date_to_timestamp(start_date), date_to_timestamp(end_date + datetime.timedelta(days=1)))
+
+    def select(self, start_date, end_date, matcher):
+        """
+        Returns the entries in the date range whose name is accepted by the
+        ModuleMatcher, sorted by their first log entry.
+        """
+        if not matcher:
+            return []
+        matches = matcher.matches
+        return [e for e in self.in_date_range(start_date, end_date) if matches(e.name)]
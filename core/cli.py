@@ -0,0 +1,212 @@
+"""
+Headless batch mode of the log analyzer.
+
+    python XVI_logs_004.py D:/logs/machine1 D:/logs/machine2 --start 2024-03-01 --end 2024-03-07
+                           --modules kv_generator "XVI panels" --format csv --output results.csv
+    python XVI_logs_004.py --fleet --format matrix
+
+Runs the selected modules over every log directory without loading PyQt and
+writes one record per machine and module (with its per-file findings) as
+JSON, CSV or HTML, or a machine x module status matrix. --fleet analyzes all
+machines registered in config.json; machines are analyzed in parallel.
+The exit code is the worst status found: 0 Green, 1 Yellow, 2 Red, 3 if
+something could not be analyzed at all (missing directory, unknown module,
+invalid arguments).
+"""
+import os
+import sys
+import argparse
+import datetime
+import contextlib
+
+from core.config import load_config, configure_logging, open_parse_cache, open_result_cache, create_fleet_runner
+from core.fleet import configured_machines, machine_name
+from core.plugins import PluginRegistry
+from core.results import result_from_job, export, EXPORT_FORMATS
+
+EXIT_CODES = {"Green": 0, "Yellow": 1, "Red": 2}
+EXIT_UNKNOWN = 3
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """Reports invalid arguments with EXIT_UNKNOWN instead of 2 (which means Red)."""
+
+    def error(self, message):
+        self.print_usage(sys.stderr)
+        self.exit(EXIT_UNKNOWN, f"{self.prog}: error: {message}\n")
+
+
+def select_modules(modules_info, names):
+    """
+    Returns the modules whose import name, name or group equals one of the given
+    names (case-insensitive), in the order they were loaded. All modules if names is empty.
+    Raises ValueError for a name that matches nothing.
+    """
+    if not names:
+        return list(modules_info)
+    wanted = {name.lower() for name in names}
+    found = set()
+    selected = []
+    for info in modules_info:
+        keys = {info["id"].lower(), info.get("name", "").lower(), info.get("group", "").lower()}
+        if keys & wanted:
+            selected.append(info)
+            found |= keys & wanted
+    missing = wanted - found
+    if missing:
+        raise ValueError("Unknown module: " + ", ".join(sorted(missing)))
+    return selected
+
+
+def select_machines(config, directories, fleet, names):
+    """
+    Returns the (name, directory) pairs to analyze: the given directories, plus
+    the configured machines for --fleet or --machines. Without any of them, the
+    log_directory from config.json. Raises ValueError for an unknown machine name.
+    """
+    machines = [(machine_name(directory), directory) for directory in directories]
+    if fleet or names:
+        configured = configured_machines(config)
+        if names:
+            wanted = {name.lower() for name in names}
+            missing = wanted - {name.lower() for name, _ in configured}
+            if missing:
+                raise ValueError("Unknown machine: " + ", ".join(sorted(missing)))
+            configured = [machine for machine in configured if machine[0].lower() in wanted]
+        elif not configured:
+            raise ValueError("No machines are registered in config.json (\"machines\").")
+        machines.extend(configured)
+    if not machines:
+        directory = config.get("log_directory", "logs")
+        machines.append((machine_name(directory), directory))
+    # Two folders with the same name (D:/a/logs, D:/b/logs) must stay separate rows
+    unique, seen = [], {}
+    for name, directory in machines:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append((name if seen[name] == 1 else f"{name} ({seen[name]})", directory))
+    return unique
+
+
+def exit_code(records):
+    """The worst status of all records as a process exit code."""
+    return max((EXIT_CODES.get(record.status, EXIT_UNKNOWN) for record in records), default=EXIT_UNKNOWN)
+
+
+def parse_date(value):
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date (expected YYYY-MM-DD): {value}")
+
+
+def build_parser():
+    parser = _ArgumentParser(
+        description="Analyze XVI service logs without the GUI. "
+                    "Exit code: 0 Green, 1 Yellow, 2 Red, 3 not analyzed.")
+    parser.add_argument("directories", nargs="*", metavar="LOG_DIR",
+                        help="log directories to analyze, one per machine (default: log_directory from config.json)")
+    parser.add_argument("--fleet", action="store_true", help="analyze all machines registered in config.json")
+    parser.add_argument("--machines", nargs="+", metavar="NAME", help="analyze these registered machines")
+    parser.add_argument("--workers", type=int, metavar="N", help="machines analyzed at the same time")
+    parser.add_argument("--start", type=parse_date, help="first day, YYYY-MM-DD (default: the day before --end)")
+    parser.add_argument("--end", type=parse_date, help="last day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--modules", nargs="+", metavar="NAME",
+                        help="modules to run, by import name, module name or group (default: all)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="json", help="output format (default: json)")
+    parser.add_argument("--output", metavar="FILE", help="write the results to a file instead of stdout")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS", help="time limit per module")
+    parser.add_argument("--profile", metavar="MODULE",
+                        help="run this module under cProfile and write the profile to the profiles folder")
+    parser.add_argument("--metrics-per-file", action="store_true", help="record metrics for every file")
+    parser.add_argument("--metrics-memory", action="store_true", help="record peak memory (slower)")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the parse and result caches")
+    parser.add_argument("--list-modules", action="store_true", help="list the available modules and exit")
+    return parser
+
+
+def main(argv):
+    """Runs the batch mode with the given command line arguments; returns the exit code."""
+    args = build_parser().parse_args(argv)
+    config = load_config()
+    configure_logging(config)
+    # Modules report problems with print(); keep stdout for the results
+    plugins = PluginRegistry()
+    with contextlib.redirect_stdout(sys.stderr):
+        modules_info = plugins.scan()
+
+    if args.list_modules:
+        for info in modules_info:
+            print(f"{info['id']}\t{info.get('group', 'Ungrouped')}\t{info.get('name', 'Unknown Module')}")
+        return 0
+
+    try:
+        modules = select_modules(modules_info, args.modules)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_UNKNOWN
+    if not modules:
+        print("No analysis modules found.", file=sys.stderr)
+        return EXIT_UNKNOWN
+    with contextlib.redirect_stdout(sys.stderr):
+        plugins.load(modules)
+
+    end_date = args.end or datetime.date.today()
+    start_date = args.start or end_date - datetime.timedelta(days=1)
+    if start_date > end_date:
+        print("The start date is after the end date.", file=sys.stderr)
+        return EXIT_UNKNOWN
+    try:
+        machines = select_machines(config, args.directories, args.fleet, args.machines)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_UNKNOWN
+    if args.workers:
+        config["fleet_workers"] = args.workers
+    if args.timeout:
+        config["module_timeout"] = args.timeout
+    if args.profile:
+        config["profile_module"] = args.profile
+    if args.metrics_per_file:
+        config["metrics_per_file"] = True
+    if args.metrics_memory:
+        config["metrics_memory"] = True
+    if args.no_cache:
+        config["parse_cache"] = False
+        config["result_cache"] = False
+
+    missing = False
+    for name, directory in list(machines):
+        if not os.path.isdir(directory):
+            print(f"Log directory not found: {directory}", file=sys.stderr)
+            machines.remove((name, directory))
+            missing = True
+
+    records = {}
+
+    def report(name, directory, job, result, status):
+        records[(name, job.info["id"])] = result_from_job(job, result, status, directory, name)
+
+    cache = open_parse_cache(config)
+    results = open_result_cache(config)
+    fleet = create_fleet_runner(config, cache, results)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            fleet.run(machines, modules, start_date, end_date, report)
+    except KeyboardInterrupt:
+        fleet.cancel()
+        print("Interrupted.", file=sys.stderr)
+        return EXIT_UNKNOWN
+    finally:
+        for store in (cache, results):
+            if store is not None:
+                store.close()
+
+    # Machines finish in any order; report them in the order they were given
+    records = [records[(name, info["id"])] for name, _ in machines for info in modules
+               if (name, info["id"]) in records]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            export(records, f, args.format)
+    else:
+        export(records, sys.stdout, args.format)
+    return EXIT_UNKNOWN if missing else exit_code(records)
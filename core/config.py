@@ -0,0 +1,114 @@
+"""
+Configuration (config.json) and the services built from it.
+Used by both the GUI and the command line.
+"""
+import os
+import json
+
+from core.engine import AnalysisEngine, DEFAULT_MODULE_TIMEOUT
+from core.fleet import FleetRunner, DEFAULT_FLEET_WORKERS
+from core.parse_cache import ParseCache, PARSE_CACHE_FILE, DEFAULT_MAX_BYTES
+from core import logservice
+from core.result_cache import ResultCache, RESULT_CACHE_FILE, DEFAULT_MAX_BYTES as DEFAULT_RESULT_MAX_BYTES
+from core.search import SearchIndex, SEARCH_INDEX_FILE
+
+CONFIG_FILE = "config.json"
+
+
+def load_config():
+    """Loads configuration from config.json if exists."""
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading config: {e}")
+    return {}
+
+
+def save_config(config):
+    """Saves the configuration to config.json."""
+    try:
+        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=4)
+    except Exception as e:
+        print(f"Error saving configuration: {e}")
+
+
+def configure_logging(config):
+    """Applies "log_max_mb" and "log_backups" to the central log (output.log)."""
+    logservice.configure(
+        max_bytes=int(config.get("log_max_mb", logservice.DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+        backup_count=int(config.get("log_backups", logservice.DEFAULT_BACKUP_COUNT)))
+
+
+def open_parse_cache(config):
+    """
+    Opens the per-file summary cache next to config.json.
+    Can be disabled with "parse_cache": false; "parse_cache_mb" sets the size cap.
+    """
+    if not config.get("parse_cache", True):
+        return None
+    cache_path = os.path.join(os.path.dirname(CONFIG_FILE), PARSE_CACHE_FILE)
+    max_bytes = int(config.get("parse_cache_mb", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024
+    try:
+        return ParseCache(cache_path, max_bytes)
+    except Exception as e:
+        print(f"Error opening parse cache: {e}")
+        return None
+
+
+def open_result_cache(config):
+    """
+    Opens the memo of module results next to config.json.
+    Can be disabled with "result_cache": false; "result_cache_mb" sets the size cap.
+    """
+    if not config.get("result_cache", True):
+        return None
+    cache_path = os.path.join(os.path.dirname(CONFIG_FILE), RESULT_CACHE_FILE)
+    max_bytes = int(config.get("result_cache_mb", DEFAULT_RESULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024
+    try:
+        return ResultCache(cache_path, max_bytes)
+    except Exception as e:
+        print(f"Error opening result cache: {e}")
+        return None
+
+
+def open_search_index(config):
+    """
+    Opens the search index next to config.json. Can be disabled with
+    "search_index": false (every search then reads the files in full);
+    "search_workers" sets the processes used for indexing and scanning.
+    """
+    if not config.get("search_index", True):
+        return None
+    try:
+        return SearchIndex(os.path.join(os.path.dirname(CONFIG_FILE), SEARCH_INDEX_FILE),
+                           workers=config.get("search_workers") or None)
+    except Exception as e:
+        print(f"Error opening search index: {e}")
+        return None
+
+
+def create_engine(config, cache=None, results=None):
+    """
+    Creates the AnalysisEngine with the executor, timeout and metrics options from the
+    configuration ("metrics_memory", "metrics_per_file", "profile_module").
+    """
+    return AnalysisEngine(
+        # null or 0 in config.json: no timeout
+        timeout=config.get("module_timeout", DEFAULT_MODULE_TIMEOUT) or 0,
+        use_processes=config.get("analysis_executor") == "process",
+        cache=cache, results=results,
+        memory_metrics=bool(config.get("metrics_memory", False)),
+        file_metrics=bool(config.get("metrics_per_file", False)),
+        profile=config.get("profile_module") or None)
+
+
+def create_fleet_runner(config, cache=None, results=None):
+    """
+    Creates the FleetRunner for the machines in "machines"; "fleet_workers" sets
+    how many machines are analyzed at the same time.
+    """
+    return FleetRunner(lambda: create_engine(config, cache, results),
+                       max_workers=config.get("fleet_workers", DEFAULT_FLEET_WORKERS))
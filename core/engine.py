@@ -0,0 +1,433 @@
+"""
+Parallel execution of analysis modules.
+
+Every selected module runs as its own job on a thread pool (or optionally a
+process pool). Results are reported through a callback as soon as each
+module finishes, so the total run time is set by the slowest module rather
+than by the sum of all of them. Each job has a timeout and the whole run can
+be cancelled. Modules that read their files through core.reader consumers are
+grouped into one task so that every file is read only once, and so are
+version 2 modules (see core.plugin_api) that read the same kind of input;
+version 2 modules also report progress and stop when cancelled or timed
+out. Version 1 modules run through the plugin API's adapter. With a
+ResultCache, modules whose code and inputs did not change since an earlier
+run are answered from the cache without running at all. Every task is
+measured (see core.metrics) and one module can be run under cProfile.
+"""
+import os
+import time
+import threading
+import importlib
+import concurrent.futures
+
+from core.reader import SharedLogReader
+from core.parse_cache import ParseCache
+from core.result_cache import result_key
+from core.logservice import get_log
+from core.results import make_findings
+from core.plugin_api import CancelToken, Context, SharedRecords, plugin_for, run_plugin, shared_key
+from core.metrics import (TaskMeter, MemoryTracing, module_metrics, input_bytes, write_metrics, profile_path,
+                          profile_call)
+
+DEFAULT_MODULE_TIMEOUT = 600    # seconds a single module may run
+POLL_INTERVAL = 0.1             # how often timeouts and cancellation are checked
+PROGRESS_INTERVAL = 0.25        # seconds between progress reports of a module
+
+
+def _own_task(plugin, context, options):
+    """
+    Runs one module on its own (see core.plugin_api) and measures it.
+    Like every task, returns (list of outcomes, list of metrics), one per job.
+    """
+    with MemoryTracing(options.get("memory")), TaskMeter() as meter:
+        if options.get("profile"):
+            outcome = profile_call(options["profile"], run_plugin, plugin, context)
+        else:
+            outcome = run_plugin(plugin, context)
+    return [outcome], [module_metrics(meter.values, input_bytes(context.files))]
+
+
+def _records_task(plugins, contexts, options):
+    """
+    Runs version 2 modules on one shared read of their input and measures each
+    module on its own thread.
+    """
+    metrics = [None] * len(contexts)
+
+    def measured(plugin, context):
+        with TaskMeter() as meter:
+            outcome = run_plugin(plugin, context)
+        metrics[contexts.index(context)] = module_metrics(meter.values, input_bytes(context.files),
+                                                          modules=len(contexts))
+        return outcome
+
+    with MemoryTracing(options.get("memory")):
+        outcomes = SharedRecords(contexts).run(plugins, measured)
+    return outcomes, metrics
+
+
+def _shared_task(modules, files_lists, cache_ids, cache, start_date, end_date, cancelled, options):
+    """
+    Runs consumer modules with one shared pass over their files and measures the pass.
+    The outcomes are None if the run was cancelled.
+    """
+    with MemoryTracing(options.get("memory")), TaskMeter() as meter:
+        consumers = [module.create_consumer(start_date, end_date) for module in modules]
+        reader = SharedLogReader(cancelled=cancelled, cache=cache, window=(start_date, end_date),
+                                 file_metrics=options.get("per_file", False))
+        items = list(zip(consumers, files_lists, cache_ids))
+        if options.get("profile"):
+            completed = profile_call(options["profile"], reader.run, items)
+        else:
+            completed = reader.run(items)
+        outcomes = [consumer.result() for consumer in consumers] if completed else None
+    metrics = []
+    for consumer in consumers:
+        bytes_read, lines, per_file = reader.consumer_stats(consumer)
+        metrics.append(module_metrics(meter.values, bytes_read, lines, len(consumers), per_file))
+    return outcomes, metrics
+
+
+def _run_module_by_name(module_name, files, start_date, end_date, options):
+    """Imports a module in a worker process and runs it."""
+    module = importlib.import_module(module_name)
+    info = dict(module.MODULE_INFO, module=module)
+    return _own_task(plugin_for(info), Context(info, files, start_date, end_date), options)
+
+
+def _run_shared_by_name(module_names, files_lists, cache_ids, cache_path, start_date, end_date, options):
+    """Imports consumer modules in a worker process and runs one shared read for them."""
+    modules = [importlib.import_module(name) for name in module_names]
+    cache = ParseCache(cache_path) if cache_path else None
+    try:
+        outcomes, metrics = _shared_task(modules, files_lists, cache_ids, cache, start_date, end_date, None,
+                                         options)
+    finally:
+        if cache is not None:
+            cache.close()
+    return outcomes, metrics
+
+
+class AnalysisJob:
+    """One module together with the files it should analyze."""
+
+    def __init__(self, info, files):
+        self.info = info
+        self.files = files
+        self.name = info.get("name", "Unknown Module")
+        self.timeout = info.get("timeout")
+        self.started = None     # time.monotonic() when the job began running
+        self.cached = False     # True if the result came from the ResultCache
+        self.seconds = None     # run time, set when the result is reported
+        self.findings = []      # per-file Findings the module returned with its result
+        self.metrics = None     # performance numbers of the run (see core.metrics), None if it did not run
+        self.token = None       # CancelToken of the run; stops a version 2 module
+        self.progress = None    # last Progress the module reported
+
+
+class AnalysisEngine:
+    """
+    Runs AnalysisJobs in parallel.
+    run() blocks the calling thread, so the GUI calls it from a worker thread;
+    cancel() may be called from any thread.
+    """
+
+    def __init__(self, max_workers=None, timeout=DEFAULT_MODULE_TIMEOUT, use_processes=False, cache=None,
+                 results=None, memory_metrics=False, file_metrics=False, profile=None):
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.timeout = timeout
+        self.use_processes = use_processes
+        # Optional ParseCache for per-file summaries of consumer modules
+        self.cache = cache
+        # Optional ResultCache with the outcomes of earlier runs
+        self.results = results
+        # Optional metrics: tracemalloc peaks and per-file numbers
+        self.memory_metrics = memory_metrics
+        self.file_metrics = file_metrics
+        # Id, name or import name of a module to run under cProfile
+        self.profile = profile
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Stops waiting for running modules and drops the ones that have not started
+        yet. A cancel before run() stops that run too; it holds until reset().
+        """
+        self._cancel_event.set()
+
+    def reset(self):
+        """Clears an earlier cancel(), so the engine can run again."""
+        self._cancel_event.clear()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _profiled(self, job):
+        if not self.profile:
+            return False
+        info = job.info
+        return self.profile in (info.get("id"), job.name, getattr(info.get("module"), "__name__", None))
+
+    def _options(self, jobs):
+        """Measurement options of a task; a task with the profiled module is run under cProfile."""
+        profiled = [job for job in jobs if self._profiled(job)]
+        return {"memory": self.memory_metrics, "per_file": self.file_metrics,
+                "profile": profile_path(profiled[0].info.get("id") or profiled[0].name) if profiled else None}
+
+    @staticmethod
+    def _context(job, start_date, end_date, progress):
+        """The plugin API context of a job; progress(job, Progress) receives its reports."""
+        def report(value):
+            job.progress = value
+            if progress is not None:
+                progress(job, value)
+        return Context(job.info, job.files, start_date, end_date, job.token, report)
+
+    def _call(self, job, start_date, end_date, progress=None):
+        """
+        Runs a job on a worker thread and records when it started.
+        Like every task, returns (outcomes, metrics) with one (result, status) and one metrics dict per job.
+        """
+        job.started = time.monotonic()
+        try:
+            plugin = plugin_for(job.info)
+            context = self._context(job, start_date, end_date, progress)
+        except ValueError as e:
+            return [(str(e), "Red")], [None]
+        return _own_task(plugin, context, self._options([job]))
+
+    def _call_records(self, jobs, start_date, end_date, progress=None):
+        """Runs version 2 modules with the same input on one shared read. Returns (outcomes, metrics)."""
+        started = time.monotonic()
+        for job in jobs:
+            job.started = started
+        return _records_task([plugin_for(job.info) for job in jobs],
+                             [self._context(job, start_date, end_date, progress) for job in jobs],
+                             self._options(jobs))
+
+    def _records_key(self, job):
+        """Key under which a job can share the read of its input with other jobs, or None."""
+        if self.use_processes or self._profiled(job):
+            return None
+        try:
+            plugin_for(job.info)
+            return shared_key(job.info)
+        except ValueError:
+            return None
+
+    def _call_shared(self, jobs, start_date, end_date):
+        """
+        Runs all consumer modules with one shared pass over their files.
+        Returns (outcomes, metrics) aligned with jobs.
+        """
+        started = time.monotonic()
+        for job in jobs:
+            job.started = started
+        outcomes, metrics = _shared_task([job.info["module"] for job in jobs], [job.files for job in jobs],
+                                         [self.cache_id(job) for job in jobs], self.cache, start_date, end_date,
+                                         self._cancel_event.is_set, self._options(jobs))
+        if self.cache is not None:
+            self.cache.flush()
+        if outcomes is None:
+            return [("Cancelled.", "Yellow")] * len(jobs), metrics
+        return outcomes, metrics
+
+    @staticmethod
+    def cache_id(job):
+        """Identifies a module in the parse cache: (import name, version)."""
+        return job.info["module"].__name__, str(job.info.get("version", "0.0"))
+
+    @staticmethod
+    def result_key(job, start_date, end_date):
+        """Memo key of a job (see core.result_cache), or None if it cannot be memoized."""
+        info = job.info
+        return result_key(info.get("id") or info["module"].__name__, info.get("version", "0.0"),
+                          info.get("source_hash"), job.files, start_date, end_date)
+
+    def _from_results(self, jobs, start_date, end_date, callback):
+        """Reports the jobs found in the ResultCache and returns the ones that must run."""
+        keys = {}
+        remaining = []
+        for job in jobs:
+            job.cached = False
+            if job.info.get("module") is None:
+                remaining.append(job)
+                continue
+            key = self.result_key(job, start_date, end_date)
+            outcome = self.results.get(key)
+            if outcome is None:
+                keys[job] = key
+                remaining.append(job)
+            else:
+                job.cached = True
+                job.findings = make_findings(outcome[2])
+                callback(job, outcome[0], outcome[1])
+        return remaining, keys
+
+    def _submit(self, executor, job, start_date, end_date, progress=None):
+        if not self.use_processes:
+            return executor.submit(self._call, job, start_date, end_date, progress)
+        job.started = time.monotonic()
+        try:
+            plugin_for(job.info)
+        except ValueError as e:
+            future = concurrent.futures.Future()
+            future.set_result(([(str(e), "Red")], [None]))
+            return future
+        return executor.submit(_run_module_by_name, job.info["module"].__name__, job.files, start_date, end_date,
+                               self._options([job]))
+
+    def _submit_shared(self, executor, jobs, start_date, end_date):
+        if not self.use_processes:
+            return executor.submit(self._call_shared, jobs, start_date, end_date)
+        started = time.monotonic()
+        for job in jobs:
+            job.started = started
+        return executor.submit(_run_shared_by_name, [job.info["module"].__name__ for job in jobs],
+                               [job.files for job in jobs], [self.cache_id(job) for job in jobs],
+                               self.cache.path if self.cache is not None else None, start_date, end_date,
+                               self._options(jobs))
+
+    @staticmethod
+    def _timed(callback):
+        """
+        Wraps a result callback so that every reported job is logged with its run
+        time and its metrics are appended to metrics.jsonl.
+        """
+        def report(job, result, status):
+            seconds = time.monotonic() - job.started if job.started is not None and not job.cached else 0.0
+            job.seconds = seconds
+            get_log(job.name).log("finished", result, status=status, seconds=round(seconds, 3),
+                                  files=len(job.files), cached=job.cached, findings=len(job.findings))
+            write_metrics(job, status)
+            callback(job, result, status)
+        return report
+
+    @staticmethod
+    def _throttled(progress):
+        """Wraps a progress callback so that a module reports at most every PROGRESS_INTERVAL seconds."""
+        if progress is None:
+            return None
+        lock = threading.Lock()
+        last = {}
+
+        def report(job, value):
+            now = time.monotonic()
+            with lock:
+                if now - last.get(job, 0.0) < PROGRESS_INTERVAL and value.fraction != 1.0:
+                    return
+                last[job] = now
+            progress(job, value)
+        return report
+
+    def run(self, jobs, start_date, end_date, callback, progress=None):
+        """
+        Runs all jobs and calls callback(job, result, status) as each one finishes,
+        times out or is cancelled (job.findings holds the module's findings).
+        progress(job, Progress) is called, from the worker threads, with the
+        progress version 2 modules report. Returns when every job has been reported.
+        Modules that provide create_consumer share a single read of their files,
+        and so do version 2 modules with the same input; all other modules run
+        on their own in parallel.
+        """
+        callback = self._timed(callback)
+        progress = self._throttled(progress)
+        keys = {}
+        for job in jobs:
+            job.metrics = None
+            job.progress = None
+            job.token = CancelToken()
+        if self.results is not None:
+            jobs, keys = self._from_results(jobs, start_date, end_date, callback)
+        if not jobs:
+            return
+        shared_jobs = [job for job in jobs if hasattr(job.info["module"], "create_consumer")]
+        own_jobs = [job for job in jobs if job not in shared_jobs]
+        # A profiled consumer module gets a read of its own, so the profile shows only its work
+        profiled = [job for job in shared_jobs if self._profiled(job)]
+        shared_groups = [group for group in ([job for job in shared_jobs if job not in profiled], profiled) if group]
+        # Version 2 modules that read the same input share one read of it
+        records_groups = {}
+        for job in own_jobs:
+            key = self._records_key(job)
+            if key is not None:
+                records_groups.setdefault(key, []).append(job)
+        records_groups = [group for group in records_groups.values() if len(group) > 1]
+        own_jobs = [job for job in own_jobs if not any(job in group for group in records_groups)]
+        task_count = len(own_jobs) + len(shared_groups) + len(records_groups)
+        if self.use_processes:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(self.max_workers, task_count))
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_workers, task_count), thread_name_prefix="analysis")
+
+        # future -> list of jobs it reports results for
+        pending = {}
+        try:
+            for group in shared_groups:
+                pending[self._submit_shared(executor, group, start_date, end_date)] = group
+            for group in records_groups:
+                pending[executor.submit(self._call_records, group, start_date, end_date, progress)] = group
+            for job in own_jobs:
+                pending[self._submit(executor, job, start_date, end_date, progress)] = [job]
+
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=POLL_INTERVAL, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    task_jobs = pending.pop(future)
+                    if future.cancelled():
+                        for job in task_jobs:
+                            callback(job, "Cancelled.", "Yellow")
+                        continue
+                    try:
+                        outcomes, metrics = future.result()
+                        # Only complete runs are remembered
+                        remember = not self._cancel_event.is_set() and outcomes is not None
+                        if outcomes is None:
+                            outcomes = [("Cancelled.", "Yellow")] * len(task_jobs)
+                    except Exception as e:
+                        outcomes, metrics = [(f"Error: {e}", "Red")] * len(task_jobs), [None] * len(task_jobs)
+                        remember = False
+                    for job, outcome, job_metrics in zip(task_jobs, outcomes, metrics):
+                        job.metrics = job_metrics
+                        # A module may return (result, status, findings)
+                        job.findings = make_findings(outcome[2]) if len(outcome) > 2 else []
+                        if remember and keys.get(job) is not None and not job.token.cancelled:
+                            self.results.put(keys[job], outcome[0], outcome[1], job.findings)
+                        callback(job, outcome[0], outcome[1])
+
+                if self._cancel_event.is_set():
+                    # Version 2 modules stop at their next record; version 1 modules cannot be
+                    # interrupted, their results are discarded
+                    for future, task_jobs in list(pending.items()):
+                        future.cancel()
+                        for job in task_jobs:
+                            job.token.cancel()
+                            callback(job, "Cancelled.", "Yellow")
+                    pending.clear()
+                    break
+
+                now = time.monotonic()
+                for future, task_jobs in list(pending.items()):
+                    started = task_jobs[0].started
+                    if started is None:
+                        continue
+                    # A version 2 module stops at its own timeout even when it shares its task
+                    limits = [job.timeout or self.timeout or 0 for job in task_jobs]
+                    for job, limit in zip(task_jobs, limits):
+                        if limit and now - started > limit:
+                            job.token.cancel(f"Timed out after {limit} s.", "Red")
+                    # The task is dropped only when every job in it has a limit (0: none)
+                    timeout = max(limits) if all(limits) else 0
+                    if timeout and now - started > timeout:
+                        future.cancel()
+                        del pending[future]
+                        for job in task_jobs:
+                            callback(job, f"Timed out after {timeout} s.", "Red")
+        finally:
+            # Do not wait for abandoned (timed out or cancelled) modules
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.results is not None:
+                self.results.flush()
@@ -0,0 +1,125 @@
+"""
+Fleet mode: the same analysis over the log folders of many machines.
+
+Machines are registered in config.json, one log folder per machine:
+    "machines": {"Linac 1": "D:/logs/linac1", "Linac 2": "D:/logs/linac2"}
+Every machine is analyzed by its own AnalysisEngine and the machines are
+spread over a bounded pool ("fleet_workers"), so a fleet takes about
+machines / workers times one run instead of one run per machine in a row.
+The parse and result caches are shared by all machines.
+"""
+import os
+import threading
+import concurrent.futures
+
+from core.catalog import FileCatalog
+from core.matcher import ModuleMatcher
+from core.engine import AnalysisJob
+
+DEFAULT_FLEET_WORKERS = 4
+
+
+def configured_machines(config):
+    """Returns the (name, log directory) pairs registered in the configuration."""
+    machines = config.get("machines") or {}
+    if isinstance(machines, dict):
+        return [(str(name), str(directory)) for name, directory in machines.items()]
+    # Also accepted: a list of {"name": ..., "log_directory": ...}
+    return [(str(m.get("name") or os.path.basename(os.path.normpath(m["log_directory"]))), str(m["log_directory"]))
+            for m in machines if m.get("log_directory")]
+
+
+def machine_name(directory):
+    """Default machine name for a log directory: its folder name."""
+    return os.path.basename(os.path.normpath(directory)) or directory
+
+
+def analyze_directory(directory, modules, start_date, end_date, engine, callback):
+    """
+    Runs the modules over the matching files of one log directory and reports
+    every job through callback(job, result, status). Returns the jobs in module order.
+    """
+    matcher = ModuleMatcher(modules)
+    catalog = FileCatalog(directory, span_cache=engine.cache)
+    files = [entry.path for entry in catalog.select(start_date, end_date, matcher)]
+    jobs = [AnalysisJob(info, module_files) for info, module_files in zip(modules, matcher.dispatch(files))]
+    engine.run(jobs, start_date, end_date, callback)
+    return jobs
+
+
+class FleetRunner:
+    """
+    Analyzes several machines in parallel. engine_factory() returns a new
+    AnalysisEngine for each machine; cancel() may be called from any thread.
+    """
+
+    def __init__(self, engine_factory, max_workers=DEFAULT_FLEET_WORKERS):
+        self.engine_factory = engine_factory
+        self.max_workers = max(1, int(max_workers))
+        self._cancel_event = threading.Event()
+        self._engines = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Stops the running machines and skips the ones that have not started."""
+        self._cancel_event.set()
+        with self._lock:
+            for engine in self._engines:
+                engine.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self, machines, modules, start_date, end_date, callback):
+        """
+        Runs the modules for every (name, directory) machine and calls
+        callback(name, directory, job, result, status) for each result.
+        Calls are serialized, so the callback needs no locking of its own.
+        Returns when all machines are done or the run was cancelled.
+        """
+        self._cancel_event.clear()
+        if not machines or not modules:
+            return
+        report_lock = threading.Lock()
+
+        def analyze(name, directory):
+            reported = set()    # ids of the module infos with a result
+
+            def report(job, result, status):
+                with report_lock:
+                    reported.add(id(job.info))
+                    callback(name, directory, job, result, status)
+
+            if self._cancel_event.is_set():
+                return
+            if not os.path.isdir(directory):
+                for info in modules:
+                    report(AnalysisJob(info, []), f"Log directory not found: {directory}", "Red")
+                return
+            engine = self.engine_factory()
+            with self._lock:
+                self._engines.add(engine)
+            # cancel() may have run between the check above and the registration
+            if self._cancel_event.is_set():
+                engine.cancel()
+            try:
+                analyze_directory(directory, modules, start_date, end_date, engine, report)
+            except Exception as e:
+                print(f"Error analyzing {name}: {e}")
+                # The modules left without a result fail like those of a missing folder
+                for info in modules:
+                    if id(info) not in reported:
+                        report(AnalysisJob(info, []), f"Error analyzing {directory}: {e}", "Red")
+            finally:
+                with self._lock:
+                    self._engines.discard(engine)
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(machines)), thread_name_prefix="fleet") as executor:
+            futures = {executor.submit(analyze, name, directory): name for name, directory in machines}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error analyzing {futures[future]}: {e}")
@@ -0,0 +1,148 @@
+"""
+Central log of the analyzer (output.log next to the program).
+
+Modules and the engine do not open the log file themselves. They get a
+handle from get_log(name) and put structured records on an in-memory queue;
+a background writer thread turns them into JSON lines and appends them in
+batches, so writing the log never delays an analysis. The file is rotated
+by size (output.log.1, output.log.2, ...).
+
+Worker processes (analysis_executor "process") have no writer thread and
+append their records directly; only the main process rotates the file.
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import datetime
+import threading
+import multiprocessing
+
+LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output.log")
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024    # rotate output.log above 5 MiB
+DEFAULT_BACKUP_COUNT = 3
+BATCH_SIZE = 1000                      # records written with one open/write
+FLUSH_INTERVAL = 0.5                   # seconds the writer collects records before writing
+
+
+class LogService:
+    """Queue plus background writer for JSON log records."""
+
+    def __init__(self, path=LOG_FILE, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        # Worker processes write directly and leave rotation to the main process
+        self.direct = multiprocessing.parent_process() is not None
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        """Queues one record (a JSON-serializable dict); returns immediately."""
+        if self.direct:
+            self._write_batch([record])
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                    self._thread.start()
+        self._queue.put(record)
+
+    def close(self):
+        """Writes all queued records and stops the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            record = self._queue.get()
+            if record is None:
+                break
+            batch = [record]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            self._write_batch(batch)
+
+    def _write_batch(self, records):
+        data = "".join(json.dumps(record, default=str, ensure_ascii=False) + "\n" for record in records)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+                size = f.tell()
+            if not self.direct and self.max_bytes and size > self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            print(f"Error writing log {self.path}: {e}")
+
+    def _rotate(self):
+        """output.log -> output.log.1 -> output.log.2 ...; the oldest backup is dropped."""
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, self.path + ".1")
+
+
+class ModuleLog:
+    """Handle a module uses to write records to the central log."""
+
+    def __init__(self, service, name):
+        self.service = service
+        self.name = name
+
+    def log(self, event, message="", **fields):
+        """
+        Writes one record: time, module name, event, message and any extra fields
+        (for example status="Green" or seconds=1.25).
+        """
+        record = {"time": datetime.datetime.now().isoformat(timespec="milliseconds"),
+                  "module": self.name, "event": event, "message": str(message)}
+        record.update(fields)
+        self.service.write(record)
+
+
+_service = None
+_service_lock = threading.Lock()
+_settings = {}
+
+
+def configure(max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT, path=LOG_FILE):
+    """Sets the rotation limits (and path) of the shared log; call before the first get_log()."""
+    _settings.update(max_bytes=max_bytes, backup_count=backup_count, path=path)
+
+
+def get_service():
+    """Returns the shared LogService, creating it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = LogService(**_settings)
+                atexit.register(_service.close)
+    return _service
+
+
+def get_log(name):
+    """Returns a log handle for a module (or any other component) of the given name."""
+    return ModuleLog(get_service(), name)
@@ -0,0 +1,98 @@
+"""
+Precompiled file name matcher for the selected analysis modules.
+
+The fnmatch patterns of all selected modules are compiled once into a
+single combined regular expression. Matching a file name then costs one
+regex test, and the list of modules that want a file is computed once per
+file name and remembered.
+"""
+import os
+import re
+import fnmatch
+
+
+def module_patterns(info):
+    """
+    The file name patterns of a module: "pattern" is one pattern, or a list of
+    them for modules that read several kinds of logs.
+    """
+    pattern = info.get("pattern")
+    if not pattern:
+        return []
+    return [pattern] if isinstance(pattern, str) else list(pattern)
+
+
+class ModuleMatcher:
+    """
+    Maps file names to the modules whose "pattern" matches them.
+    Modules are MODULE_INFO dicts; a module without a pattern receives every file
+    but does not add files to the file list (same as before).
+    """
+
+    def __init__(self, modules):
+        self.modules = list(modules)
+        # Distinct pattern -> indexes of the modules that use it
+        self._pattern_modules = {}
+        self._catch_all = []
+        for index, info in enumerate(self.modules):
+            patterns = module_patterns(info)
+            for pattern in patterns:
+                self._pattern_modules.setdefault(os.path.normcase(pattern), []).append(index)
+            if not patterns:
+                self._catch_all.append(index)
+
+        self._patterns = list(self._pattern_modules)
+        self._regexes = [re.compile(fnmatch.translate(p)) for p in self._patterns]
+        if self._patterns:
+            combined = "|".join("(?:%s)" % fnmatch.translate(p) for p in self._patterns)
+            self._combined = re.compile(combined)
+        else:
+            self._combined = None
+        # File name -> tuple of module indexes (file names repeat across refreshes)
+        self._cache = {}
+
+    def __bool__(self):
+        return self._combined is not None
+
+    @property
+    def key(self):
+        """Identifies the selection; equal keys mean an equivalent matcher."""
+        return tuple((info.get("name"), tuple(module_patterns(info))) for info in self.modules)
+
+    def matches(self, name):
+        """Returns True if the file name matches the pattern of at least one selected module."""
+        if self._combined is None:
+            return False
+        return self._combined.match(os.path.normcase(name)) is not None
+
+    def modules_for(self, name):
+        """Returns a tuple with the indexes of the modules that want this file name."""
+        result = self._cache.get(name)
+        if result is not None:
+            return result
+        indexes = []
+        norm_name = os.path.normcase(name)
+        if self._combined is not None and self._combined.match(norm_name):
+            if len(self._regexes) == 1:
+                indexes.extend(self._pattern_modules[self._patterns[0]])
+            else:
+                for pattern, regex in zip(self._patterns, self._regexes):
+                    if regex.match(norm_name):
+                        indexes.extend(self._pattern_modules[pattern])
+        indexes.extend(self._catch_all)
+        # A module with several patterns that match the same name gets the file once
+        result = tuple(sorted(set(indexes)))
+        self._cache[name] = result
+        return result
+
+    def dispatch(self, files):
+        """
+        Returns a list aligned with self.modules that holds, for every module,
+        the files it should analyze (in the original order).
+        Files can be base names or paths; only the base name is matched.
+        """
+        per_module = [[] for _ in self.modules]
+        for file in files:
+            for index in self.modules_for(os.path.basename(file)):
+                per_module[index].append(file)
+        return per_module
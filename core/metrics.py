@@ -0,0 +1,196 @@
+"""
+Performance metrics of module runs.
+
+The engine measures every task it runs: wall time, CPU time of the thread
+that ran it, and the bytes and lines read for each module. Optionally it also
+records the peak of Python memory allocations ("metrics_memory", uses
+tracemalloc and slows the analysis down) and numbers for every file
+("metrics_per_file"). Modules that are read together by the shared reader run
+as one task, so they report the wall and CPU time of the whole pass.
+
+The metrics travel with each result and are appended to metrics.jsonl next
+to the program, one JSON line per module run.
+
+"profile_module" in config.json (--profile on the command line) runs one
+module under cProfile and writes profiles/<module>-<time>.prof (pstats
+format) and a .txt summary of the most expensive functions.
+"""
+import os
+import io
+import time
+import atexit
+import pstats
+import cProfile
+import datetime
+import threading
+import tracemalloc
+
+from core.archives import is_virtual, split_virtual
+from core.logservice import LogService
+
+PROGRAM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_FILE = os.path.join(PROGRAM_DIR, "metrics.jsonl")
+PROFILE_DIR = os.path.join(PROGRAM_DIR, "profiles")
+PROFILE_TOP_FUNCTIONS = 40       # functions listed in the text summary of a profile
+SLOWEST_FILES_SHOWN = 10
+
+
+class TaskMeter:
+    """
+    Context manager measuring the task that runs on the current thread:
+    wall time, thread CPU time and, while tracemalloc is tracing, how far
+    Python allocations rose above their level at the start. Tasks running
+    at the same time share the process-wide peak, so theirs is an upper bound.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._memory = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        return self
+
+    def __exit__(self, *exc_info):
+        self.values = {"wall_seconds": time.perf_counter() - self._wall,
+                       "cpu_seconds": time.thread_time() - self._cpu}
+        if self._memory is not None and tracemalloc.is_tracing():
+            self.values["peak_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - self._memory)
+        return False
+
+
+class MemoryTracing:
+    """
+    Keeps tracemalloc running while at least one run needs it. Overlapping
+    runs share the trace; the peak is reset when the first one starts.
+    """
+    _lock = threading.Lock()
+    _users = 0
+    _started = False
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+
+    def __enter__(self):
+        if self.enabled:
+            with MemoryTracing._lock:
+                if MemoryTracing._users == 0:
+                    MemoryTracing._started = not tracemalloc.is_tracing()
+                    if MemoryTracing._started:
+                        tracemalloc.start()
+                    tracemalloc.reset_peak()
+                MemoryTracing._users += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.enabled:
+            with MemoryTracing._lock:
+                MemoryTracing._users -= 1
+                if MemoryTracing._users == 0 and MemoryTracing._started:
+                    tracemalloc.stop()
+        return False
+
+
+def input_bytes(files):
+    """Size of the input files of a module that reads them itself (an archive counts once)."""
+    paths = {split_virtual(path)[0] if is_virtual(path) else path for path in files}
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+
+def module_metrics(task, bytes_read=None, lines=None, modules=1, per_file=None):
+    """Metrics of one module from the TaskMeter values of its task and what was read for it."""
+    metrics = dict(task)
+    metrics["bytes_read"] = bytes_read
+    metrics["lines"] = lines
+    if bytes_read and metrics.get("wall_seconds"):
+        metrics["mb_per_second"] = bytes_read / 1024 ** 2 / metrics["wall_seconds"]
+    if modules > 1:
+        metrics["shared_with"] = modules - 1
+    if per_file is not None:
+        metrics["per_file"] = per_file
+    return metrics
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} GB"
+
+
+def format_metrics(metrics):
+    """One-line summary such as "2.31 s, CPU 2.05 s, 40.1 MB, 17.4 MB/s, 1.2M lines, peak 3.2 MB"."""
+    if not metrics:
+        return ""
+    parts = [f"{metrics['wall_seconds']:.2f} s"]
+    if metrics.get("cpu_seconds") is not None:
+        parts.append(f"CPU {metrics['cpu_seconds']:.2f} s")
+    if metrics.get("bytes_read"):
+        parts.append(format_size(metrics["bytes_read"]))
+    if metrics.get("mb_per_second"):
+        parts.append(f"{metrics['mb_per_second']:.1f} MB/s")
+    if metrics.get("lines"):
+        lines = metrics["lines"]
+        parts.append(f"{lines / 1e6:.1f}M lines" if lines >= 1e6 else f"{lines} lines")
+    if metrics.get("peak_bytes") is not None:
+        parts.append("peak " + format_size(metrics["peak_bytes"]))
+    if metrics.get("shared_with"):
+        parts.append(f"shared with {metrics['shared_with']}")
+    return ", ".join(parts)
+
+
+def format_file_metrics(metrics, limit=SLOWEST_FILES_SHOWN):
+    """The slowest files of a module run, one per line (empty without per-file metrics)."""
+    files = sorted(metrics.get("per_file") or (), key=lambda item: item["seconds"], reverse=True)
+    return "\n".join(f"{item['seconds']:.3f} s  {format_size(item['bytes'])}  {item['lines']} lines  "
+                     f"{os.path.basename(item['path'])}" for item in files[:limit])
+
+
+_metrics_service = None
+_metrics_lock = threading.Lock()
+
+
+def write_metrics(job, status):
+    """Appends the metrics of a reported job to metrics.jsonl (through a queued LogService)."""
+    global _metrics_service
+    if _metrics_service is None:
+        with _metrics_lock:
+            if _metrics_service is None:
+                _metrics_service = LogService(METRICS_FILE)
+                atexit.register(_metrics_service.close)
+    record = {"time": datetime.datetime.now().isoformat(timespec="milliseconds"),
+              "module": job.name, "id": job.info.get("id", ""), "status": str(status),
+              "files": len(job.files), "cached": job.cached}
+    if job.files:
+        record["directory"] = os.path.dirname(job.files[0])
+    record.update(job.metrics or {})
+    _metrics_service.write(record)
+
+
+def profile_path(module_id):
+    """Path (without extension) for a new profile of a module in the profiles folder."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(PROFILE_DIR, f"{module_id}-{stamp}")
+
+
+def profile_call(path, func, *args):
+    """Runs func(*args) under cProfile and writes path.prof and path.txt; returns what func returned."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        profiler.dump_stats(path + ".prof")
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        print(f"Profile written to {path}.prof")
@@ -0,0 +1,229 @@
+"""
+Persistent cache of per-file module summaries.
+
+Rotated log files never change, so the summary a module computed for a file
+can be reused by later runs. Summaries are stored in a SQLite database next
+to config.json, keyed by file path and module, and are only valid while the
+file size, mtime and the module version are unchanged. Every summary also
+records the date window it was computed for; it is reused for any window
+that lies inside it. The database is capped in size and evicts the least
+recently used summaries first.
+
+Live logs (KVPanel.log, SedecalSerial.log) keep growing while the machine
+runs. For plain files the cache also stores the byte offset reading stopped
+at and a checksum of the data before it. When the file has grown and the
+checksum still matches, only the appended bytes are read and fed on top of
+the cached summary; a truncated or rotated file fails the check and is read
+in full.
+
+The same database keeps the time span of the log entries of every file (see
+core.timeindex), so the file list can be dated by content without reading
+the head and tail of every file again at each start.
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+from core.archives import is_virtual, split_virtual
+
+PARSE_CACHE_FILE = "parse_cache.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024     # 256 MiB of summaries
+SCHEMA_VERSION = 3
+# Bytes hashed at the start of a file and right before the resume offset
+CHECKSUM_BLOCK = 64 * 1024
+MAX_SPANS = 500000                        # file spans kept, the oldest are dropped first
+
+
+def file_identity(path):
+    """
+    Returns (size, mtime) of a file, or None if it cannot be read.
+    For archive members the archive file itself is used.
+    """
+    real_path = split_virtual(path)[0] if is_virtual(path) else path
+    try:
+        st = os.stat(real_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime
+
+
+def prefix_checksum(path, offset):
+    """
+    Checksum of the first offset bytes of a plain file, taken from the first
+    and the last CHECKSUM_BLOCK bytes of that range. Returns None if the file
+    cannot be read or is shorter than offset.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(min(offset, CHECKSUM_BLOCK))
+            tail_start = max(offset - CHECKSUM_BLOCK, len(head))
+            f.seek(tail_start)
+            tail = f.read(offset - tail_start)
+    except OSError:
+        return None
+    if len(head) < min(offset, CHECKSUM_BLOCK) or len(tail) < offset - tail_start:
+        return None    # shorter than offset
+    return f"{offset}:{zlib.crc32(tail, zlib.crc32(head)):08x}"
+
+
+class ParseCache:
+    """
+    SQLite store of JSON summaries. Safe to use from several threads;
+    writes are committed in batches by flush().
+    """
+
+    def __init__(self, path=PARSE_CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Summaries and spans are only a cache: an older layout is simply dropped
+            # (version 3: archive members are dated by their last entry)
+            self._db.execute("DROP TABLE IF EXISTS summaries")
+            self._db.execute("DROP TABLE IF EXISTS spans")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                path TEXT NOT NULL,
+                module TEXT NOT NULL,
+                version TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                first_key TEXT NOT NULL,
+                after_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                offset INTEGER,
+                checksum TEXT,
+                bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (path, module)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS spans (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                first REAL NOT NULL,
+                last REAL NOT NULL,
+                stored REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS spans_stored ON spans (stored)")
+        self._db.commit()
+
+    def get(self, path, identity, module, version, first_key, after_key):
+        """
+        Returns the cached summary for a file and module if the file identity
+        and module version match and the cached window covers [first_key, after_key).
+        """
+        if identity is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version, size, mtime, first_key, after_key, data FROM summaries "
+                "WHERE path = ? AND module = ?", (path, module)).fetchone()
+            if (row is None or row[0] != version or row[1] != identity[0] or row[2] != identity[1]
+                    or row[3] > first_key or row[4] < after_key):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE summaries SET last_used = ? WHERE path = ? AND module = ?",
+                             (time.time(), path, module))
+            self._dirty = True
+            self.hits += 1
+        return json.loads(row[5])
+
+    def resume_point(self, path, identity, module, version, first_key, after_key):
+        """
+        For a file that changed since it was summarized, returns (offset, checksum, summary)
+        if reading can continue at offset; the caller must verify the checksum.
+        Returns None if the file has to be read in full.
+        """
+        if identity is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version, first_key, after_key, offset, checksum, data FROM summaries "
+                "WHERE path = ? AND module = ?", (path, module)).fetchone()
+        if (row is None or row[0] != version or row[1] > first_key or row[2] < after_key
+                or row[3] is None or row[3] > identity[0]):
+            return None    # unknown, outdated, narrower window, or truncated since
+        return row[3], row[4], json.loads(row[5])
+
+    def put(self, path, identity, module, version, first_key, after_key, summary,
+            offset=None, checksum=None):
+        """
+        Stores (or replaces) the summary of a file for a module. offset and checksum
+        (see prefix_checksum) allow a grown file to be resumed later.
+        """
+        if identity is None:
+            return
+        data = json.dumps(summary, separators=(",", ":"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, module, version, identity[0], identity[1], first_key, after_key,
+                 data, offset, checksum, len(data), time.time()))
+            self._dirty = True
+
+    def get_spans(self, files):
+        """
+        Returns {path: (first, last)} for the (path, size, mtime) files whose
+        span is stored for the same size and mtime.
+        """
+        spans = {}
+        files = list(files)
+        with self._lock:
+            for i in range(0, len(files), 500):
+                chunk = {path: (size, mtime) for path, size, mtime in files[i:i + 500]}
+                rows = self._db.execute(
+                    "SELECT path, size, mtime, first, last FROM spans WHERE path IN (%s)"
+                    % ",".join("?" * len(chunk)), list(chunk))
+                for path, size, mtime, first, last in rows:
+                    if chunk[path] == (size, mtime):
+                        spans[path] = (first, last)
+        return spans
+
+    def put_spans(self, rows):
+        """Stores (path, size, mtime, first, last) rows and commits them right away."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO spans VALUES (?, ?, ?, ?, ?, ?)",
+                                 [tuple(row) + (now,) for row in rows])
+            excess = self._db.execute("SELECT COUNT(*) FROM spans").fetchone()[0] - MAX_SPANS
+            if excess > 0:
+                self._db.execute("DELETE FROM spans WHERE path IN "
+                                 "(SELECT path FROM spans ORDER BY stored LIMIT ?)", (excess,))
+            self._db.commit()
+
+    def flush(self):
+        """Commits pending writes and evicts the least recently used summaries above the size cap."""
+        with self._lock:
+            if not self._dirty:
+                return
+            total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM summaries").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                rows = self._db.execute("SELECT rowid, bytes FROM summaries ORDER BY last_used")
+                doomed = []
+                for rowid, size in rows:
+                    if excess <= 0:
+                        break
+                    doomed.append((rowid,))
+                    excess -= size
+                self._db.executemany("DELETE FROM summaries WHERE rowid = ?", doomed)
+            self._db.commit()
+            self._dirty = False
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,172 @@
+"""
+Line parsers for the XVI service logs.
+
+Every log line of interest starts with an ISO timestamp
+("2023-05-01 12:34:56.789", "T" or "/" separators are accepted as well).
+Parsers work on raw bytes: the date prefix of a line can be compared with a
+date window before anything else is decoded, so lines outside the requested
+period cost almost nothing.
+
+KVPanel lines carry pot readings and the panel state, for example:
+    2023-05-01 12:34:56.789 PotA=2.345 PotB=2.301 State=Idle
+
+SedecalSerial lines record the serial traffic with the kV generator:
+    2023-05-01 12:34:56.789 TX: 02 4B 56 31 03
+    2023-05-01 12:34:56.812 RX: 06
+    2023-05-01 12:34:58.000 Timeout waiting for response
+    2023-05-01 12:34:58.001 Retry 1
+    2023-05-01 12:40:00.000 Port closed (disconnected)
+"""
+import os
+import re
+import datetime
+from collections import namedtuple
+
+# Typed KVPanel record: pots maps the pot name to its reading
+KVPanelRecord = namedtuple("KVPanelRecord", "timestamp pots state")
+# Typed SedecalSerial record: event is one of SERIAL_EVENTS
+SerialRecord = namedtuple("SerialRecord", "timestamp event detail")
+
+POT_RE = re.compile(rb"\b(Pot\w*)\s*[=:]\s*(-?\d+(?:\.\d+)?)", re.IGNORECASE)
+STATE_RE = re.compile(rb"\bState\s*[=:]\s*(\w+)", re.IGNORECASE)
+
+# The first keyword found after the timestamp decides the event of a serial line
+SERIAL_EVENT_RE = re.compile(
+    rb"\b(TX|Sent|Send|RX|Received|Recv|Timeout|Timed out|Retry|Retrying|"
+    rb"Disconnected|Disconnect|Port closed|Connection lost|Connected|Connect|Port opened)\b",
+    re.IGNORECASE)
+SERIAL_EVENTS = {
+    b"tx": "tx", b"sent": "tx", b"send": "tx",
+    b"rx": "rx", b"received": "rx", b"recv": "rx",
+    b"timeout": "timeout", b"timed out": "timeout",
+    b"retry": "retry", b"retrying": "retry",
+    b"disconnected": "disconnect", b"disconnect": "disconnect",
+    b"port closed": "disconnect", b"connection lost": "disconnect",
+    b"connected": "connect", b"connect": "connect", b"port opened": "connect",
+}
+
+
+def date_key(day):
+    """Returns the bytes prefix that a log line written on the given date starts with."""
+    return day.strftime("%Y-%m-%d").encode("ascii")
+
+
+def window_keys(start_date, end_date):
+    """Returns (first, after_last) date keys for an inclusive date range."""
+    return date_key(start_date), date_key(end_date + datetime.timedelta(days=1))
+
+
+def line_date_key(line):
+    """
+    Returns the date prefix of a line in "YYYY-MM-DD" form as bytes,
+    or None if the line does not start with a timestamp.
+    """
+    if line[4:5] == b"-" and line[7:8] == b"-":
+        return line[:10]
+    if line[4:5] == b"/" and line[7:8] == b"/":
+        return line[:10].replace(b"/", b"-")
+    return None
+
+
+def parse_timestamp(line):
+    """Decodes the timestamp at the start of a line (to the millisecond) or returns None."""
+    try:
+        year, month, day = int(line[0:4]), int(line[5:7]), int(line[8:10])
+        hour, minute, second = int(line[11:13]), int(line[14:16]), int(line[17:19])
+    except ValueError:
+        return None
+    microsecond = 0
+    if line[19:20] in (b".", b","):
+        digits = line[20:26]
+        end = 0
+        while end < len(digits) and 48 <= digits[end] <= 57:
+            end += 1
+        if end:
+            microsecond = int(digits[:end].ljust(6, b"0"))
+    try:
+        return datetime.datetime(year, month, day, hour, minute, second, microsecond)
+    except ValueError:
+        return None
+
+
+def line_seconds(line):
+    """Returns the time of day of a timestamped line in seconds (with fractions), or None."""
+    try:
+        seconds = int(line[11:13]) * 3600 + int(line[14:16]) * 60 + int(line[17:19])
+    except ValueError:
+        return None
+    if line[19:20] in (b".", b","):
+        digits = line[20:23]
+        if digits.isdigit():
+            seconds += int(digits) / 10.0 ** len(digits)
+    return seconds
+
+
+def serial_event(line):
+    """Returns the event name of a SedecalSerial line ("tx", "rx", "timeout", ...) or None."""
+    match = SERIAL_EVENT_RE.search(line, 19)
+    if match is None:
+        return None
+    return SERIAL_EVENTS.get(match.group(1).lower())
+
+
+def rotation_index(path):
+    """
+    Returns the rotation number of a log file: 0 for "name.log", N for "name.log.N".
+    Higher numbers are older files.
+    """
+    suffix = os.path.basename(path).rsplit(".", 1)[-1]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def chronological_rotation_order(paths):
+    """Sorts a rotation set (name.log, name.log.1, ...) from the oldest to the newest file."""
+    return sorted(paths, key=lambda p: (-rotation_index(p), os.path.basename(p)))
+
+
+def parse_kvpanel_line(line):
+    """Parses one KVPanel line into a KVPanelRecord, or returns None for other lines."""
+    if line_date_key(line) is None:
+        return None
+    timestamp = parse_timestamp(line)
+    if timestamp is None:
+        return None
+    pots = {name.decode("ascii"): float(value) for name, value in POT_RE.findall(line)}
+    match = STATE_RE.search(line)
+    state = match.group(1).decode("ascii", "replace") if match else None
+    if not pots and state is None:
+        return None
+    return KVPanelRecord(timestamp, pots, state)
+
+
+def parse_serial_line(line):
+    """Parses one SedecalSerial line into a SerialRecord, or returns None for other lines."""
+    if line_date_key(line) is None:
+        return None
+    event = serial_event(line)
+    if event is None:
+        return None
+    timestamp = parse_timestamp(line)
+    if timestamp is None:
+        return None
+    detail = line[19:].lstrip(b"0123456789.,").strip().decode("ascii", "replace")
+    return SerialRecord(timestamp, event, detail)
+
+
+def iter_records(lines, parse_line, start_date=None, end_date=None):
+    """
+    Yields the records parsed by parse_line from an iterable of raw lines.
+    Lines outside the date window are skipped by their date prefix alone, and
+    iteration stops at the first line after end_date (logs are chronological).
+    """
+    first_key, after_key = window_keys(start_date, end_date) if start_date and end_date else (None, None)
+    for line in lines:
+        if first_key is not None:
+            key = line_date_key(line)
+            if key is None or key < first_key:
+                continue
+            if key >= after_key:
+                return
+        record = parse_line(line)
+        if record is not None:
+            yield record
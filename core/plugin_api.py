@@ -0,0 +1,404 @@
+"""
+Plugin API, version 2.
+
+A version 1 module exports analyze(files, start_date, end_date) and does all
+its reading itself; the host can neither see how far it got nor stop it. A
+version 2 module declares in MODULE_INFO what it needs and lets the host do
+the reading:
+
+    MODULE_INFO = {
+        "name": "...", "group": "...", "version": "1.0",
+        "api": 2,
+        "pattern": ["KVPanel*.log", "SedecalSerial.log*"],
+        "input": "records",     # "records", "lines" or "files"
+        "window": "host",       # "host": only entries in the date range, "module": all of them
+        "fields": ["pots"],     # record fields that must be set (others are not delivered)
+    }
+
+    def run(context):
+        for event in context.records():
+            ...
+            yield 0.5           # progress: a fraction, a text or Progress(fraction, text)
+        return result, status, findings
+
+run() may also be a plain function that returns the outcome; code that
+cannot yield (inside a loop of a helper) reports with context.report().
+context.records() yields the TimelineEvents of the files merged in time
+order, context.lines() yields (path, line number, line) and
+context.open_files() yields (path, open binary file). These iterators check
+the cancellation token between items, so a module that is cancelled or runs
+past its timeout stops at its next item with Cancelled; long computations
+outside them call context.check(). Modules that read the same input with the
+same window are served by one read of their files (SharedRecords).
+
+Version 1 modules keep working unchanged: LegacyPlugin gives them the same
+interface, with input "files" and window "module".
+"""
+import queue
+import inspect
+import threading
+import concurrent.futures
+from collections import namedtuple
+
+from core.archives import open_log
+from core.matcher import module_patterns
+from core.parsers import window_keys, line_date_key
+from core.timeline import Timeline
+
+API_VERSION = 2
+INPUTS = ("records", "lines", "files")
+WINDOWS = ("host", "module")
+
+SHARED_BATCH = 1000     # items handed from the shared read to a module at once
+SHARED_QUEUE = 8        # batches a module may fall behind the shared read
+POLL_INTERVAL = 0.1     # how often blocked shared reads check for cancellation
+
+# What a module needs from the host, from its MODULE_INFO
+Needs = namedtuple("Needs", "api patterns input window fields")
+# A progress report; fraction is 0..1 or None, text may be empty
+Progress = namedtuple("Progress", "fraction text")
+
+
+class Cancelled(Exception):
+    """Raised inside a module when its run was cancelled or timed out."""
+
+
+class CancelToken:
+    """Tells a running module to stop; cancel() may be called from any thread."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+        self.status = None
+
+    def cancel(self, reason="Cancelled.", status="Yellow"):
+        """Stops the run; reason and status become its outcome."""
+        if not self._event.is_set():
+            self.reason = reason
+            self.status = status
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Raises Cancelled if the run should stop."""
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+
+def module_api(info):
+    """Plugin API version a module was written for (1 if it does not say)."""
+    return int(info.get("api", 1))
+
+
+def needs(info):
+    """Needs of a module from its MODULE_INFO; raises ValueError for values the host does not know."""
+    api = module_api(info)
+    if api == 1:
+        return Needs(1, module_patterns(info), "files", "module", ())
+    if api > API_VERSION:
+        raise ValueError(f"Module needs plugin API {api}; this program supports up to {API_VERSION}.")
+    source = info.get("input", "records")
+    window = info.get("window", "host")
+    if source not in INPUTS:
+        raise ValueError(f"Unknown input {source!r}; use one of {', '.join(INPUTS)}.")
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window {window!r}; use one of {', '.join(WINDOWS)}.")
+    return Needs(api, module_patterns(info), source, window, tuple(info.get("fields", ())))
+
+
+class LegacyPlugin:
+    """A version 1 module behind the version 2 interface: run() calls its analyze()."""
+
+    def __init__(self, module):
+        self.module = module
+
+    def run(self, context):
+        context.check()
+        return self.module.analyze(context.files, context.start_date, context.end_date)
+
+
+def plugin_for(info):
+    """
+    Returns the object whose run(context) analyzes for a loaded module, or raises
+    ValueError if the module cannot run.
+    """
+    module = info.get("module")
+    if module is None:
+        raise ValueError(info.get("load_error", "Module not loaded."))
+    if module_api(info) == 1:
+        if not hasattr(module, "analyze"):
+            raise ValueError(info.get("load_error", "analyze function not defined."))
+        return LegacyPlugin(module)
+    needs(info)
+    if not hasattr(module, "run"):
+        raise ValueError("run function not defined.")
+    return module
+
+
+def has_fields(record, fields):
+    """True if every field is set on the record (not missing, None or empty)."""
+    for name in fields:
+        value = getattr(record, name, None)
+        if value is None or value == {} or value == "":
+            return False
+    return True
+
+
+def iter_records(files, window, fields, token):
+    """The TimelineEvents of the files in time order, in the date window (start, end) if given."""
+    timeline = Timeline(files, *window) if window else Timeline(files)
+    for event in timeline:
+        token.check()
+        if not fields or has_fields(event.record, fields):
+            yield event
+
+
+def iter_lines(files, window, token):
+    """
+    (path, line number, line) of every file. With a date window, lines are kept
+    from the first entry in the window to the last one, with the lines without a
+    timestamp in between.
+    """
+    first_key, after_key = window_keys(*window) if window else (None, None)
+    for path in files:
+        token.check()
+        inside = first_key is None
+        with open_log(path) as f:
+            for number, line in enumerate(f, 1):
+                token.check()
+                if first_key is not None:
+                    key = line_date_key(line)
+                    if key is not None:
+                        if key >= after_key:
+                            break    # logs are chronological
+                        inside = key >= first_key
+                    if not inside:
+                        continue
+                yield path, number, line
+
+
+def iter_open_files(files, token):
+    """(path, open binary file) of every file; a file is closed when the module moves on."""
+    for path in files:
+        token.check()
+        with open_log(path) as f:
+            yield path, f
+
+
+class Context:
+    """
+    What a running module gets from the host: its files (full paths), the
+    date range, the cancellation token and iterators over its input.
+    progress(Progress) is called for the reports the module yields.
+    """
+
+    def __init__(self, info, files, start_date, end_date, token=None, progress=None):
+        self.info = info
+        self.needs = needs(info)
+        self.files = list(files)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.token = token or CancelToken()
+        self.progress = progress
+        # Items of a shared read (see SharedRecords), or None to read the files here
+        self.source = None
+
+    @property
+    def window(self):
+        """The date window the host applies, or None."""
+        if self.needs.window == "host" and self.start_date is not None and self.end_date is not None:
+            return self.start_date, self.end_date
+        return None
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+    def check(self):
+        """Raises Cancelled if the module should stop."""
+        self.token.check()
+
+    def records(self):
+        if self.source is not None:
+            return iter(self.source)
+        return iter_records(self.files, self.window, self.needs.fields, self.token)
+
+    def lines(self):
+        if self.source is not None:
+            return iter(self.source)
+        return iter_lines(self.files, self.window, self.token)
+
+    def open_files(self):
+        return iter_open_files(self.files, self.token)
+
+    def report(self, progress):
+        """Forwards a progress report of the module (fraction, text or Progress)."""
+        if self.progress is None:
+            return
+        if isinstance(progress, Progress):
+            self.progress(progress)
+        elif isinstance(progress, str):
+            self.progress(Progress(None, progress))
+        elif progress is not None:
+            self.progress(Progress(min(1.0, max(0.0, float(progress))), ""))
+
+
+def run_plugin(plugin, context):
+    """
+    Runs a plugin to its outcome: (result, status) or (result, status, findings).
+    Progress the module yields goes to context.report(); a cancelled run ends with
+    the reason and status given to the token.
+    """
+    try:
+        outcome = plugin.run(context)
+        if inspect.isgenerator(outcome):
+            generator = outcome
+            try:
+                while True:
+                    context.report(next(generator))
+                    context.check()
+            except StopIteration as stop:
+                outcome = stop.value
+            finally:
+                generator.close()
+    except Cancelled as e:
+        return str(e) or "Cancelled.", context.token.status or "Yellow"
+    if not isinstance(outcome, (tuple, list)) or len(outcome) < 2:
+        return f"Module returned no (result, status): {outcome!r}", "Red"
+    return tuple(outcome)
+
+
+def shared_key(info):
+    """Modules with equal keys can share one read of their files; None if the module reads alone."""
+    if module_api(info) < 2:
+        return None
+    wanted = needs(info)
+    if wanted.input == "files":
+        return None
+    return wanted.input, wanted.window
+
+
+class _Subscription:
+    """The items of a shared read for one module: its files, filtered by its fields."""
+
+    def __init__(self, context):
+        self.context = context
+        self.paths = set(context.files)
+        self.fields = context.needs.fields
+        self.records = context.needs.input == "records"
+        self.queue = queue.Queue(SHARED_QUEUE)
+        self.closed = False
+        # Text of the error that ended the shared read before this module finished
+        self.error = None
+
+    def wants(self, item):
+        if self.records:
+            return item.path in self.paths and (not self.fields or has_fields(item.record, self.fields))
+        return item[0] in self.paths
+
+    def put(self, batch):
+        """Hands a batch to the module; waits while the module is behind, unless it finished."""
+        while not self.closed:
+            try:
+                self.queue.put(batch, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        token = self.context.token
+        while True:
+            token.check()
+            try:
+                batch = self.queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if batch is None:
+                return
+            for item in batch:
+                token.check()
+                yield item
+
+
+class SharedRecords:
+    """
+    One read of the files of several modules that have the same shared_key():
+    the files are read and parsed once on the calling thread while every module
+    runs on a thread of its own and pulls its items from a bounded queue, so the
+    slowest module sets the pace and memory stays bounded.
+    """
+
+    def __init__(self, contexts):
+        self.contexts = contexts
+        # Stops the read once every module finished
+        self.read_token = CancelToken()
+        self.subscriptions = []
+        for context in contexts:
+            subscription = _Subscription(context)
+            context.source = subscription
+            self.subscriptions.append(subscription)
+
+    def _items(self):
+        first = self.contexts[0]
+        files = list(dict.fromkeys(path for context in self.contexts for path in context.files))
+        if first.needs.input == "records":
+            return iter_records(files, first.window, (), self.read_token)
+        return iter_lines(files, first.window, self.read_token)
+
+    def _publish(self):
+        """
+        Reads the input and hands it out. Whatever ends the read, every module
+        gets the end of its input, so none of them waits forever; a module that
+        was still reading when the read failed is marked with the error.
+        """
+        batches = {subscription: [] for subscription in self.subscriptions}
+        try:
+            for item in self._items():
+                for subscription, batch in batches.items():
+                    if not subscription.closed and subscription.wants(item):
+                        batch.append(item)
+                        if len(batch) >= SHARED_BATCH:
+                            subscription.put(batch)
+                            batches[subscription] = []
+        except Cancelled:
+            pass
+        except Exception as e:
+            print(f"Error reading the shared input: {e}")
+            for subscription in self.subscriptions:
+                if not subscription.closed:
+                    subscription.error = f"Error reading the shared input: {e}"
+        finally:
+            for subscription, batch in batches.items():
+                if batch and subscription.error is None:
+                    subscription.put(batch)
+                subscription.put(None)
+
+    def run(self, plugins, run_one=run_plugin):
+        """Runs the plugins (aligned with the contexts) on the shared read; returns their outcomes."""
+        def run_module(plugin, subscription):
+            try:
+                return run_one(plugin, subscription.context)
+            finally:
+                subscription.closed = True
+                if all(s.closed for s in self.subscriptions):
+                    self.read_token.cancel()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(plugins),
+                                                   thread_name_prefix="shared-module") as executor:
+            futures = [executor.submit(run_module, plugin, subscription)
+                       for plugin, subscription in zip(plugins, self.subscriptions)]
+            try:
+                self._publish()
+            finally:
+                outcomes = []
+                for future, subscription in zip(futures, self.subscriptions):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = (f"Error: {e}", "Red")
+                    # A module that did not get all of its input has no valid result
+                    outcomes.append((subscription.error, "Red") if subscription.error else outcome)
+        return outcomes
@@ -0,0 +1,152 @@
+"""
+Discovery of the analysis modules in the "modules" folder.
+
+MODULE_INFO is read from the source with the ast module, without executing
+the module, so the module list fills instantly however many plugins there
+are. A module is imported the first time it is run and reloaded only when
+its source has really changed (mtime/size first, then a content hash), so
+compiled regexes and tables it builds on import survive repeated runs.
+"""
+import os
+import sys
+import ast
+import hashlib
+import importlib
+import importlib.util
+
+# The modules folder next to the program
+MODULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules")
+
+
+def static_module_info(source, filename="<module>"):
+    """
+    Returns the MODULE_INFO dict assigned at the top level of a module's source
+    if it is a literal, otherwise None. The module is not executed.
+    """
+    tree = ast.parse(source, filename=filename)
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(target, ast.Name) and target.id == "MODULE_INFO" for target in targets):
+            try:
+                info = ast.literal_eval(node.value)
+            except ValueError:
+                return None
+            return info if isinstance(info, dict) else None
+    return None
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class PluginRegistry:
+    """
+    Keeps the MODULE_INFO dicts of the modules folder and imports modules on demand.
+    Each info dict gets "id" (import name without the package), "path" and, once
+    loaded, "module" and "source_hash"; a failed import leaves "module" None and
+    sets "load_error".
+    """
+
+    def __init__(self, modules_dir=MODULES_DIR, package="modules"):
+        self.modules_dir = modules_dir
+        self.package = package
+        # file name -> (stamp, info) of the last scan
+        self._scanned = {}
+        # module id -> (stamp, source hash) of the imported code
+        self._loaded = {}
+
+    def scan(self):
+        """
+        Returns the info dicts of all modules, sorted by file name. Files that did not
+        change since the last scan keep their info dict (and loaded module).
+        """
+        modules_info = []
+        if not os.path.isdir(self.modules_dir):
+            print("Modules folder not found!")
+            return modules_info
+
+        scanned = {}
+        for file in sorted(os.listdir(self.modules_dir)):
+            if not file.endswith(".py") or file == "__init__.py":
+                continue
+            path = os.path.join(self.modules_dir, file)
+            try:
+                stamp = _stamp(path)
+                previous = self._scanned.get(file)
+                if previous is not None and previous[0] == stamp:
+                    info = previous[1]
+                else:
+                    info = self._read_info(file[:-3], path)
+            except Exception as e:
+                print(f"Error loading module {file[:-3]}: {e}")
+                continue
+            if info is not None:
+                scanned[file] = (stamp, info)
+                modules_info.append(info)
+        self._scanned = scanned
+        return modules_info
+
+    def _read_info(self, module_id, path):
+        """Builds the info dict of a module file, or returns None if it is not an analysis module."""
+        with open(path, "rb") as f:
+            source = f.read()
+        if b"MODULE_INFO" not in source:
+            return None
+        static_info = static_module_info(source, path)
+        info = dict(static_info) if static_info is not None else {}
+        info.update({"id": module_id, "path": path, "module": None})
+        if static_info is None:
+            # MODULE_INFO is computed at import time: the module has to be imported now
+            self._import(info)
+            if info["module"] is None or not hasattr(info["module"], "MODULE_INFO"):
+                return None
+        return info
+
+    def load(self, modules_info):
+        """Makes sure the given modules are imported and up to date with their source."""
+        for info in modules_info:
+            try:
+                stamp = _stamp(info["path"])
+            except OSError as e:
+                print(f"Error loading module {info['id']}: {e}")
+                continue
+            loaded = self._loaded.get(info["id"])
+            if info.get("module") is not None and loaded is not None and loaded[0] == stamp:
+                continue
+            self._import(info)
+
+    def _import(self, info):
+        """Imports a module, or reloads it if its source hash changed since it was imported."""
+        module_id, path = info["id"], info["path"]
+        try:
+            stamp = _stamp(path)
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            loaded = self._loaded.get(module_id)
+            name = f"{self.package}.{module_id}"
+            module = info.get("module") or sys.modules.get(name)
+            if module is None:
+                module = importlib.import_module(name)
+            elif loaded is None or loaded[1] != digest:
+                # A stale .pyc with the same mtime and size must not be used
+                cached = importlib.util.cache_from_source(path)
+                if os.path.exists(cached):
+                    os.remove(cached)
+                importlib.invalidate_caches()
+                module = importlib.reload(module)
+            self._loaded[module_id] = (stamp, digest)
+        except Exception as e:
+            print(f"Error loading module {module_id}: {e}")
+            info["module"] = None
+            info["load_error"] = f"Error loading module: {e}"
+            return
+        info.update(getattr(module, "MODULE_INFO", {}))
+        info["module"] = module
+        info["source_hash"] = digest
+        info.pop("load_error", None)
@@ -0,0 +1,244 @@
+"""
+Shared single-pass log reader.
+
+Modules that define create_consumer(start_date, end_date) do not open files
+themselves. The host reads every file once and hands each line to all
+modules that want that file, so the I/O cost stays the same no matter how
+many modules look at the same logs. Files inside archives are read the same
+way as plain files.
+
+A consumer is any object with these methods:
+    begin_file(path)   - a new file starts; may return True to skip the
+                         file entirely (it is then not fed to this consumer)
+    feed(line)         - one raw line (bytes, including the line ending);
+                         may return True when no more lines of the current
+                         file are needed (for example, past end_date)
+    end_file(path)     - the current file is finished
+    result()           - returns (result, status), or (result, status, findings)
+                         with per-file findings, after all files were read
+and optionally:
+    order_files(files) - returns the files in the order they must be read
+                         (for example, a rotation set from oldest to newest)
+    file_summary()     - returns a JSON-serializable summary of the current
+                         file (called before end_file); enables the parse cache
+    load_summary(path, summary)
+                       - takes a cached summary instead of the file's lines
+                         (called between begin_file and end_file). A summary
+                         may cover a wider date window than the current run.
+    resumable          - class attribute; True if feed() may continue after
+                         load_summary() with the lines appended to a live file
+                         since the summary was taken (the summary then covers
+                         the whole file)
+"""
+import time
+import datetime
+
+from core.archives import open_log, is_virtual, READ_BUFFER_SIZE
+from core.parse_cache import file_identity, prefix_checksum
+
+CANCEL_CHECK_LINES = 1 << 16    # how often a long file checks for cancellation
+
+
+class SharedLogReader:
+    """
+    Reads files once and fans their lines out to every interested consumer.
+    With a ParseCache, consumers that can summarize a file are served from the
+    cache for unchanged files, and a file is opened only if some consumer missed.
+    Resumable consumers of a grown plain file only read the appended bytes.
+    The bytes and lines read for each consumer are counted (see consumer_stats),
+    with file_metrics also per file.
+    """
+
+    def __init__(self, cancelled=None, buffer_size=READ_BUFFER_SIZE, cache=None, window=None, file_metrics=False):
+        # cancelled: optional callable returning True when the run should stop
+        self.cancelled = cancelled or (lambda: False)
+        self.buffer_size = buffer_size
+        self.cache = cache
+        # Date window (start_date, end_date) the summaries are computed for
+        if window is not None:
+            start_date, end_date = window
+            self.first_key = start_date.strftime("%Y-%m-%d")
+            self.after_key = (end_date + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        elif cache is not None:
+            raise ValueError("A parse cache needs the date window of the run.")
+        self.bytes_read = 0
+        self.lines_read = 0
+        self.files_from_cache = 0
+        self.files_resumed = 0
+        self.file_metrics = file_metrics
+        # consumer -> [bytes read, lines fed, per-file records or None]
+        self._consumer_stats = {}
+
+    def consumer_stats(self, consumer):
+        """
+        Returns (bytes read, lines fed, per-file records) for a consumer. The
+        per-file records (path, bytes, lines, seconds, cached) are None unless
+        file_metrics is set; a pass shared by several consumers counts for each.
+        """
+        stats = self._consumer_stats.get(consumer)
+        if stats is None:
+            return 0, 0, [] if self.file_metrics else None
+        return tuple(stats)
+
+    def _count(self, consumer, path, size, lines, seconds, cached=False):
+        stats = self._consumer_stats.get(consumer)
+        if stats is None:
+            stats = self._consumer_stats[consumer] = [0, 0, [] if self.file_metrics else None]
+        stats[0] += size
+        stats[1] += lines
+        if stats[2] is not None:
+            stats[2].append({"path": path, "bytes": size, "lines": lines, "seconds": seconds, "cached": cached})
+
+    def run(self, consumers_and_files):
+        """
+        consumers_and_files is a list of (consumer, files) or (consumer, files, cache_id)
+        items; cache_id is a (module id, module version) tuple or None.
+        Files are read in the order they first appear. Returns False if the
+        run was cancelled before all files were read.
+        """
+        file_consumers = {}
+        for item in consumers_and_files:
+            consumer, files = item[0], item[1]
+            cache_id = item[2] if len(item) > 2 else None
+            if hasattr(consumer, "order_files"):
+                files = consumer.order_files(files)
+            for path in files:
+                file_consumers.setdefault(path, []).append((consumer, cache_id))
+
+        for path, consumers in file_consumers.items():
+            if self.cancelled():
+                return False
+            if not self.read_file(path, consumers):
+                return False
+        return True
+
+    def _cacheable(self, consumer, cache_id):
+        return (self.cache is not None and cache_id is not None
+                and hasattr(consumer, "file_summary") and hasattr(consumer, "load_summary"))
+
+    def _resume(self, path, identity, consumer, cache_id, checksums):
+        """
+        Loads the cached summary of a grown file into a resumable consumer.
+        Returns the offset to continue reading at, or 0 for a full read.
+        """
+        if not getattr(consumer, "resumable", False) or is_virtual(path):
+            return 0
+        point = self.cache.resume_point(path, identity, cache_id[0], cache_id[1],
+                                        self.first_key, self.after_key)
+        if point is None:
+            return 0
+        offset, checksum, summary = point
+        if offset not in checksums:
+            checksums[offset] = prefix_checksum(path, offset)
+        if checksum is None or checksums[offset] != checksum:
+            return 0    # truncated or replaced by a new file after rotation
+        consumer.load_summary(path, summary)
+        self.files_resumed += 1
+        return offset
+
+    def read_file(self, path, consumers):
+        """
+        Feeds one file to its consumers, given as (consumer, cache_id) pairs.
+        Returns False if cancelled.
+        """
+        identity = None
+        checksums = {}
+        # start offset -> consumers reading from there (0 is a full read)
+        pending = {}
+        for consumer, cache_id in consumers:
+            if consumer.begin_file(path):
+                continue
+            offset = 0
+            if self._cacheable(consumer, cache_id):
+                if identity is None:
+                    identity = file_identity(path)
+                summary = self.cache.get(path, identity, cache_id[0], cache_id[1],
+                                         self.first_key, self.after_key)
+                if summary is not None:
+                    consumer.load_summary(path, summary)
+                    consumer.end_file(path)
+                    self.files_from_cache += 1
+                    self._count(consumer, path, 0, 0, 0.0, cached=True)
+                    continue
+                offset = self._resume(path, identity, consumer, cache_id, checksums)
+            pending.setdefault(offset, []).append((consumer, cache_id))
+
+        completed = True
+        try:
+            for offset in sorted(pending):
+                active = pending[offset]
+                lines_fed = {}
+                started = time.perf_counter()
+                # Archive members are decompressed as a stream while they are read
+                with open_log(path, self.buffer_size) as f:
+                    if offset:
+                        f.seek(offset)
+                    completed = self._feed(f, [consumer for consumer, _ in active], lines_fed)
+                    try:
+                        end = f.tell()
+                        self.bytes_read += end - offset
+                    except (OSError, ValueError):
+                        end = None
+                seconds = time.perf_counter() - started
+                for consumer, _ in active:
+                    self._count(consumer, path, end - offset if end is not None else 0,
+                                lines_fed.get(consumer, 0), seconds)
+                if not completed:
+                    break
+                cacheable = [(consumer, cache_id) for consumer, cache_id in active
+                             if self._cacheable(consumer, cache_id)]
+                if not cacheable:
+                    continue
+                if end is not None and is_virtual(path):
+                    end = None    # archive members do not grow
+                checksum = prefix_checksum(path, end) if end is not None else None
+                for consumer, cache_id in cacheable:
+                    self.cache.put(path, identity, cache_id[0], cache_id[1],
+                                   self.first_key, self.after_key, consumer.file_summary(),
+                                   end, checksum)
+        except (OSError, EOFError, ValueError) as e:
+            completed = True
+            print(f"Error reading {path}: {e}")
+        finally:
+            for active in pending.values():
+                for consumer, _ in active:
+                    consumer.end_file(path)
+        return completed
+
+    def _feed(self, f, consumers, lines_fed):
+        """
+        Reads lines from an open file until it ends or no consumer needs more.
+        Fills lines_fed with the number of lines each consumer received.
+        """
+        cancelled = self.cancelled
+        count = 0
+        completed = True
+        if len(consumers) == 1:
+            # Fast path: a single consumer
+            feed = consumers[0].feed
+            for line in f:
+                count += 1
+                if feed(line):
+                    break
+                if not count % CANCEL_CHECK_LINES and cancelled():
+                    completed = False
+                    break
+        else:
+            active = [c.feed for c in consumers]
+            owners = dict(zip(active, consumers))
+            for line in f:
+                count += 1
+                finished = [feed for feed in active if feed(line)]
+                if finished:
+                    for feed in finished:
+                        lines_fed[owners[feed]] = count
+                    active = [feed for feed in active if feed not in finished]
+                    if not active:
+                        break
+                if not count % CANCEL_CHECK_LINES and cancelled():
+                    completed = False
+                    break
+        for consumer in consumers:
+            lines_fed.setdefault(consumer, count)
+        self.lines_read += count
+        return completed
@@ -0,0 +1,134 @@
+"""
+Persistent memo of module results.
+
+A module's (result, status) and findings only depend on its code, its input
+files and the date range, so they are stored under a key built from the
+module id, version and source hash, the program version and a hash of the
+core package (modules parse and read through it), the path, size and mtime of every input
+file, and the dates. Running the same analysis again returns the stored result
+instantly; only modules whose inputs changed actually run. The database is
+capped in size and evicts the least recently used results first.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+from core.parse_cache import file_identity
+from core.versions import LOCAL_VERSION
+
+RESULT_CACHE_FILE = "result_cache.sqlite"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024     # 64 MiB of results
+SCHEMA_VERSION = 2
+
+_core_hash = None
+
+
+def core_hash():
+    """Hash of the program version and the sources of the core package (computed once)."""
+    global _core_hash
+    if _core_hash is None:
+        digest = hashlib.sha1(LOCAL_VERSION.encode("ascii"))
+        directory = os.path.dirname(os.path.abspath(__file__))
+        try:
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".py"):
+                    with open(os.path.join(directory, name), "rb") as f:
+                        digest.update(name.encode("utf-8") + b"\0" + f.read())
+        except OSError:
+            pass    # only the program version then
+        _core_hash = digest.hexdigest()
+    return _core_hash
+
+
+def result_key(module_id, version, source_hash, files, start_date, end_date):
+    """
+    Returns the memo key of a module run, or None if the run cannot be memoized
+    (unknown source hash or an input file that cannot be read).
+    """
+    if not source_hash:
+        return None
+    inputs = []
+    for path in sorted(files):
+        identity = file_identity(path)
+        if identity is None:
+            return None
+        inputs.append([path, identity[0], identity[1]])
+    key = [module_id, str(version), source_hash, core_hash(), inputs, start_date.isoformat(), end_date.isoformat()]
+    return hashlib.sha1(json.dumps(key, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """SQLite store of (result, status, findings) by memo key. Safe to use from several threads."""
+
+    def __init__(self, path=RESULT_CACHE_FILE, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Results are only a cache: an older layout is simply dropped
+            self._db.execute("DROP TABLE IF EXISTS results")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                status TEXT NOT NULL,
+                findings TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._db.commit()
+
+    def get(self, key):
+        """Returns the stored (result, status, findings) for a key, or None."""
+        if key is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT result, status, findings FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._dirty = True
+        return row[0], row[1], json.loads(row[2])
+
+    def put(self, key, result, status, findings=()):
+        """Stores the outcome of a module run; findings are (path, message, status) tuples."""
+        if key is None:
+            return
+        result, status = str(result), str(status)
+        data = json.dumps([list(finding) for finding in findings], separators=(",", ":"))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, result, status, data, len(result) + len(status) + len(data), time.time()))
+            self._dirty = True
+
+    def flush(self):
+        """Commits pending writes and evicts the least recently used results above the size cap."""
+        with self._lock:
+            if not self._dirty:
+                return
+            total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                doomed = []
+                for key, size in self._db.execute("SELECT key, bytes FROM results ORDER BY last_used"):
+                    if excess <= 0:
+                        break
+                    doomed.append((key,))
+                    excess -= size
+                self._db.executemany("DELETE FROM results WHERE key = ?", doomed)
+            self._db.commit()
+            self._dirty = False
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
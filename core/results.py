@@ -0,0 +1,200 @@
+"""
+Structured analysis results and report export.
+
+Every module run becomes a ModuleResult (machine, module, status, message and
+a list of per-file Findings). Reports are written as HTML, CSV or JSON one
+result at a time, so exporting thousands of findings never builds the whole
+document in memory. A fleet run can also be exported as a machine x module
+status matrix.
+
+A module reports findings by returning (result, status, findings) instead of
+(result, status); findings are (path, message) or (path, message, status)
+tuples.
+"""
+import csv
+import html
+import json
+import datetime
+from collections import namedtuple
+
+from core.metrics import format_metrics
+
+# One remark about one input file
+Finding = namedtuple("Finding", "path message status")
+# Outcome of one module for the log directory of one machine
+ModuleResult = namedtuple("ModuleResult",
+                          "machine directory module id group status files cached seconds message findings metrics")
+
+STATUS_ORDER = {"Green": 0, "Yellow": 1, "Red": 2}
+STATUS_COLORS = {"Green": "green", "Yellow": "#e0c000", "Red": "red"}
+EXPORT_FORMATS = ("html", "csv", "json", "matrix")
+CSV_FIELDS = ["machine", "directory", "module", "id", "group", "status", "files", "cached", "seconds",
+              "cpu_seconds", "bytes_read", "lines", "peak_bytes", "file", "result"]
+
+
+def make_findings(items, default_status="Yellow"):
+    """Converts what a module returned as findings into a list of Finding."""
+    findings = []
+    for item in items or ():
+        if isinstance(item, Finding):
+            findings.append(item)
+        elif isinstance(item, dict):
+            findings.append(Finding(str(item.get("path", "")), str(item.get("message", "")),
+                                    str(item.get("status", default_status))))
+        else:
+            path, message = item[0], item[1]
+            status = item[2] if len(item) > 2 else default_status
+            findings.append(Finding(str(path), str(message), str(status)))
+    return findings
+
+
+def result_from_job(job, result, status, directory="", machine=""):
+    """Builds the ModuleResult of a finished AnalysisJob."""
+    info = job.info
+    return ModuleResult(machine, directory, job.name, info.get("id", ""), info.get("group", "Ungrouped"), str(status),
+                        len(job.files), job.cached, job.seconds, str(result), job.findings, job.metrics)
+
+
+def worst_status(results):
+    """The worst status of the results ("Green" if there are none)."""
+    worst = "Green"
+    for result in results:
+        if STATUS_ORDER.get(result.status, 3) > STATUS_ORDER.get(worst, 3):
+            worst = result.status
+    return worst
+
+
+def status_matrix(results):
+    """
+    Arranges results as a machine x module matrix. Returns (machines, modules, cells)
+    in order of first appearance: the machine names, a dict of module id -> module
+    name, and cells mapping (machine, module id) to the ModuleResult.
+    """
+    machines, modules, cells = {}, {}, {}
+    for result in results:
+        machines.setdefault(result.machine, None)
+        modules.setdefault(result.id, result.module)
+        cells[(result.machine, result.id)] = result
+    return list(machines), modules, cells
+
+
+def result_to_dict(result):
+    """JSON-serializable form of a ModuleResult."""
+    record = result._asdict()
+    record["findings"] = [finding._asdict() for finding in result.findings]
+    return record
+
+
+class ResultStore:
+    """Results of the current analysis in the order they arrived."""
+
+    def __init__(self):
+        self.results = []
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    def add(self, result):
+        """Appends a result and returns its index."""
+        self.results.append(result)
+        return len(self.results) - 1
+
+    def clear(self):
+        self.results = []
+
+    def export(self, path, fmt):
+        """Writes the results to a file in one of EXPORT_FORMATS."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            export(self.results, f, fmt)
+
+
+def export(results, f, fmt):
+    """Writes an iterable of ModuleResults to an open text file in one of EXPORT_FORMATS."""
+    if fmt == "html":
+        export_html(results, f)
+    elif fmt == "csv":
+        export_csv(results, f)
+    elif fmt == "json":
+        export_json(results, f)
+    elif fmt == "matrix":
+        export_matrix(results, f)
+    else:
+        raise ValueError(f"Unknown report format: {fmt}")
+
+
+def export_json(results, f):
+    """A JSON array with one object per module result, written one result at a time."""
+    f.write("[")
+    separator = "\n"
+    for result in results:
+        f.write(separator)
+        f.write(json.dumps(result_to_dict(result), ensure_ascii=False))
+        separator = ",\n"
+    f.write("\n]\n")
+
+
+def export_csv(results, f):
+    """One row per module result followed by one row per finding (with the file column set)."""
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(CSV_FIELDS)
+    for r in results:
+        seconds = "" if r.seconds is None else f"{r.seconds:.3f}"
+        metrics = r.metrics or {}
+        cpu = "" if metrics.get("cpu_seconds") is None else f"{metrics['cpu_seconds']:.3f}"
+        writer.writerow([r.machine, r.directory, r.module, r.id, r.group, r.status, r.files, r.cached, seconds, cpu,
+                         _blank(metrics.get("bytes_read")), _blank(metrics.get("lines")),
+                         _blank(metrics.get("peak_bytes")), "", r.message])
+        for finding in r.findings:
+            writer.writerow([r.machine, r.directory, r.module, r.id, r.group, finding.status, "", "", "",
+                             "", "", "", "", finding.path, finding.message])
+
+
+def _blank(value):
+    return "" if value is None else value
+
+
+def export_html(results, f, title="Log Analyzer Report"):
+    """A self-contained HTML table; status icons are CSS dots instead of embedded images."""
+    f.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(title)}</title>\n<style>\n"
+            "body { font-family: 'Segoe UI', sans-serif; font-size: 13px; color: #333333; }\n"
+            "table { border-collapse: collapse; }\n"
+            "td, th { border: 1px solid #e0e0e0; padding: 3px 6px; text-align: left; vertical-align: top; }\n"
+            ".dot { display: inline-block; width: 10px; height: 10px; border-radius: 5px; border: 1px solid black; }\n"
+            ".finding td { color: #555555; }\n.cached { color: #888888; }\n"
+            "</style></head><body>\n"
+            f"<h2>{html.escape(title)}</h2>\n"
+            f"<p>Created {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>\n"
+            "<table>\n<tr><th>Machine</th><th>Module</th><th>Status</th><th>Files</th><th>Performance</th>"
+            "<th>Result</th></tr>\n")
+    for r in results:
+        color = STATUS_COLORS.get(r.status, "white")
+        cached = ' <span class="cached">(cached)</span>' if r.cached else ""
+        f.write(f"<tr><td title=\"{html.escape(r.directory)}\">{html.escape(r.machine)}</td>"
+                f"<td>{html.escape(r.module)}</td>"
+                f"<td><span class=\"dot\" style=\"background:{color}\"></span> {html.escape(r.status)}</td>"
+                f"<td>{r.files}</td><td>{html.escape(format_metrics(r.metrics))}</td>"
+                f"<td>{html.escape(r.message)}{cached}</td></tr>\n")
+        for finding in r.findings:
+            color = STATUS_COLORS.get(finding.status, "white")
+            f.write(f"<tr class=\"finding\"><td></td><td></td>"
+                    f"<td><span class=\"dot\" style=\"background:{color}\"></span> {html.escape(finding.status)}</td>"
+                    f"<td></td><td></td><td>{html.escape(finding.path)}: {html.escape(finding.message)}</td></tr>\n")
+    f.write("</table>\n</body></html>\n")
+
+
+def export_matrix(results, f):
+    """CSV with one row per machine and one status column per module (worst status last)."""
+    machines, modules, cells = status_matrix(results)
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(["machine"] + list(modules.values()) + ["worst"])
+    for machine in machines:
+        row = [cells[(machine, module)] for module in modules if (machine, module) in cells]
+        writer.writerow([machine] + [cells[(machine, module)].status if (machine, module) in cells else ""
+                                     for module in modules] + [worst_status(row)])
@@ -0,0 +1,521 @@
+"""
+Full-text and regex search over log files.
+
+Files are searched in large chunks: the compiled pattern runs over a whole
+chunk and only the lines it matches are located and decoded, so lines that
+do not match cost almost nothing. Every hit carries the file, the line
+number, the timestamp of the line and its byte offset, so a viewer can jump
+straight to it.
+
+SearchIndex keeps a trigram index of the files in a SQLite database next to
+config.json. Each file is split into blocks of about BLOCK_BYTES at line
+boundaries; for every trigram of letters the index stores a bitmap of the
+blocks it occurs in. A query only reads the blocks that contain all of its
+trigrams. Text queries use the trigrams of their words, regex queries those
+of the literal text every match must contain. Files are indexed once; a
+live log that has grown since is indexed from its last block on.
+
+Queries without such text (short words, numbers, regexes like "\\d+ ms")
+scan the files in full, on a process pool when there is a lot to read.
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+import concurrent.futures
+from collections import namedtuple
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse  # Python < 3.11
+
+from core.archives import open_log, is_virtual
+from core.parse_cache import file_identity, prefix_checksum
+from core.parsers import line_date_key
+
+SEARCH_INDEX_FILE = "search_index.sqlite"
+SCHEMA_VERSION = 1
+BLOCK_BYTES = 64 * 1024            # indexed block size; a query reads whole blocks
+SCAN_CHUNK = 1024 * 1024           # bytes searched at once when a file is scanned in full
+PARALLEL_BYTES = 32 * 1024 * 1024  # below this, searching and indexing stay on the calling thread
+MAX_HITS = 10000                   # a search stops after this many hits
+MAX_QUERY_GRAMS = 16               # trigrams looked up per query
+MAX_TEXT = 500                     # characters of a line kept in a hit
+
+WORD_RE = re.compile(rb"[a-z]{3,}")
+
+# One matching line. line is 1-based, offset is the byte offset of the line
+# start in the (decompressed) file, timestamp is the text of its timestamp or "".
+SearchHit = namedtuple("SearchHit", "path line offset timestamp text")
+# Outcome of a search: hits found, files and bytes read, whether the index
+# narrowed it down, and whether it stopped at max_hits
+SearchStats = namedtuple("SearchStats", "hits files bytes indexed truncated")
+
+
+def block_grams(data):
+    """Returns the set of letter trigrams (as bytes) of a block of log text."""
+    grams = set()
+    for word in set(WORD_RE.findall(data.lower())):
+        for i in range(len(word) - 2):
+            grams.add(word[i:i + 3])
+    return grams
+
+
+def _literals(parsed):
+    """Runs of literal text that every match of a parsed regex must contain."""
+    runs = []
+    run = []
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        runs.append("".join(run))
+        run = []
+        if op is sre_parse.SUBPATTERN:
+            runs.extend(_literals(arg[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+            runs.extend(_literals(arg[2]))
+    runs.append("".join(run))
+    return runs
+
+
+def query_grams(query, regex=False):
+    """
+    Trigrams every matching line must contain; empty if the index cannot
+    narrow the query down (it then has to be scanned in full).
+    """
+    if regex:
+        try:
+            texts = _literals(sre_parse.parse(query))
+        except Exception:
+            return set()
+    else:
+        texts = [query]
+    grams = set()
+    for text in texts:
+        grams |= block_grams(text.encode("utf-8", "replace"))
+    return grams
+
+
+def compile_query(query, regex=False, case_sensitive=False):
+    """Compiles a query into a bytes pattern; raises re.error for an invalid regex."""
+    pattern = query.encode("utf-8") if regex else re.escape(query.encode("utf-8"))
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+def _search_chunk(data, offset, line, pattern, window, hits, path, limit):
+    """
+    Adds a hit for every line of data (starting at byte offset and line
+    number line, 0-based) that matches, at most one per line.
+    """
+    counted_to = 0
+    next_line_start = -1
+    for match in pattern.finditer(data):
+        if match.start() < next_line_start:
+            continue
+        start = data.rfind(b"\n", 0, match.start()) + 1
+        end = data.find(b"\n", match.start())
+        if end < 0:
+            end = len(data)
+        next_line_start = end + 1
+        line += data.count(b"\n", counted_to, start)
+        counted_to = start
+        text = data[start:end].rstrip(b"\r")
+        key = line_date_key(text)
+        if key is not None and window is not None and not window[0] <= key < window[1]:
+            continue
+        hits.append(SearchHit(path, line + 1, offset + start, text[:23].decode("ascii", "replace") if key else "",
+                              text.decode("utf-8", "replace")[:MAX_TEXT]))
+        if len(hits) >= limit:
+            break
+
+
+def search_file(path, query, regex=False, case_sensitive=False, ranges=None, window=None, limit=MAX_HITS):
+    """
+    Returns the hits in one file. ranges is a list of (offset, length, line)
+    blocks to search (from SearchIndex.candidates), None to search the whole
+    file. window is a (first, after_last) pair of date keys; lines with a
+    timestamp outside it are skipped.
+    """
+    pattern = compile_query(query, regex, case_sensitive)
+    hits = []
+    with open_log(path) as f:
+        if ranges is not None:
+            position = 0
+            for offset, length, line in ranges:
+                if is_virtual(path):
+                    # Compressed streams cannot seek back; ranges come in file order
+                    while position < offset:
+                        skipped = len(f.read(min(SCAN_CHUNK, offset - position)))
+                        if not skipped:
+                            return hits
+                        position += skipped
+                else:
+                    f.seek(offset)
+                data = f.read(length)
+                position = offset + len(data)
+                _search_chunk(data, offset, line, pattern, window, hits, path, limit)
+                if len(hits) >= limit:
+                    break
+            return hits
+        offset = line = 0
+        rest = b""
+        while len(hits) < limit:
+            chunk = f.read(SCAN_CHUNK)
+            data = rest + chunk
+            if not data:
+                break
+            cut = data.rfind(b"\n") + 1 if chunk else len(data)
+            if not cut:
+                rest = data    # no line end yet
+                continue
+            data, rest = data[:cut], data[cut:]
+            _search_chunk(data, offset, line, pattern, window, hits, path, limit)
+            offset += len(data)
+            line += data.count(b"\n")
+    return hits
+
+
+def index_file(path, offset=0, line=0):
+    """
+    Indexes a file from offset, which must be the start of line number line
+    (0-based); archive members are always indexed from the start. Returns
+    (blocks, grams): blocks is a list of (offset, length, line), grams maps
+    each trigram to a bitmap of the blocks it occurs in (bit i for blocks[i]).
+    """
+    blocks = []
+    grams = {}
+    with open_log(path) as f:
+        if offset:
+            f.seek(offset)
+        rest = b""
+        while True:
+            chunk = f.read(BLOCK_BYTES)
+            data = rest + chunk
+            if not data:
+                break
+            cut = data.rfind(b"\n") + 1 if chunk else len(data)
+            if not cut:
+                cut = len(data)    # a single line longer than a block
+            data, rest = data[:cut], data[cut:]
+            bit = 1 << len(blocks)
+            for gram in block_grams(data):
+                grams[gram] = grams.get(gram, 0) | bit
+            blocks.append((offset, len(data), line))
+            offset += len(data)
+            line += data.count(b"\n")
+    return blocks, grams
+
+
+def _bits_to_blob(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def _run_all(func, tasks, parallel, workers=None, cancelled=None):
+    """
+    Yields (task, result) for func(*task) over all tasks in completion order,
+    on a process pool if parallel is set. Failing tasks are reported and skipped.
+    """
+    if not parallel or len(tasks) < 2:
+        for task in tasks:
+            if cancelled is not None and cancelled():
+                return
+            try:
+                yield task, func(*task)
+            except Exception as e:
+                print(f"Error searching {os.path.basename(task[0])}: {e}")
+        return
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(tasks)))
+    try:
+        futures = {executor.submit(func, *task): task for task in tasks}
+        for future in concurrent.futures.as_completed(futures):
+            if cancelled is not None and cancelled():
+                return
+            task = futures[future]
+            try:
+                yield task, future.result()
+            except Exception as e:
+                print(f"Error searching {os.path.basename(task[0])}: {e}")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+class SearchIndex:
+    """
+    SQLite trigram index of log files (see the module description). Safe to
+    use from several threads, although searches normally run on one.
+    """
+
+    def __init__(self, path=SEARCH_INDEX_FILE, workers=None):
+        self.path = path
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pruned = False
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # The index can always be rebuilt: an older layout is simply dropped
+            for table in ("files", "blocks", "postings"):
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT NOT NULL UNIQUE,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                blocks INTEGER NOT NULL,
+                resume_offset INTEGER NOT NULL,
+                resume_line INTEGER NOT NULL,
+                checksum TEXT
+            )""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                file_id INTEGER NOT NULL,
+                block INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                line INTEGER NOT NULL,
+                PRIMARY KEY (file_id, block)
+            ) WITHOUT ROWID""")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS postings (
+                gram TEXT NOT NULL,
+                file_id INTEGER NOT NULL,
+                bits BLOB NOT NULL,
+                PRIMARY KEY (gram, file_id)
+            ) WITHOUT ROWID""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id)")
+        self._db.commit()
+
+    def _files(self, paths):
+        """Returns {path: row} of the indexed files among paths."""
+        rows = {}
+        paths = list(paths)
+        for i in range(0, len(paths), 500):
+            chunk = paths[i:i + 500]
+            for row in self._db.execute(
+                    "SELECT path, id, size, mtime, blocks, resume_offset, resume_line, checksum FROM files "
+                    "WHERE path IN (%s)" % ",".join("?" * len(chunk)), chunk):
+                rows[row[0]] = row[1:]
+        return rows
+
+    def _delete(self, file_id, from_block=None):
+        """Deletes a file from the index, or only its blocks from from_block on."""
+        if from_block is not None:
+            self._db.execute("DELETE FROM blocks WHERE file_id = ? AND block >= ?", (file_id, from_block))
+            return
+        self._db.execute("DELETE FROM blocks WHERE file_id = ?", (file_id,))
+        self._db.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+        self._db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def prune(self):
+        """Drops the files that no longer exist."""
+        with self._lock:
+            gone = [file_id for file_id, path in self._db.execute("SELECT id, path FROM files")
+                    if file_identity(path) is None]
+            for file_id in gone:
+                self._delete(file_id)
+            self._db.commit()
+        return len(gone)
+
+    def stale(self, paths):
+        """
+        Returns (path, identity, resume) for every file that is not indexed
+        in its current state. resume is (file_id, block, offset, line) when
+        the file only grew and can be indexed from its last block on.
+        """
+        with self._lock:
+            known = self._files(paths)
+        work = []
+        for path in paths:
+            identity = file_identity(path)
+            if identity is None:
+                continue
+            row = known.get(path)
+            if row is not None and (row[1], row[2]) == identity:
+                continue
+            resume = None
+            if (row is not None and not is_virtual(path) and row[3] and identity[0] >= row[1]
+                    and prefix_checksum(path, row[4]) == row[6]):
+                resume = (row[0], row[3] - 1, row[4], row[5])
+            work.append((path, identity, resume))
+        return work
+
+    def _store(self, path, identity, resume, blocks, grams):
+        """Writes the blocks and trigrams of a file indexed by index_file()."""
+        first = resume[1] if resume else 0
+        if resume:
+            file_id = resume[0]
+            self._delete(file_id, first)
+        else:
+            old = self._db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+            if old is not None:
+                self._delete(old[0])
+            file_id = self._db.execute(
+                "INSERT INTO files (path, size, mtime, blocks, resume_offset, resume_line) VALUES (?, ?, ?, 0, 0, 0)",
+                (path, identity[0], identity[1])).lastrowid
+        self._db.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?)",
+                             [(file_id, first + i, offset, length, line)
+                              for i, (offset, length, line) in enumerate(blocks)])
+        rows = []
+        for gram, bits in grams.items():
+            bits <<= first
+            if resume:
+                old = self._db.execute("SELECT bits FROM postings WHERE gram = ? AND file_id = ?",
+                                       (gram.decode("ascii"), file_id)).fetchone()
+                if old is not None:
+                    bits |= int.from_bytes(old[0], "little")
+            rows.append((gram.decode("ascii"), file_id, _bits_to_blob(bits)))
+        self._db.executemany("INSERT OR REPLACE INTO postings VALUES (?, ?, ?)", rows)
+        if blocks:
+            last_offset, _, last_line = blocks[-1]
+        else:
+            last_offset, last_line = (resume[2], resume[3]) if resume else (0, 0)
+        checksum = None if is_virtual(path) else prefix_checksum(path, last_offset)
+        self._db.execute("UPDATE files SET size = ?, mtime = ?, blocks = ?, resume_offset = ?, resume_line = ?, "
+                         "checksum = ? WHERE id = ?",
+                         (identity[0], identity[1], first + len(blocks), last_offset, last_line, checksum, file_id))
+
+    def update(self, paths, progress=None, cancelled=None):
+        """
+        Indexes the files that are new or changed since they were indexed.
+        progress(done, total) is called after each file. Returns the number of
+        files indexed.
+        """
+        if not self._pruned:
+            self._pruned = True
+            self.prune()
+        work = self.stale(paths)
+        if not work:
+            return 0
+        total_bytes = sum(identity[0] - (resume[2] if resume else 0) for _, identity, resume in work)
+        tasks = [(path, resume[2], resume[3]) if resume else (path,) for path, _, resume in work]
+        by_path = {path: (identity, resume) for path, identity, resume in work}
+        done = 0
+        last_commit = time.monotonic()
+        for task, (blocks, grams) in _run_all(index_file, tasks, total_bytes > PARALLEL_BYTES, self.workers,
+                                              cancelled):
+            identity, resume = by_path[task[0]]
+            with self._lock:
+                self._store(task[0], identity, resume, blocks, grams)
+                if time.monotonic() - last_commit > 1.0:
+                    self._db.commit()
+                    last_commit = time.monotonic()
+            done += 1
+            if progress is not None:
+                progress(done, len(work))
+        with self._lock:
+            self._db.commit()
+        return done
+
+    def candidates(self, paths, grams):
+        """
+        Returns {path: list of (offset, length, line) blocks} for the indexed
+        files among paths: the blocks that contain all grams, in file order.
+        Files that are not indexed in their current state are left out.
+        """
+        grams = sorted(gram.decode("ascii") for gram in grams)[:MAX_QUERY_GRAMS]
+        with self._lock:
+            known = self._files(paths)
+            current = {}
+            for path, row in known.items():
+                if (row[1], row[2]) == file_identity(path):
+                    current[row[0]] = path
+            bits = None
+            for gram in grams:
+                found = {file_id: int.from_bytes(blob, "little") for file_id, blob in self._db.execute(
+                    "SELECT file_id, bits FROM postings WHERE gram = ?", (gram,)) if file_id in current}
+                if bits is None:
+                    bits = found
+                else:
+                    bits = {file_id: value & found[file_id] for file_id, value in bits.items() if file_id in found}
+                bits = {file_id: value for file_id, value in bits.items() if value}
+                if not bits:
+                    break
+            result = {path: [] for path in current.values()}
+            for file_id, value in (bits or {}).items():
+                result[current[file_id]] = [
+                    (offset, length, line) for block, offset, length, line in self._db.execute(
+                        "SELECT block, offset, length, line FROM blocks WHERE file_id = ? ORDER BY block", (file_id,))
+                    if value >> block & 1]
+        return result
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def search(paths, query, regex=False, case_sensitive=False, window=None, index=None, callback=None,
+           progress=None, cancelled=None, max_hits=MAX_HITS, workers=None):
+    """
+    Searches files for a text (case-insensitive unless case_sensitive) or a
+    regex and calls callback(hits) with the hits of every file as soon as it
+    has been searched. With an index, the files are indexed first (calling
+    progress(done, total)) and only their candidate blocks are read.
+    Raises re.error for an invalid regex. Returns SearchStats.
+    """
+    compile_query(query, regex, case_sensitive)
+    grams = query_grams(query, regex)
+    candidates = {}
+    if index is not None and grams:
+        index.update(paths, progress, cancelled)
+        candidates = index.candidates(paths, grams)
+    tasks = []
+    total_bytes = 0
+    for path in paths:
+        if path in candidates:
+            ranges = candidates[path]
+            if ranges:
+                tasks.append((path, ranges))
+                total_bytes += sum(length for _, length, _ in ranges)
+        else:
+            identity = file_identity(path)
+            if identity is not None:
+                tasks.append((path, None))
+                total_bytes += identity[0]
+    hits = 0
+    truncated = False
+    for _, found in _run_all(
+            search_file, [(path, query, regex, case_sensitive, ranges, window, max_hits) for path, ranges in tasks],
+            total_bytes > PARALLEL_BYTES, workers, cancelled):
+        found = found[:max_hits - hits]
+        hits += len(found)
+        if found and callback is not None:
+            callback(found)
+        if hits >= max_hits:
+            truncated = True
+            break
+    return SearchStats(hits, len(tasks), total_bytes, bool(candidates), truncated)
+
+
+def read_context(path, offset, context_bytes=64 * 1024):
+    """
+    Reads the text around the line at offset. Returns (text, position): text
+    starts and ends at line boundaries and position is the character index
+    of the line within it.
+    """
+    start = max(0, offset - context_bytes)
+    with open_log(path) as f:
+        if is_virtual(path):
+            remaining = start
+            while remaining > 0:
+                skipped = len(f.read(min(SCAN_CHUNK, remaining)))
+                if not skipped:
+                    break
+                remaining -= skipped
+        else:
+            f.seek(start)
+        wanted = offset - start + context_bytes
+        data = f.read(wanted)
+    before = data[:offset - start]
+    if start:
+        cut = before.find(b"\n") + 1
+        before, data = before[cut:], data[cut:]
+    end = data.rfind(b"\n")
+    if len(data) + len(before) >= wanted and end >= len(before):
+        data = data[:end]    # drop the partial line at the end of the context
+    return data.decode("utf-8", "replace"), len(before.decode("utf-8", "replace"))
@@ -0,0 +1,160 @@
+"""
+Time span of the log entries in a file, and an index of spans for date queries.
+
+The modification time says little about what a log contains: a copied or
+re-archived file gets a new mtime, and a file that covers several days is
+only dated by its last write. read_span() reads the first timestamped line
+from the head of a file and the last one from its tail, a few KB each, so
+dating a file costs two small reads however large it is. Archive members
+cannot be read from the end, so they are decompressed once to their end
+(the catalog keeps their spans in the parse cache); tar members are dated
+while the archive is listed (stream_span).
+
+IntervalIndex keeps the spans sorted by their first entry and answers which
+files overlap a date range without looking at every file.
+"""
+import os
+import bisect
+
+from core.archives import is_virtual, split_virtual, archive_kind, open_log
+from core.parsers import line_date_key, parse_timestamp
+
+# Bytes read at each end of a file; enough for a few dozen log lines
+SPAN_BLOCK = 8 * 1024
+# Bytes decompressed at a time when an archive member is read to its end
+STREAM_CHUNK = 1024 * 1024
+
+
+def _timestamp(line):
+    """Local timestamp (seconds) of a log line, or None if it does not start with one."""
+    if line_date_key(line) is None:
+        return None
+    moment = parse_timestamp(line)
+    return moment.timestamp() if moment is not None else None
+
+
+def _first_timestamp(block):
+    for line in block.splitlines():
+        value = _timestamp(line)
+        if value is not None:
+            return value
+    return None
+
+
+def _last_timestamp(block):
+    for line in reversed(block.splitlines()):
+        value = _timestamp(line)
+        if value is not None:
+            return value
+    return None
+
+
+def stream_span(f):
+    """
+    (first, last) timestamps of the entries in an open binary stream read to its
+    end, keeping only the head and the last block; either may be None.
+    """
+    head = f.read(SPAN_BLOCK)
+    first = _first_timestamp(head)
+    tail, cut = head, False
+    for chunk in iter(lambda: f.read(STREAM_CHUNK), b""):
+        tail, cut = tail[-SPAN_BLOCK:] + chunk, True
+    if cut:
+        # The block may start in the middle of a line
+        tail = tail.split(b"\n", 1)[-1]
+    return first, _last_timestamp(tail)
+
+
+def finish_span(first, last, mtime):
+    """
+    The span of a file from the timestamps found in it. Without any the file is
+    dated by its modification time; a file with only a first entry ends there,
+    as the mtime of an archive says when it was packed, not what it holds.
+    """
+    if first is None:
+        first = min(last, mtime) if last is not None else mtime
+    if last is None:
+        last = first
+    return min(first, last), max(first, last)
+
+
+def read_span(path, size, mtime, to_end=True):
+    """
+    Returns (first, last) local timestamps of the log entries in a file.
+    Archive members are read to their end (once; the catalog caches the span);
+    with to_end False only their head is read and their last entry is bounded
+    by the modification time instead, which is enough to skip old files.
+    Tar members are dated by list_members(); here they only get their mtime.
+    """
+    first = last = None
+    try:
+        if not is_virtual(path):
+            with open(path, "rb") as f:
+                head = f.read(SPAN_BLOCK)
+                first = _first_timestamp(head)
+                if size > SPAN_BLOCK:
+                    f.seek(max(size - SPAN_BLOCK, SPAN_BLOCK))
+                    tail = f.read(SPAN_BLOCK)
+                    # The block may start in the middle of a line
+                    last = _last_timestamp(tail.split(b"\n", 1)[-1])
+                if last is None:
+                    last = _last_timestamp(head)
+        elif archive_kind(split_virtual(path)[0]) != "tar":
+            with open_log(path, SPAN_BLOCK) as f:
+                if to_end:
+                    first, last = stream_span(f)
+                else:
+                    first = _first_timestamp(f.read(SPAN_BLOCK))
+                    if first is not None:
+                        last = max(first, mtime)
+    except (OSError, EOFError, ValueError) as e:
+        print(f"Error reading {os.path.basename(path)}: {e}")
+    return finish_span(first, last, mtime)
+
+
+class IntervalIndex:
+    """
+    Static set of closed intervals (first, last, item), sorted by first.
+    overlapping(lo, hi) returns the items of all intervals that overlap
+    [lo, hi), in order of their start: a bisect finds the intervals that start
+    before hi, and a tree holding the latest end of every block of intervals
+    skips the blocks that all end before lo. A query costs O((k + 1) log n)
+    for k matches, independent of how many files are outside the range.
+    """
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals, key=lambda interval: interval[0])
+        self._firsts = [interval[0] for interval in intervals]
+        self._items = [interval[2] for interval in intervals]
+        size = 1
+        while size < len(intervals):
+            size *= 2
+        self._size = size
+        tree = [float("-inf")] * (2 * size)
+        for i, interval in enumerate(intervals):
+            tree[size + i] = interval[1]
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._last = tree
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlapping(self, lo, hi):
+        count = bisect.bisect_left(self._firsts, hi)
+        found = []
+        if not count:
+            return found
+        tree, size = self._last, self._size
+        stack = [(1, 0, size)]
+        while stack:
+            node, begin, end = stack.pop()
+            if begin >= count or tree[node] < lo:
+                continue
+            if node >= size:
+                found.append(self._items[begin])
+                continue
+            middle = (begin + end) // 2
+            stack.append((2 * node + 1, middle, end))
+            stack.append((2 * node, begin, middle))
+        return found
@@ -0,0 +1,233 @@
+"""
+Cross-log timeline: the records of several kinds of logs merged into one
+chronological stream.
+
+Every file is read as a stream of TimelineEvents, and the streams are merged
+with a heap keyed by timestamp (a k-way merge), so nothing is loaded into
+memory beyond one pending event per open file. A file is only opened once the
+merge reaches the first entry in its head (see core.timeindex), so a folder
+with thousands of rotated files keeps just the files of the current moment
+open. Files are expected to be chronological inside, as logs are.
+
+    timeline = Timeline(files, start_date, end_date)
+    for anchor, matches in correlate(timeline, panel_state_is("Fault"),
+                                     serial_event_is("timeout", "disconnect"), 2.0):
+        ...
+
+New kinds of logs are added with register_log_type(); a module that wants
+several kinds lists all their patterns in MODULE_INFO["pattern"].
+"""
+import os
+import heapq
+import fnmatch
+import datetime
+import itertools
+from collections import namedtuple, deque
+
+from core.archives import open_log, is_virtual
+from core.parsers import (window_keys, date_key, line_date_key, parse_kvpanel_line, parse_serial_line,
+                          chronological_rotation_order)
+from core.parse_cache import file_identity
+from core.timeindex import read_span
+
+# One record of the timeline. source is the log type ("KVPanel", "SedecalSerial"),
+# line the 1-based line number in path, record the typed record of the parser.
+TimelineEvent = namedtuple("TimelineEvent", "timestamp source path line record")
+
+# Log type -> (file name pattern, parse_line(bytes) returning a record with a timestamp, or None)
+LOG_TYPES = {
+    "KVPanel": ("KVPanel*.log", parse_kvpanel_line),
+    "SedecalSerial": ("SedecalSerial.log*", parse_serial_line),
+}
+
+
+def register_log_type(name, pattern, parse_line):
+    """Makes a new kind of log available to the timeline."""
+    LOG_TYPES[name] = (pattern, parse_line)
+
+
+def log_type(path):
+    """Returns the log type of a file from its name, or None."""
+    name = os.path.normcase(os.path.basename(path))
+    for source, (pattern, _) in LOG_TYPES.items():
+        if fnmatch.fnmatch(name, os.path.normcase(pattern)):
+            return source
+    return None
+
+
+def file_events(path, source, first_key=None, after_key=None, since=None):
+    """
+    Yields the TimelineEvents of one file. Lines outside [first_key, after_key)
+    are skipped by their date prefix, and so are events before the datetime since.
+    """
+    parse_line = LOG_TYPES[source][1]
+    since_key = date_key(since) if since is not None else None
+    with open_log(path) as f:
+        for number, line in enumerate(f, 1):
+            key = line_date_key(line)
+            if key is None:
+                continue
+            if first_key is not None and key < first_key:
+                continue
+            if after_key is not None and key >= after_key:
+                return    # logs are chronological
+            if since_key is not None and key < since_key:
+                continue
+            record = parse_line(line)
+            if record is None or (since is not None and record.timestamp < since):
+                continue
+            yield TimelineEvent(record.timestamp, source, path, number, record)
+
+
+def merge_events(streams):
+    """
+    Merges chronological event iterators into one. streams is a list of
+    (start, open_stream): open_stream() is only called once the merge reaches
+    the datetime start, the first entry of that stream. Events with the same
+    timestamp keep the order of their streams.
+    """
+    pending = sorted(enumerate(streams), key=lambda item: (item[1][0], item[0]))
+    pending.reverse()    # popped from the end: earliest start first
+    heap = []
+
+    def open_next():
+        order, (_, open_stream) = pending.pop()
+        iterator = open_stream()
+        for event in iterator:
+            heapq.heappush(heap, (event.timestamp, order, event, iterator))
+            break
+
+    while heap or pending:
+        # Open every stream that starts before the earliest pending event
+        while pending and (not heap or pending[-1][1][0] <= heap[0][0]):
+            open_next()
+        if not heap:
+            continue
+        timestamp, order, event, iterator = heap[0]
+        yield event
+        for following in iterator:
+            heapq.heapreplace(heap, (following.timestamp, order, following, iterator))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+class Timeline:
+    """
+    The events of a set of log files in chronological order. Files of log
+    types that are not requested (sources) or not known are ignored. Can be
+    iterated any number of times; every iteration reads the files again.
+    """
+
+    def __init__(self, files, start_date=None, end_date=None, sources=None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.files = []     # (path, source, first, last) of the files that can hold events
+        window = None
+        if start_date is not None and end_date is not None:
+            window = (datetime.datetime.combine(start_date, datetime.time.min),
+                      datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min))
+        by_source = {}
+        for path in files:
+            source = log_type(path)
+            if source is not None and (sources is None or source in sources):
+                by_source.setdefault(source, []).append(path)
+        for source, paths in by_source.items():
+            for path in chronological_rotation_order(paths):
+                identity = file_identity(path)
+                if identity is None:
+                    continue
+                # Archive members are not read to their end here: the stream does that anyway
+                first, last = read_span(path, 0 if is_virtual(path) else identity[0], identity[1], to_end=False)
+                first = datetime.datetime.fromtimestamp(first)
+                last = datetime.datetime.fromtimestamp(last)
+                if window is not None and (last < window[0] or first >= window[1]):
+                    continue
+                self.files.append((path, source, first, last))
+
+    @property
+    def sources(self):
+        return sorted({source for _, source, _, _ in self.files})
+
+    def events(self, since=None):
+        """Iterates the events, optionally starting at the datetime since."""
+        first_key, after_key = (window_keys(self.start_date, self.end_date)
+                                if self.start_date is not None and self.end_date is not None else (None, None))
+        streams = []
+        for path, source, first, last in self.files:
+            if since is not None and last < since:
+                continue
+            start = max(first, since) if since is not None else first
+            streams.append((start, lambda path=path, source=source:
+                            file_events(path, source, first_key, after_key, since)))
+        return merge_events(streams)
+
+    def __iter__(self):
+        return self.events()
+
+    def pages(self, size, since=None):
+        """Yields the events in lists of up to size events."""
+        events = self.events(since)
+        while True:
+            page = list(itertools.islice(events, size))
+            if not page:
+                return
+            yield page
+
+
+def _seconds(within):
+    return within.total_seconds() if isinstance(within, datetime.timedelta) else float(within)
+
+
+def correlate(events, anchor, other, within):
+    """
+    Streams (anchor event, list of other events) for every event accepted by
+    the predicate anchor that has events accepted by other no more than within
+    seconds (or a timedelta) before or after it. Only the last within seconds
+    of events are kept in memory.
+    """
+    window = datetime.timedelta(seconds=_seconds(within))
+    recent = deque()    # other events of the last window
+    waiting = deque()   # (anchor event, matches) whose window is still open
+    for event in events:
+        while waiting and waiting[0][0].timestamp + window < event.timestamp:
+            found = waiting.popleft()
+            if found[1]:
+                yield found
+        while recent and recent[0].timestamp + window < event.timestamp:
+            recent.popleft()
+        if other(event):
+            recent.append(event)
+            for _, matches in waiting:
+                matches.append(event)
+        if anchor(event):
+            waiting.append((event, [match for match in recent if match is not event]))
+    for found in waiting:
+        if found[1]:
+            yield found
+
+
+def serial_event_is(*names):
+    """Predicate for SedecalSerial events of the given kinds ("timeout", "disconnect", ...)."""
+    names = set(names)
+    return lambda event: event.source == "SedecalSerial" and event.record.event in names
+
+
+def panel_state_is(*states):
+    """Predicate for KVPanel records in one of the given states (case-insensitive)."""
+    states = {state.lower() for state in states}
+    return lambda event: (event.source == "KVPanel" and event.record.state is not None
+                          and event.record.state.lower() in states)
+
+
+def describe(event):
+    """Short text of an event for reports and the timeline view."""
+    record = event.record
+    if event.source == "KVPanel":
+        parts = [f"{name}={value:g}" for name, value in sorted(record.pots.items())]
+        if record.state is not None:
+            parts.append(f"State={record.state}")
+        return " ".join(parts)
+    if event.source == "SedecalSerial":
+        return record.detail
+    return str(record)
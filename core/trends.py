@@ -0,0 +1,314 @@
+"""
+Numeric samples of the logs as NumPy arrays, and trend statistics over them.
+
+Trend questions ("is PotA drifting over six months?") need millions of
+samples. Instead of parsing line by line, the files are read in large
+chunks and every field is pulled out of a whole chunk with one regular
+expression; timestamps and values are then converted to arrays in one go
+(timestamps from their digits, whatever the separators). The statistics
+(percentiles, rolling mean and deviation, drift slope, daily means,
+threshold crossings) are vectorized as well.
+
+    series = load_series(files, ["PotA", "kv"], start_date, end_date)
+    stats = trend_stats(series["PotA"], low=0.0, high=10.0)
+    status = verdict(abs(stats.drift), 0.05, 0.10)
+
+Drift is defined by daily_mean_drift(), which is plain Python so that modules
+without NumPy ("XVI panel: pots") compute the same number.
+
+Fields: "Pot<name>" is a KVPanel pot reading (V), "kv" the byte after the
+"02 4B 56" ("KV") prefix of SedecalSerial TX frames, read as the kV sent to
+the generator. That frame layout is not confirmed, so kV values are for
+information only.
+
+NumPy is optional: without it available() is False and the functions here
+raise RuntimeError.
+"""
+import re
+import datetime
+from collections import namedtuple
+try:
+    import numpy
+except ImportError:
+    numpy = None  # trend statistics need NumPy
+
+from core.archives import open_log
+from core.parsers import window_keys, line_date_key
+from core.results import STATUS_ORDER
+from core.timeline import log_type
+
+BATCH_BYTES = 8 * 1024 * 1024    # bytes of log text converted at once
+MS_PER_DAY = 86400000
+
+# Timestamp at the start of a line; the digits are decoded by position (see _decode_times)
+_TIMESTAMP = rb"^(\d{4}[-/]\d\d[-/]\d\d[ T]\d\d:\d\d:\d\d(?:[.,]\d{1,3})?)\d*"
+
+# A numeric field: the log type it is read from, a regex whose two groups are
+# the timestamp and the value, and how the value is written ("float" or "hex")
+Field = namedtuple("Field", "name source regex encoding")
+# Samples of one field: times in ms since the epoch (local time, int64) and values (float64)
+Series = namedtuple("Series", "name times values")
+# Summary of a series; drift is the daily_mean_drift() of the readings inside the limits,
+# slope the same per day, outside the number of readings outside the limits
+TrendStats = namedtuple("TrendStats",
+                        "count mean std minimum maximum p5 p50 p95 slope drift days crossings outside")
+
+
+def available():
+    return numpy is not None
+
+
+def _require():
+    if numpy is None:
+        raise RuntimeError("NumPy is not installed (pip install numpy)")
+
+
+def field(name):
+    """Returns the Field for a field name ("PotA", "PotB", ..., "kv")."""
+    if name == "kv":
+        return Field(name, "SedecalSerial",
+                     re.compile(_TIMESTAMP + rb"[^\n]*?\b(?:TX|Sent|Send)\b[^\n]*?\b02 4B 56 ([0-9A-Fa-f]{2})\b",
+                                re.MULTILINE), "hex")
+    if name.lower().startswith("pot"):
+        return Field(name, "KVPanel",
+                     re.compile(_TIMESTAMP + rb"[^\n]*?\b" + re.escape(name.encode("ascii")) +
+                                rb"\s*[=:]\s*(-?\d+(?:\.\d+)?)", re.MULTILINE | re.IGNORECASE), "float")
+    raise ValueError(f"Unknown numeric field: {name}")
+
+
+def _decode_times(stamps):
+    """Converts timestamps (bytes) to int64 ms since the epoch, using only the digit positions."""
+    raw = numpy.array(stamps, dtype="S23")
+    digits = raw.view(numpy.uint8).reshape(len(raw), 23).astype(numpy.int64) - 48
+
+    def number(first, last):
+        value = numpy.zeros(len(raw), dtype=numpy.int64)
+        for position in range(first, last):
+            value = value * 10 + digits[:, position]
+        return value
+
+    days = ((number(0, 4) - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+            + (number(5, 7) - 1).astype("timedelta64[M]")).astype("datetime64[D]") + (number(8, 10) - 1)
+    fraction = numpy.zeros(len(raw), dtype=numpy.int64)
+    for position, scale in ((20, 100), (21, 10), (22, 1)):
+        digit = digits[:, position]
+        fraction += numpy.where((digit >= 0) & (digit <= 9), digit, 0) * scale
+    return (days.astype(numpy.int64) * MS_PER_DAY + number(11, 13) * 3600000 + number(14, 16) * 60000
+            + number(17, 19) * 1000 + fraction)
+
+
+def _decode_values(values, encoding):
+    if encoding == "hex":
+        raw = numpy.array(values, dtype="S2").view(numpy.uint8).reshape(len(values), 2).astype(numpy.int64)
+        digits = numpy.where(raw >= 65, (raw | 32) - 87, raw - 48)    # "a".."f" and "A".."F" -> 10..15
+        return (digits[:, 0] * 16 + digits[:, 1]).astype(numpy.float64)
+    return numpy.array(values, dtype="S32").astype(numpy.float64)
+
+
+def _chunks(path, first_key, after_key, batch_bytes):
+    """Yields line-aligned chunks of a file, skipping chunks that lie entirely before the window."""
+    with open_log(path) as f:
+        rest = b""
+        while True:
+            chunk = f.read(batch_bytes)
+            data = rest + chunk
+            if not data:
+                return
+            cut = data.rfind(b"\n") + 1 if chunk else len(data)
+            if not cut:
+                rest = data
+                continue
+            data, rest = data[:cut], data[cut:]
+            head = line_date_key(data)
+            if head is not None and after_key is not None and head >= after_key:
+                return    # logs are chronological
+            tail = line_date_key(data[data.rfind(b"\n", 0, len(data) - 1) + 1:])
+            if tail is not None and first_key is not None and tail < first_key:
+                continue
+            yield data
+
+
+def iter_batches(files, fields, start_date=None, end_date=None, batch_bytes=BATCH_BYTES):
+    """
+    Yields Series batches (one field of one chunk of a file each) for the
+    given field names, limited to the date range.
+    """
+    _require()
+    specs = [field(name) for name in fields]
+    first_key, after_key = window_keys(start_date, end_date) if start_date and end_date else (None, None)
+    low = high = None
+    if first_key is not None:
+        low = (numpy.datetime64(first_key.decode("ascii"), "D").astype(numpy.int64)) * MS_PER_DAY
+        high = (numpy.datetime64(after_key.decode("ascii"), "D").astype(numpy.int64)) * MS_PER_DAY
+    for path in files:
+        wanted = [spec for spec in specs if spec.source == log_type(path)]
+        if not wanted:
+            continue
+        for data in _chunks(path, first_key, after_key, batch_bytes):
+            for spec in wanted:
+                found = spec.regex.findall(data)
+                if not found:
+                    continue
+                stamps, values = zip(*found)
+                times = _decode_times(stamps)
+                values = _decode_values(values, spec.encoding)
+                if low is not None:
+                    inside = (times >= low) & (times < high)
+                    times, values = times[inside], values[inside]
+                if len(times):
+                    yield Series(spec.name, times, values)
+
+
+def load_series(files, fields, start_date=None, end_date=None, batch_bytes=BATCH_BYTES):
+    """Returns {field name: Series} with all samples of the fields, sorted by time."""
+    _require()
+    parts = {name: [] for name in fields}
+    for batch in iter_batches(files, fields, start_date, end_date, batch_bytes):
+        parts[batch.name].append(batch)
+    series = {}
+    for name, batches in parts.items():
+        if batches:
+            times = numpy.concatenate([batch.times for batch in batches])
+            values = numpy.concatenate([batch.values for batch in batches])
+        else:
+            times = numpy.zeros(0, dtype=numpy.int64)
+            values = numpy.zeros(0, dtype=numpy.float64)
+        if len(times) > 1 and numpy.any(times[1:] < times[:-1]):
+            order = numpy.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+        series[name] = Series(name, times, values)
+    return series
+
+
+def rolling_mean(values, window):
+    """Mean of every run of window consecutive samples (len(values) - window + 1 results)."""
+    _require()
+    if window < 1 or len(values) < window:
+        return numpy.zeros(0)
+    sums = numpy.cumsum(numpy.concatenate(([0.0], values)))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def rolling_std(values, window):
+    """Standard deviation of every run of window consecutive samples."""
+    _require()
+    if window < 1 or len(values) < window:
+        return numpy.zeros(0)
+    centered = values - numpy.mean(values)    # keeps the sums of squares small
+    mean = rolling_mean(centered, window)
+    squares = rolling_mean(centered * centered, window)
+    return numpy.sqrt(numpy.maximum(squares - mean * mean, 0.0))
+
+
+def percentiles(values, points=(5, 50, 95)):
+    _require()
+    if not len(values):
+        return [float("nan")] * len(points)
+    return [float(value) for value in numpy.percentile(values, points)]
+
+
+def drift_slope(times, values):
+    """Least-squares slope of the values per day."""
+    _require()
+    if len(values) < 2:
+        return 0.0
+    days = (times - times[0]) / MS_PER_DAY
+    days = days - days.mean()
+    spread = numpy.dot(days, days)
+    if not spread:
+        return 0.0
+    return float(numpy.dot(days, values - values.mean()) / spread)
+
+
+def daily_means(times, values, return_counts=False):
+    """
+    Returns (days as datetime64[D], mean of each day) for the days with samples,
+    with return_counts also the number of samples of each day.
+    """
+    _require()
+    day_numbers = times // MS_PER_DAY
+    days, index = numpy.unique(day_numbers, return_inverse=True)
+    counts = numpy.bincount(index, minlength=len(days))
+    means = numpy.bincount(index, weights=values, minlength=len(days)) / numpy.maximum(counts, 1)
+    if return_counts:
+        return days.astype("datetime64[D]"), means, counts
+    return days.astype("datetime64[D]"), means
+
+
+def daily_mean_drift(days):
+    """
+    Drift of a reading over a period: the change, from the first to the last
+    day, of a least-squares line through the daily means, weighted by the
+    number of readings of each day. With two days this is the difference of
+    their means. days holds (day number, mean, readings); plain Python, no NumPy.
+    """
+    days = [(float(day), float(mean), float(count)) for day, mean, count in days if count]
+    total = sum(count for _, _, count in days)
+    if len(days) < 2:
+        return 0.0
+    mean_day = sum(day * count for day, _, count in days) / total
+    mean_value = sum(mean * count for _, mean, count in days) / total
+    spread = sum(count * (day - mean_day) ** 2 for day, _, count in days)
+    if not spread:
+        return 0.0
+    slope = sum(count * (day - mean_day) * (mean - mean_value) for day, mean, count in days) / spread
+    return slope * (max(day for day, _, _ in days) - min(day for day, _, _ in days))
+
+
+def inside_limits(values, low=None, high=None):
+    """Boolean mask of the values within [low, high]."""
+    _require()
+    inside = numpy.ones(len(values), dtype=bool)
+    if low is not None:
+        inside &= values >= low
+    if high is not None:
+        inside &= values <= high
+    return inside
+
+
+def threshold_crossings(values, low=None, high=None):
+    """Number of times the values leave [low, high] (a run of outside samples counts once)."""
+    outside = ~inside_limits(values, low, high)
+    if not len(outside):
+        return 0
+    return int(outside[0]) + int(numpy.count_nonzero(outside[1:] & ~outside[:-1]))
+
+
+def trend_stats(series, low=None, high=None):
+    """
+    TrendStats of a Series. Readings outside [low, high] count as excursions and
+    are left out of the drift, so that a few spikes do not tilt it.
+    """
+    _require()
+    values = series.values
+    if not len(values):
+        return TrendStats(0, *([float("nan")] * 7), 0.0, 0.0, 0.0, 0, 0)
+    p5, p50, p95 = percentiles(values)
+    inside = inside_limits(values, low, high)
+    days, means, counts = daily_means(series.times[inside], values[inside], return_counts=True)
+    day_numbers = days.astype(numpy.int64)
+    drift = daily_mean_drift(zip(day_numbers.tolist(), means.tolist(), counts.tolist()))
+    span = float(day_numbers[-1] - day_numbers[0]) if len(day_numbers) else 0.0
+    return TrendStats(len(values), float(values.mean()), float(values.std()), float(values.min()),
+                      float(values.max()), p5, p50, p95, drift / span if span else 0.0, drift,
+                      float(series.times[-1] - series.times[0]) / MS_PER_DAY,
+                      threshold_crossings(values, low, high), int(len(values) - numpy.count_nonzero(inside)))
+
+
+def verdict(value, warning, alarm):
+    """"Green", "Yellow" or "Red" for a value against its warning and alarm limits."""
+    if value >= alarm:
+        return "Red"
+    if value >= warning:
+        return "Yellow"
+    return "Green"
+
+
+def worst(statuses):
+    """The worst of several statuses ("Green" if there are none)."""
+    return max(statuses, key=lambda status: STATUS_ORDER.get(status, 3), default="Green")
+
+
+def to_datetime(ms):
+    """Converts a time of a Series back to a datetime."""
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=int(ms))
@@ -0,0 +1,368 @@
+"""
+Module updater: downloads new and changed analysis modules from GitHub.
+
+The listing of the modules folder (API /contents) carries the git blob SHA of
+every file, so modules whose local file has the same SHA are skipped without
+downloading anything. The listing itself and every download are conditional
+requests (If-None-Match / If-Modified-Since with the validators of the last
+response, kept in update_state.json), and the remaining downloads run in
+parallel over one pooled HTTP session.
+
+The API base URL can be changed with "update_api_url" in config.json, for
+example to test against a local HTTP server.
+
+Program updates (apply_release) unpack the release tarball while it is being
+downloaded and write only the files whose content differs from the installed
+copy. Changed files are staged next to the installation first and then moved
+in one by one with os.replace; if anything fails, the replaced files are moved
+back from a backup folder.
+"""
+import os
+import json
+import shutil
+import tarfile
+import hashlib
+import tempfile
+import threading
+import concurrent.futures
+from collections import namedtuple
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None  # requests library is needed for updating
+
+from core.versions import GITHUB_REPO, compare_versions, get_module_version_from_content
+
+DEFAULT_API_URL = f"https://api.github.com/repos/{GITHUB_REPO}"
+UPDATE_STATE_FILE = "update_state.json"
+DEFAULT_UPDATE_WORKERS = 4
+REQUEST_TIMEOUT = 30    # seconds per HTTP request
+
+COPY_CHUNK = 256 * 1024        # bytes read from the tarball or a file at a time
+SPOOL_LIMIT = 1024 * 1024      # same-size files up to this size are compared in memory
+PROTECTED_FILES = ("config.json",)
+
+# Lists of (file name, version); failed holds (file name, error message)
+UpdateReport = namedtuple("UpdateReport", "updated up_to_date development failed")
+# Outcome of a program update: relative paths written, number of unchanged files, bytes written
+ReleaseUpdate = namedtuple("ReleaseUpdate", "written unchanged bytes_written")
+
+
+def api_url(config):
+    """The GitHub API base URL of the repository ("update_api_url" in config.json)."""
+    return config.get("update_api_url", DEFAULT_API_URL).rstrip("/")
+
+
+def git_blob_sha(data):
+    """The SHA git (and the GitHub contents API) uses for a file with these bytes."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def create_session(workers=DEFAULT_UPDATE_WORKERS):
+    """A requests session whose connection pool is large enough for the parallel downloads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _validators(entry):
+    """Conditional request headers from the stored ETag / Last-Modified of a response."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _write_atomic(path, data):
+    """Writes a file through a temporary file, so a failed download never leaves half a module."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".update-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+class ModuleUpdater:
+    """
+    Brings the local modules folder up to date with the modules folder of the repository.
+    Remote modules replace local ones only if their version is newer.
+    """
+
+    def __init__(self, base_url=DEFAULT_API_URL, modules_dir="modules", state_path=UPDATE_STATE_FILE,
+                 workers=DEFAULT_UPDATE_WORKERS, session=None):
+        if requests is None and session is None:
+            raise RuntimeError("The requests library is not installed.")
+        self.base_url = base_url.rstrip("/")
+        self.modules_dir = modules_dir
+        self.state_path = state_path
+        self.workers = max(1, int(workers))
+        self.session = session or create_session(self.workers)
+        self.state = self._load_state()
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if isinstance(state, dict):
+                state.setdefault("listing", {})
+                state.setdefault("modules", {})
+                return state
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error reading {self.state_path}: {e}")
+        return {"listing": {}, "modules": {}}
+
+    def _save_state(self):
+        try:
+            _write_atomic(self.state_path, json.dumps(self.state, indent=1).encode("utf-8"))
+        except Exception as e:
+            print(f"Error saving {self.state_path}: {e}")
+
+    def _get(self, url, entry):
+        """Conditional GET; returns the response (status 304 if the stored copy is still current)."""
+        response = self.session.get(url, headers=_validators(entry), timeout=REQUEST_TIMEOUT)
+        if response.status_code == 200:
+            entry["etag"] = response.headers.get("ETag")
+            entry["last_modified"] = response.headers.get("Last-Modified")
+        return response
+
+    def listing(self):
+        """The file list of the remote modules folder; a 304 answer reuses the cached listing."""
+        entry = self.state["listing"]
+        if "body" not in entry:
+            # Validators without the cached body are useless
+            entry.pop("etag", None)
+            entry.pop("last_modified", None)
+        response = self._get(f"{self.base_url}/contents/modules", entry)
+        if response.status_code == 304:
+            return entry["body"]
+        if response.status_code != 200:
+            raise RuntimeError(f"GitHub API returned error: {response.status_code}")
+        entry["body"] = [{"name": item.get("name"), "sha": item.get("sha"), "download_url": item.get("download_url")}
+                         for item in response.json()]
+        return entry["body"]
+
+    def update(self):
+        """Checks every remote module and downloads the changed ones in parallel. Returns an UpdateReport."""
+        os.makedirs(self.modules_dir, exist_ok=True)
+        report = UpdateReport([], [], [], [])
+        remote_files = [item for item in self.listing()
+                        if item["name"].endswith(".py") and item["name"] != "__init__.py"]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="update") as executor:
+            futures = {executor.submit(self._update_module, item, report): item["name"] for item in remote_files}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    with self._lock:
+                        report.failed.append((futures[future], str(e)))
+        self._save_state()
+        for items in report:
+            items.sort()
+        return report
+
+    def _record(self, items, name, version):
+        with self._lock:
+            items.append((name, version))
+
+    def _update_module(self, item, report):
+        name = item["name"]
+        local_path = os.path.join(self.modules_dir, name)
+        local_data = None
+        if os.path.exists(local_path):
+            with open(local_path, "rb") as f:
+                local_data = f.read()
+        with self._lock:
+            entry = dict(self.state["modules"].get(name, {}))
+
+        local_version = None
+        if local_data is not None:
+            local_version = get_module_version_from_content(local_data.decode("utf-8", errors="replace"))
+            if item.get("sha") and git_blob_sha(local_data) == item["sha"]:
+                # Identical to the remote file: nothing to download
+                self._record(report.up_to_date, name, local_version)
+                return
+            if entry.get("sha") and entry["sha"] == item.get("sha") and entry.get("version"):
+                # Remote file unchanged since the last download; the local copy was edited here
+                self._classify(report, name, local_version, entry["version"])
+                return
+
+        if local_data is None:
+            # A 304 is useless without a local copy
+            entry = {}
+        response = self._get(item["download_url"], entry)
+        if response.status_code == 304 and entry.get("version"):
+            self._classify(report, name, local_version, entry["version"])
+            return
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        remote_data = response.content
+        remote_version = get_module_version_from_content(remote_data.decode("utf-8", errors="replace"))
+        entry["sha"] = item.get("sha") or git_blob_sha(remote_data)
+        entry["version"] = remote_version
+        with self._lock:
+            self.state["modules"][name] = entry
+
+        if local_data is None or compare_versions(local_version, remote_version) < 0:
+            _write_atomic(local_path, remote_data)
+            self._record(report.updated, name, remote_version)
+        else:
+            self._classify(report, name, local_version, remote_version)
+
+    def _classify(self, report, name, local_version, remote_version):
+        """A local module that is not replaced is either current or a newer development version."""
+        if compare_versions(local_version, remote_version) > 0:
+            self._record(report.development, name, local_version)
+        else:
+            self._record(report.up_to_date, name, local_version)
+
+
+def format_report(report):
+    """The update summary shown to the user and written to update_modules.log."""
+    lines = ["Updated:"]
+    lines += [f"  {name} ({version})" for name, version in report.updated] or ["  No updates."]
+    lines.append("\nUp-to-date:")
+    lines += [f"  {name} ({version})" for name, version in report.up_to_date] or ["  No up-to-date modules."]
+    if report.development:
+        lines.append("\nLocal development versions (no update required):")
+        lines += [f"  {name} ({version})" for name, version in report.development]
+    if report.failed:
+        lines.append("\nFailed:")
+        lines += [f"  {name}: {error}" for name, error in report.failed]
+    return "\n".join(lines)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _release_path(name):
+    """
+    Path of a tarball member inside the installation: GitHub tarballs have one
+    top-level folder, which is dropped. None for the folder itself and for
+    unsafe paths (absolute or leaving the installation).
+    """
+    parts = name.replace("\\", "/").split("/")[1:]
+    if not parts or any(part in ("", ".", "..") for part in parts) or ":" in parts[0]:
+        return None
+    return os.path.join(*parts)
+
+
+def apply_release(stream, install_dir, protected=PROTECTED_FILES):
+    """
+    Updates the installation in install_dir from a .tar.gz release read from a
+    file-like stream (for example the raw HTTP response). The stream is read
+    once, front to back; nothing is written for files that did not change, and
+    files named in protected (config.json) are never touched.
+    Returns a ReleaseUpdate. On error the installation is left as it was.
+    """
+    staging = tempfile.mkdtemp(prefix=".update-staging-", dir=install_dir)
+    backup = tempfile.mkdtemp(prefix=".update-backup-", dir=install_dir)
+    staged = []         # relative paths of changed files in the staging folder
+    unchanged = 0
+    written = 0
+    try:
+        with tarfile.open(fileobj=stream, mode="r|gz") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                rel_path = _release_path(member.name)
+                if rel_path is None or os.path.basename(rel_path) in protected:
+                    continue
+                source = tar.extractfile(member)
+                target = os.path.join(install_dir, rel_path)
+                if _stage_if_changed(source, member, target, os.path.join(staging, rel_path)):
+                    staged.append(rel_path)
+                    written += member.size
+                else:
+                    unchanged += 1
+        _swap_in(staged, staging, backup, install_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(backup, ignore_errors=True)
+    return ReleaseUpdate(staged, unchanged, written)
+
+
+def _stage_if_changed(source, member, target, staged_path):
+    """
+    Copies a tarball member to the staging folder unless the installed file has
+    the same content. A different size needs no hashing; a file of the same size
+    is hashed while it is read and only kept if the hash differs.
+    """
+    os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+    same_size = os.path.isfile(target) and os.path.getsize(target) == member.size
+    if not same_size:
+        with open(staged_path, "wb") as f:
+            shutil.copyfileobj(source, f, COPY_CHUNK)
+    else:
+        digest = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT, dir=os.path.dirname(staged_path)) as spool:
+            for chunk in iter(lambda: source.read(COPY_CHUNK), b""):
+                digest.update(chunk)
+                spool.write(chunk)
+            if digest.digest() == _file_digest(target):
+                return False
+            spool.seek(0)
+            with open(staged_path, "wb") as f:
+                shutil.copyfileobj(spool, f, COPY_CHUNK)
+    if member.mode:
+        os.chmod(staged_path, member.mode & 0o777)
+    os.utime(staged_path, (member.mtime, member.mtime))
+    return True
+
+
+def _swap_in(staged, staging, backup, install_dir):
+    """
+    Moves the staged files into the installation. Every replaced file is first
+    moved to the backup folder; if a move fails, all files done so far are
+    restored, the folders created for new files are removed and the error is
+    raised again.
+    """
+    done = []       # (target, backup path or None for a new file)
+    created = []    # folders created in the installation, parents first
+    try:
+        for rel_path in staged:
+            target = os.path.join(install_dir, rel_path)
+            saved = None
+            if os.path.exists(target):
+                saved = os.path.join(backup, rel_path)
+                os.makedirs(os.path.dirname(saved), exist_ok=True)
+                os.replace(target, saved)
+            done.append((target, saved))
+            missing = []
+            folder = os.path.dirname(target)
+            while not os.path.isdir(folder):
+                missing.append(folder)
+                folder = os.path.dirname(folder)
+            created.extend(reversed(missing))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(os.path.join(staging, rel_path), target)
+    except Exception:
+        for target, saved in reversed(done):
+            try:
+                if saved is not None:
+                    os.replace(saved, target)
+                elif os.path.exists(target):
+                    os.remove(target)
+            except OSError as e:
+                print(f"Error restoring {target}: {e}")
+        for folder in reversed(created):
+            try:
+                os.rmdir(folder)
+            except OSError as e:
+                print(f"Error removing {folder}: {e}")
+        raise
@@ -0,0 +1,46 @@
+"""
+Program and module version helpers shared by the GUI and the command line.
+"""
+import re
+
+GITHUB_REPO = "DenForCLM/XVI_logs"
+LOCAL_VERSION = "0.4"  # current program version (only major.minor)
+
+
+def compare_versions(v1, v2):
+    """
+    Compares two versions by the first two components (major.minor).
+    Returns:
+       -1 if v1 < v2,
+        0 if v1 == v2,
+        1 if v1 > v2.
+    """
+    def normalize(v):
+        # Take only the first two components
+        return [int(x) for x in v.lstrip("v").split(".")[:2]]
+    n1 = normalize(v1)
+    n2 = normalize(v2)
+    for a, b in zip(n1, n2):
+        if a < b:
+            return -1
+        elif a > b:
+            return 1
+    if len(n1) < len(n2):
+        return -1
+    elif len(n1) > len(n2):
+        return 1
+    return 0
+
+
+def get_module_version_from_content(content):
+    """
+    Searches for 'version' in MODULE_INFO within the module content.
+    Returns that version or '0.0' if not found.
+    """
+    pattern = r'["\']version["\']\s*:\s*["\']\s*([\d\.]+)\s*["\']'
+    match = re.search(pattern, content, re.IGNORECASE | re.MULTILINE)
+    if match:
+        return match.group(1)
+    else:
+        print("Debug: Version not found in file content.")
+    return "0.0"
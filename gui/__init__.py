@@ -0,0 +1,3 @@
+"""
+PyQt5 user interface of the log analyzer.
+"""
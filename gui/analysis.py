@@ -0,0 +1,34 @@
+"""
+Bridge between the AnalysisEngine and the GUI thread.
+"""
+from PyQt5 import QtCore
+
+
+class AnalysisWorker(QtCore.QObject):
+    """
+    Drives the AnalysisEngine on a worker thread and forwards each module's
+    result to the GUI thread as soon as it is available.
+    """
+    module_finished = QtCore.pyqtSignal(object, str, str)    # AnalysisJob, result, status
+    module_progress = QtCore.pyqtSignal(object, object)      # AnalysisJob, core.plugin_api.Progress
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, engine):
+        super(AnalysisWorker, self).__init__()
+        self.engine = engine
+
+    @QtCore.pyqtSlot(object, object, object)
+    def run(self, jobs, start_date, end_date):
+        """Runs all jobs; blocks this worker thread, not the GUI."""
+        try:
+            self.engine.run(jobs, start_date, end_date, self.report, self.report_progress)
+        finally:
+            self.finished.emit()
+
+    def report(self, job, result, status):
+        """Engine callback; runs on the engine's thread and queues the result to the GUI."""
+        self.module_finished.emit(job, str(result), str(status))
+
+    def report_progress(self, job, progress):
+        """Engine progress callback; queues the progress of a running module to the GUI."""
+        self.module_progress.emit(job, progress)
@@ -0,0 +1,113 @@
+"""
+File list of the main window: a virtual table model and the worker that owns
+the file catalog and filters it off the GUI thread.
+"""
+import datetime
+
+from PyQt5 import QtCore
+
+from core.catalog import FileCatalog
+from core.archives import display_name
+
+
+class FileListModel(QtCore.QAbstractTableModel):
+    """
+    Virtual table model for the file list: the files with the time of their
+    first and last log entry. Only rows that are visible are ever turned into
+    text by the view.
+    """
+    HEADERS = ["File Name", "First Entry", "Last Entry"]
+
+    def __init__(self, parent=None):
+        super(FileListModel, self).__init__(parent)
+        self.entries = []    # list of CatalogEntry
+        self.spans = []      # (first, last) timestamps of the entries, same order
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return display_name(self.entries[row].path)
+            return datetime.datetime.fromtimestamp(self.spans[row][column - 1]).strftime("%Y-%m-%d %H:%M:%S")
+        if role == QtCore.Qt.UserRole:
+            # Sort key: file name or the actual timestamp
+            return display_name(self.entries[row].path) if column == 0 else self.spans[row][column - 1]
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def clear(self):
+        """Removes all rows."""
+        self.beginResetModel()
+        self.entries = []
+        self.spans = []
+        self.endResetModel()
+
+    def append_entries(self, entries, spans):
+        """Appends a chunk of rows (entries and their spans) at the end of the model."""
+        if not entries:
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(entries) - 1)
+        self.entries.extend(entries)
+        self.spans.extend(spans)
+        self.endInsertRows()
+
+
+class FileListWorker(QtCore.QObject):
+    """
+    Owns the file catalog and answers file list requests on a worker thread.
+    Matching files are sent back in chunks so the table fills in progressively.
+    """
+    chunk_ready = QtCore.pyqtSignal(int, object, object)   # generation, CatalogEntry list, spans
+    finished = QtCore.pyqtSignal(int, int)            # generation, number of files
+    catalog_changed = QtCore.pyqtSignal()
+
+    CHUNK_SIZE = 2000
+
+    def __init__(self, span_cache=None):
+        super(FileListWorker, self).__init__()
+        self.catalog = None
+        self.span_cache = span_cache    # ParseCache keeping the time spans of the files
+        # Set from the GUI thread; requests with an older generation stop early
+        self.latest_generation = 0
+
+    def get_catalog(self, directory):
+        """Returns the catalog for the directory, building it with a full scan if needed."""
+        if self.catalog is None or self.catalog.directory != directory:
+            self.catalog = FileCatalog(directory, self.span_cache)
+        return self.catalog
+
+    @QtCore.pyqtSlot(int, str, object, object, object)
+    def list_files(self, generation, directory, start_date, end_date, patterns):
+        """Filters the catalog and emits the matching files in chunks."""
+        if generation != self.latest_generation:
+            return
+        catalog = self.get_catalog(directory)
+        files = catalog.select(start_date, end_date, patterns)
+        for i in range(0, len(files), self.CHUNK_SIZE):
+            if generation != self.latest_generation:
+                return
+            chunk = files[i:i + self.CHUNK_SIZE]
+            self.chunk_ready.emit(generation, chunk, [catalog.span(entry.path) for entry in chunk])
+        self.finished.emit(generation, len(files))
+
+    @QtCore.pyqtSlot(str)
+    def refresh(self, directory):
+        """Incrementally refreshes the catalog after a directory change notification."""
+        if self.catalog is None or self.catalog.directory != directory:
+            return
+        added, removed, modified = self.catalog.refresh()
+        if added or removed or modified:
+            self.catalog_changed.emit()
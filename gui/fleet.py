@@ -0,0 +1,300 @@
+"""
+Fleet window: runs the checked modules over the log folders of all registered
+machines and shows the outcome as a machine x module status matrix that
+fills in while the machines are being analyzed.
+"""
+import os
+import datetime
+
+from PyQt5 import QtWidgets, QtCore
+
+from core.fleet import configured_machines, machine_name
+from core.results import ResultStore, result_from_job, worst_status, export, EXPORT_FORMATS
+from gui.results import status_icon
+
+
+class FleetWorker(QtCore.QObject):
+    """Drives a FleetRunner on a worker thread and forwards each result to the GUI thread."""
+    result_ready = QtCore.pyqtSignal(object)    # ModuleResult
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, runner):
+        super(FleetWorker, self).__init__()
+        self.runner = runner
+
+    @QtCore.pyqtSlot(object, object, object, object)
+    def run(self, machines, modules, start_date, end_date):
+        """Analyzes all machines; blocks this worker thread, not the GUI."""
+        try:
+            self.runner.run(machines, modules, start_date, end_date, self.report)
+        finally:
+            self.finished.emit()
+
+    def report(self, name, directory, job, result, status):
+        self.result_ready.emit(result_from_job(job, result, status, directory, name))
+
+
+class FleetMatrixModel(QtCore.QAbstractTableModel):
+    """One row per machine, one column per module and a last column with the worst status."""
+
+    def __init__(self, parent=None):
+        super(FleetMatrixModel, self).__init__(parent)
+        self.machines = []
+        self.modules = []   # column headers: module names
+        self.columns = {}   # module id -> column (names need not be unique)
+        self.cells = {}     # (row, column) -> ModuleResult
+        self.store = ResultStore()
+
+    def reset(self, machines, modules):
+        """Starts an empty matrix for the given machine names and module infos."""
+        self.beginResetModel()
+        self.machines = list(machines)
+        self.modules = [info.get("name", "Unknown Module") for info in modules]
+        self.columns = {info.get("id", ""): column for column, info in enumerate(modules)}
+        self.cells = {}
+        self.store.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.machines)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.modules) + 1
+
+    def row_results(self, row):
+        return [self.cells[(row, column)] for column in range(len(self.modules)) if (row, column) in self.cells]
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if column == len(self.modules):
+            results = self.row_results(row)
+            if not results:
+                return None
+            status = worst_status(results)
+            if role == QtCore.Qt.DisplayRole:
+                return status
+            if role == QtCore.Qt.DecorationRole:
+                return status_icon(status)
+            return None
+        result = self.cells.get((row, column))
+        if role == QtCore.Qt.DecorationRole:
+            return status_icon(result.status if result else None)
+        if result is None:
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return result.status
+        if role == QtCore.Qt.ToolTipRole:
+            return result.message + (" (cached)" if result.cached else "")
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Vertical:
+            return self.machines[section]
+        return self.modules[section] if section < len(self.modules) else "Worst"
+
+    def add_result(self, result):
+        """Fills in one cell (and the worst status of its row)."""
+        row = self.machines.index(result.machine)
+        column = self.columns[result.id]
+        self.cells[(row, column)] = result
+        self.store.add(result)
+        self.dataChanged.emit(self.index(row, column), self.index(row, column))
+        last = self.index(row, len(self.modules))
+        self.dataChanged.emit(last, last)
+
+    def result_at(self, index):
+        return self.cells.get((index.row(), index.column()))
+
+    def ordered_results(self):
+        """The results row by row in matrix order (results arrive in any order)."""
+        for row in range(len(self.machines)):
+            for result in self.row_results(row):
+                yield result
+
+
+class MachinesDialog(QtWidgets.QDialog):
+    """Edits the machines (name and log folder) registered in the configuration."""
+
+    def __init__(self, machines, parent=None):
+        super(MachinesDialog, self).__init__(parent)
+        self.setWindowTitle("Machines")
+        self.resize(600, 400)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.table = QtWidgets.QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels(["Machine", "Log folder"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        for name, directory in machines:
+            self.add_row(name, directory)
+        layout.addWidget(self.table, 1)
+
+        buttons = QtWidgets.QHBoxLayout()
+        add_button = QtWidgets.QPushButton("Add Folders...")
+        add_button.clicked.connect(self.add_folders)
+        remove_button = QtWidgets.QPushButton("Remove")
+        remove_button.clicked.connect(self.remove_selected)
+        buttons.addWidget(add_button)
+        buttons.addWidget(remove_button)
+        buttons.addStretch(1)
+        box = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+        box.accepted.connect(self.accept)
+        box.rejected.connect(self.reject)
+        buttons.addWidget(box)
+        layout.addLayout(buttons)
+
+    def add_row(self, name, directory):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
+        self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(directory))
+
+    def add_folders(self):
+        """Adds a machine for a log folder, or one per subfolder of a folder that holds them all."""
+        directory = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Log Folder")
+        if not directory:
+            return
+        subfolders = sorted(entry.path for entry in os.scandir(directory) if entry.is_dir())
+        if subfolders and QtWidgets.QMessageBox.question(
+                self, "Machines", f"Add each of the {len(subfolders)} subfolders as a machine?") \
+                == QtWidgets.QMessageBox.Yes:
+            for path in subfolders:
+                self.add_row(machine_name(path), path)
+        else:
+            self.add_row(machine_name(directory), directory)
+
+    def remove_selected(self):
+        for row in sorted({index.row() for index in self.table.selectedIndexes()}, reverse=True):
+            self.table.removeRow(row)
+
+    def machines(self):
+        """The edited machines as a name -> folder dict (in table order)."""
+        machines = {}
+        for row in range(self.table.rowCount()):
+            name = (self.table.item(row, 0).text() if self.table.item(row, 0) else "").strip()
+            directory = (self.table.item(row, 1).text() if self.table.item(row, 1) else "").strip()
+            if directory:
+                machines[name or machine_name(directory)] = directory
+        return machines
+
+
+class FleetWindow(QtWidgets.QWidget):
+    """Status matrix of a fleet analysis with Cancel and Export."""
+    fleet_requested = QtCore.pyqtSignal(object, object, object, object)
+
+    def __init__(self, runner, parent=None):
+        super(FleetWindow, self).__init__(parent, QtCore.Qt.Window)
+        self.setWindowTitle("Fleet Analysis")
+        self.resize(900, 500)
+        self.runner = runner
+        self.running = False
+        self.started_at = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.status_label = QtWidgets.QLabel()
+        layout.addWidget(self.status_label)
+
+        self.model = FleetMatrixModel(self)
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.model)
+        self.view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.view.doubleClicked.connect(self.show_details)
+        layout.addWidget(self.view, 1)
+
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addStretch(1)
+        self.cancel_button = QtWidgets.QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel)
+        self.export_button = QtWidgets.QPushButton("Export...")
+        self.export_button.clicked.connect(self.export_results)
+        buttons.addWidget(self.cancel_button)
+        buttons.addWidget(self.export_button)
+        layout.addLayout(buttons)
+
+        self.thread = QtCore.QThread(self)
+        self.worker = FleetWorker(runner)
+        self.worker.moveToThread(self.thread)
+        self.fleet_requested.connect(self.worker.run)
+        self.worker.result_ready.connect(self.on_result)
+        self.worker.finished.connect(self.on_finished)
+        self.thread.start()
+
+    def start(self, machines, modules, start_date, end_date):
+        """Starts analyzing; the matrix fills in as results arrive."""
+        if self.running:
+            return
+        self.model.reset([name for name, _ in machines], modules)
+        self.view.resizeColumnsToContents()
+        self.running = True
+        self.started_at = datetime.datetime.now()
+        self.total = len(machines) * len(modules)
+        self.status_label.setText(f"Analyzing {len(machines)} machines...")
+        self.cancel_button.setEnabled(True)
+        self.fleet_requested.emit(machines, modules, start_date, end_date)
+
+    def on_result(self, result):
+        self.model.add_result(result)
+        self.status_label.setText(f"Analyzing... {len(self.model.store)} of {self.total} results")
+
+    def on_finished(self):
+        self.running = False
+        self.cancel_button.setEnabled(False)
+        elapsed = (datetime.datetime.now() - self.started_at).total_seconds()
+        state = "cancelled" if self.runner.cancelled else "finished"
+        self.status_label.setText(f"Fleet analysis {state} after {elapsed:.1f} s "
+                                  f"({len(self.model.store)} of {self.total} results)")
+        self.view.resizeColumnsToContents()
+
+    def cancel(self):
+        self.runner.cancel()
+        self.cancel_button.setEnabled(False)
+
+    def show_details(self, index):
+        """Shows the full result and findings of a cell."""
+        result = self.model.result_at(index)
+        if result is None:
+            return
+        text = result.message
+        if result.findings:
+            text += "\n\n" + "\n".join(f"{finding.status}: {os.path.basename(finding.path)}: {finding.message}"
+                                       for finding in result.findings)
+        QtWidgets.QMessageBox.information(self, f"{result.machine} - {result.module}", text)
+
+    def export_results(self):
+        """Saves the fleet results as a status matrix (CSV) or a full HTML, CSV or JSON report."""
+        if not len(self.model.store):
+            QtWidgets.QMessageBox.information(self, "Export Results", "There are no results to export.")
+            return
+        filters = {"Status matrix (*.csv)": "matrix", "HTML report (*.html)": "html",
+                   "CSV file (*.csv)": "csv", "JSON file (*.json)": "json"}
+        path, selected = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Results", "fleet.csv", ";;".join(filters))
+        if not path:
+            return
+        fmt = filters.get(selected, "matrix")
+        if fmt not in EXPORT_FORMATS:
+            fmt = "matrix"
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                export(self.model.ordered_results(), f, fmt)
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to export results: {e}")
+
+    def closeEvent(self, event):
+        self.runner.cancel()
+        self.thread.quit()
+        self.thread.wait()
+        super(FleetWindow, self).closeEvent(event)
+
+
+def edit_machines(config, parent=None):
+    """Lets the user edit the registered machines; returns True if they were changed."""
+    dialog = MachinesDialog(configured_machines(config), parent)
+    if dialog.exec_() != QtWidgets.QDialog.Accepted:
+        return False
+    config["machines"] = dialog.machines()
+    return True
@@ -0,0 +1,990 @@
+"""
+Main window of the log analyzer. Importing this module loads PyQt5, so the
+command line mode never imports it.
+"""
+import os
+import datetime
+try:
+    import requests
+except ImportError:
+    requests = None  # requests library is needed for update checking
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from core.matcher import ModuleMatcher
+from core.engine import AnalysisJob
+from core.config import (CONFIG_FILE, load_config, save_config, configure_logging, open_parse_cache,
+                         open_result_cache, open_search_index, create_engine, create_fleet_runner)
+from core.fleet import configured_machines, machine_name
+from core.plugins import PluginRegistry
+from core.results import result_from_job, EXPORT_FORMATS
+from core.versions import LOCAL_VERSION, compare_versions
+from core.updater import (ModuleUpdater, DEFAULT_UPDATE_WORKERS, REQUEST_TIMEOUT, api_url, format_report,
+                          apply_release)
+from gui.file_list import FileListModel, FileListWorker
+from gui.analysis import AnalysisWorker
+from gui.results import ResultsModel, status_icon
+from gui.fleet import FleetWindow, edit_machines
+from gui.search import SearchWindow
+from gui.timeline import TimelineWindow
+
+FILE_LIST_DEBOUNCE_MS = 250  # delay before the file list follows date/module changes
+
+
+class MainWindow(QtWidgets.QMainWindow):
+    # Requests handled by the file list worker thread
+    file_list_requested = QtCore.pyqtSignal(int, str, object, object, object)
+    catalog_refresh_requested = QtCore.pyqtSignal(str)
+    # Request handled by the analysis worker thread: jobs, start date, end date
+    analysis_requested = QtCore.pyqtSignal(object, object, object)
+
+    def __init__(self):
+        super(MainWindow, self).__init__()
+        # Set the window title (with version)
+        self.setWindowTitle("Log Analyzer v." + LOCAL_VERSION)
+        self.resize(1000, 700)
+
+        # Load configuration
+        self.config = self.load_config()
+        configure_logging(self.config)
+
+        # Will store info about analysis modules
+        self.modules_info = []
+        # Reads MODULE_INFO without importing; modules are imported when first run
+        self.plugins = PluginRegistry()
+        # Compiled patterns of the checked modules (rebuilt when modules are loaded or checked)
+        self.matcher = None
+
+        # Per-file summaries and time spans, shared by the file list and the analysis
+        self.parse_cache = open_parse_cache(self.config)
+
+        # Directory scanning and filtering run on a worker thread that owns the file catalog
+        self.file_list_generation = 0
+        # True from a change of the selection until its file list is complete;
+        # the analysis runs on that list, so it cannot start before
+        self.file_list_pending = False
+        self.file_list_thread = QtCore.QThread(self)
+        self.file_list_worker = FileListWorker(self.parse_cache)
+        self.file_list_worker.moveToThread(self.file_list_thread)
+        self.file_list_requested.connect(self.file_list_worker.list_files)
+        self.catalog_refresh_requested.connect(self.file_list_worker.refresh)
+        self.file_list_worker.chunk_ready.connect(self.on_file_list_chunk)
+        self.file_list_worker.finished.connect(self.on_file_list_finished)
+        self.file_list_worker.catalog_changed.connect(self.update_file_list)
+        self.file_list_thread.start()
+
+        # Selected modules run in parallel on a pool driven from the analysis worker thread
+        self.analysis_running = False
+        self.analysis_started_at = None
+        # Unchanged modules with unchanged inputs are answered from earlier runs
+        self.result_cache = open_result_cache(self.config)
+        self.analysis_engine = create_engine(self.config, self.parse_cache, self.result_cache)
+        self.analysis_thread = QtCore.QThread(self)
+        self.analysis_worker = AnalysisWorker(self.analysis_engine)
+        self.analysis_worker.moveToThread(self.analysis_thread)
+        self.analysis_requested.connect(self.analysis_worker.run)
+        self.analysis_worker.module_finished.connect(self.on_module_finished)
+        self.analysis_worker.module_progress.connect(self.on_module_progress)
+        self.analysis_worker.finished.connect(self.on_analysis_finished)
+        self.analysis_thread.start()
+        # Window with the machine x module matrix of the last fleet analysis
+        self.fleet_window = None
+        # Search window and its index (created when first opened)
+        self.search_window = None
+        self.search_index = None
+        self.timeline_window = None
+
+        # Rapid date and checkbox changes are collapsed into a single refresh
+        self.file_list_timer = QtCore.QTimer(self)
+        self.file_list_timer.setSingleShot(True)
+        self.file_list_timer.setInterval(FILE_LIST_DEBOUNCE_MS)
+        self.file_list_timer.timeout.connect(self.request_file_list)
+
+        # The catalog is refreshed when the log folder changes
+        self.dir_watcher = QtCore.QFileSystemWatcher(self)
+        self.dir_watcher.directoryChanged.connect(self.catalog_refresh_requested)
+
+        # Create the main menu
+        self.setup_menu()
+
+        # Create central widget and main layout
+        central_widget = QtWidgets.QWidget()
+        self.setCentralWidget(central_widget)
+        main_vlayout = QtWidgets.QVBoxLayout(central_widget)
+        main_vlayout.setContentsMargins(5, 5, 5, 5)
+        main_vlayout.setSpacing(5)
+
+        # Top-level horizontal layout (left panel + right panel)
+        main_hlayout = QtWidgets.QHBoxLayout()
+        main_hlayout.setSpacing(10)
+        main_vlayout.addLayout(main_hlayout, 1)
+
+        # --- Left Panel: Module tree and buttons ---
+        left_container = QtWidgets.QWidget()
+        left_container.setFixedWidth(300)  # fixed width for modules panel
+        left_layout = QtWidgets.QVBoxLayout(left_container)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+        left_layout.setSpacing(5)
+
+        # Label for modules
+        modules_label = QtWidgets.QLabel("Analysis Modules")
+        modules_label.setStyleSheet("font-size:16px; font-weight:bold;")
+        left_layout.addWidget(modules_label)
+
+        # "Select All" / "Deselect All" buttons
+        btn_layout = QtWidgets.QHBoxLayout()
+        self.btn_select_all = QtWidgets.QPushButton("Select All")
+        self.btn_deselect_all = QtWidgets.QPushButton("Deselect All")
+        # Simple style for these buttons
+        button_style = """
+            QPushButton {
+                background-color: #dddddd;
+                color: #333333;
+                border: 1px solid #cccccc;
+                border-radius: 3px;
+                padding: 4px 8px;
+            }
+            QPushButton:hover {
+                background-color: #cccccc;
+            }
+        """
+        self.btn_select_all.setStyleSheet(button_style)
+        self.btn_deselect_all.setStyleSheet(button_style)
+        # Avoid expanding buttons
+        self.btn_select_all.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        self.btn_deselect_all.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        self.btn_select_all.clicked.connect(self.select_all_modules)
+        self.btn_deselect_all.clicked.connect(self.deselect_all_modules)
+        btn_layout.addWidget(self.btn_select_all)
+        btn_layout.addWidget(self.btn_deselect_all)
+        left_layout.addLayout(btn_layout)
+
+        # Tree widget for modules
+        self.modules_tree = QtWidgets.QTreeWidget()
+        self.modules_tree.setHeaderHidden(True)
+        self.modules_tree.itemChanged.connect(self.on_module_item_changed)
+        left_layout.addWidget(self.modules_tree, 1)
+
+        main_hlayout.addWidget(left_container, 0)
+
+        # --- Right Panel: Date selection, file list, analysis results ---
+        right_container = QtWidgets.QWidget()
+        right_container.setMinimumWidth(600)  # right panel minimum width of 600
+        right_panel = QtWidgets.QVBoxLayout(right_container)
+        right_panel.setContentsMargins(0, 0, 0, 0)
+        right_panel.setSpacing(5)
+
+        # Horizontal layout: left for date selection and right for file list
+        middle_hlayout = QtWidgets.QHBoxLayout()
+        middle_hlayout.setSpacing(10)
+
+        # Group box for date selection (vertical layout: Start Date above End Date)
+        date_group = QtWidgets.QGroupBox("Select Dates")
+        #date_group.setStyleSheet("QGroupBox { font-size: 14px; font-weight: bold; }")
+        date_vbox = QtWidgets.QVBoxLayout()
+        date_vbox.setContentsMargins(2, 2, 2, 2)
+        date_vbox.setSpacing(2)
+        #Add a stretch so that the date widgets are pushed to the bottom 
+        date_vbox.addStretch(1)
+
+        # Start Date block
+        start_label = QtWidgets.QLabel("Start Date:")
+        self.start_date = QtWidgets.QDateEdit(calendarPopup=True)
+        self.start_date.setFixedWidth(90)
+        self.start_date.dateChanged.connect(self.update_file_list)
+        date_vbox.addWidget(start_label)
+        date_vbox.addWidget(self.start_date)
+
+        # End Date block (placed below Start Date)
+        end_label = QtWidgets.QLabel("End Date:")
+        self.end_date = QtWidgets.QDateEdit(calendarPopup=True)
+        self.end_date.setFixedWidth(90)
+        self.end_date.dateChanged.connect(self.update_file_list)
+        date_vbox.addWidget(end_label)
+        date_vbox.addWidget(self.end_date)
+
+        date_group.setLayout(date_vbox)
+        date_group.setFixedWidth(180)
+        middle_hlayout.addWidget(date_group)
+
+        # Table view for files (File Name, First Entry, Last Entry).
+        # Rows live in a virtual model; the proxy sorts without creating per-row items.
+        self.file_model = FileListModel(self)
+        self.file_proxy = QtCore.QSortFilterProxyModel(self)
+        self.file_proxy.setSourceModel(self.file_model)
+        self.file_proxy.setSortRole(QtCore.Qt.UserRole)
+        self.file_list = QtWidgets.QTableView()
+        self.file_list.setModel(self.file_proxy)
+        self.file_list.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        # Set the header section style so that text is left aligned
+        # and add extra right padding to position the sort indicator at the right.
+        #self.file_list.horizontalHeaderItem(0).setTextAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+        #self.file_list.horizontalHeaderItem(1).setTextAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+        self.file_list.horizontalHeader().setStyleSheet("""
+            QHeaderView::section {
+                background-color: #f0f0f0;
+                color: #333333;
+                font-size: 14px;
+                padding-right: 10px;
+                qproperty-alignment: 'AlignVCenter|AlignLeft';
+            }
+            QHeaderView::up-arrow, QHeaderView::down-arrow {
+                subcontrol-position: right center;
+            }
+
+        """)
+            
+            #QHeaderView::section {
+            #    qproperty-alignment: 'AlignVCenter|AlignLeft';
+            #}
+            #QHeaderView::up-arrow, QHeaderView::down-arrow {
+            #    subcontrol-position: right center;
+            #}
+            #QHeaderView::section {
+            #    background-color: #f0f0f0;
+            #    color: #333333;
+            #    padding: 1px;
+            #    margin: 1px;
+            #    font-size: 14px;
+            #    text-align: left;
+            #    padding-right: 20px;
+            
+
+        # Set the default alignment for header text
+        self.file_list.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+
+        self.file_list.verticalHeader().setVisible(False)
+        self.file_list.setShowGrid(False)
+        self.file_list.setFrameShape(QtWidgets.QFrame.Box)
+        self.file_list.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
+        self.file_list.setColumnWidth(0, 200)
+        self.file_list.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.ResizeToContents)
+        self.file_list.setSortingEnabled(True)
+        self.file_list.sortByColumn(1, QtCore.Qt.AscendingOrder)
+        self.file_list.verticalHeader().setMinimumSectionSize(14)
+        # Fixed row height for all rows instead of setting it row by row
+        self.file_list.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.file_list.verticalHeader().setDefaultSectionSize(18)    # row height ###
+        # Disable stretch on the last section to remove extra space
+        self.file_list.horizontalHeader().setStretchLastSection(False)
+
+        middle_hlayout.addWidget(self.file_list, 1)
+
+        right_panel.addLayout(middle_hlayout)
+
+        # "Files for analysis" label placed below the horizontal layout and above Run Analysis
+        self.file_list_label = QtWidgets.QLabel("<b>Files for analysis:</b> " + self.config.get("log_directory", ""))
+        self.file_list_label.setStyleSheet("font-size:14px;")
+        right_panel.addWidget(self.file_list_label)
+        
+        # "Run Analysis" button
+        self.analyze_button = QtWidgets.QPushButton("Run Analysis")
+        self.analyze_button.setFixedHeight(28)
+        self.analyze_button.setStyleSheet("""
+            QPushButton {
+                background-color: #0078d7;
+                color: #ffffff;
+                border: 1px solid #005fa1;
+                border-radius: 4px;
+                font-size: 16px;
+                font-weight:bold;
+                padding: 4px 10px;
+            }
+            QPushButton:hover {
+                background-color: #005fa1;
+            }
+        """)
+        self.analyze_button.clicked.connect(self.on_analyze_button_clicked)
+        right_panel.addWidget(self.analyze_button)
+
+        # Results label with the start/finish time of the analysis next to it
+        result_hlayout = QtWidgets.QHBoxLayout()
+        result_label = QtWidgets.QLabel("Results")
+        result_label.setStyleSheet("font-size:16px; font-weight:bold;")
+        result_hlayout.addWidget(result_label)
+        self.result_status = QtWidgets.QLabel("")
+        result_hlayout.addWidget(self.result_status, 1)
+        right_panel.addLayout(result_hlayout)
+
+        # Tree view for analysis output: one row per module, findings below it
+        self.results_model = ResultsModel(self)
+        self.result_view = QtWidgets.QTreeView()
+        self.result_view.setModel(self.results_model)
+        self.result_view.setUniformRowHeights(True)
+        self.result_view.setColumnWidth(0, 250)
+        self.result_view.setColumnWidth(1, 60)
+        self.result_view.setColumnWidth(2, 220)
+        self.result_view.header().setStretchLastSection(True)
+        right_panel.addWidget(self.result_view, 2)
+
+        main_hlayout.addWidget(right_container, 3)
+
+        # Set default dates
+        today = QtCore.QDate.currentDate()
+        #self.start_date.setDate(today.addDays(-1))
+        self.start_date.setDate(QtCore.QDate(2022, 10, 27))
+        self.end_date.setDate(today)
+
+        # Load modules and populate tree
+        self.load_modules()
+        self.populate_modules_tree()
+        self.update_file_list()
+
+    def closeEvent(self, event):
+        """Stops the worker threads before the window closes."""
+        self.analysis_engine.cancel()
+        if self.fleet_window is not None:
+            self.fleet_window.close()
+        if self.search_window is not None:
+            self.search_window.close()
+        if self.search_index is not None:
+            self.search_index.close()
+        if self.timeline_window is not None:
+            self.timeline_window.close()
+        for thread in (self.file_list_thread, self.analysis_thread):
+            thread.quit()
+            thread.wait()
+        for cache in (self.parse_cache, self.result_cache):
+            if cache is not None:
+                cache.close()
+        super(MainWindow, self).closeEvent(event)
+
+    def setup_menu(self):
+        """Creates a menu bar with settings."""
+        menubar = self.menuBar()
+        file_menu = menubar.addMenu("File")
+
+        # Action: export the results as a report
+        action_export_results = QtWidgets.QAction("Export Results...", self)
+        action_export_results.triggered.connect(self.export_results)
+        file_menu.addAction(action_export_results)
+
+        search_menu = menubar.addMenu("Search")
+
+        # Action: search the listed files for a text or regex
+        action_search_logs = QtWidgets.QAction("Search Logs...", self)
+        action_search_logs.setShortcut(QtGui.QKeySequence.Find)
+        action_search_logs.triggered.connect(self.show_search_window)
+        search_menu.addAction(action_search_logs)
+
+        # Action: show the listed logs merged into one timeline
+        action_timeline = QtWidgets.QAction("Timeline...", self)
+        action_timeline.triggered.connect(self.show_timeline_window)
+        search_menu.addAction(action_timeline)
+
+        fleet_menu = menubar.addMenu("Fleet")
+
+        # Action: register the log folders of several machines
+        action_manage_machines = QtWidgets.QAction("Manage Machines...", self)
+        action_manage_machines.triggered.connect(self.manage_machines)
+        fleet_menu.addAction(action_manage_machines)
+
+        # Action: run the checked modules on all machines
+        action_run_fleet = QtWidgets.QAction("Run Fleet Analysis", self)
+        action_run_fleet.triggered.connect(self.run_fleet_analysis)
+        fleet_menu.addAction(action_run_fleet)
+
+        settings_menu = menubar.addMenu("Settings")
+
+        # Action: select log folder
+        action_set_log_path = QtWidgets.QAction("Select Log Folder", self)
+        action_set_log_path.triggered.connect(self.choose_log_directory)
+        settings_menu.addAction(action_set_log_path)
+
+        # Performance metrics: per-file numbers, peak memory and profiling of one module
+        metrics_menu = settings_menu.addMenu("Performance Metrics")
+        action_file_metrics = QtWidgets.QAction("Record Metrics per File", self, checkable=True)
+        action_file_metrics.setChecked(bool(self.config.get("metrics_per_file", False)))
+        action_file_metrics.toggled.connect(lambda checked: self.set_metrics_option("metrics_per_file", checked))
+        metrics_menu.addAction(action_file_metrics)
+        action_memory_metrics = QtWidgets.QAction("Record Peak Memory (slower)", self, checkable=True)
+        action_memory_metrics.setChecked(bool(self.config.get("metrics_memory", False)))
+        action_memory_metrics.toggled.connect(lambda checked: self.set_metrics_option("metrics_memory", checked))
+        metrics_menu.addAction(action_memory_metrics)
+        action_profile_module = QtWidgets.QAction("Profile Module...", self)
+        action_profile_module.triggered.connect(self.choose_profile_module)
+        metrics_menu.addAction(action_profile_module)
+
+        # Action: check module updates
+        action_check_module_updates = QtWidgets.QAction("Check Module Updates", self)
+        action_check_module_updates.triggered.connect(self.check_module_updates)
+        settings_menu.addAction(action_check_module_updates)
+
+        # Action: update modules
+        action_update_modules = QtWidgets.QAction("Update Modules", self)
+        action_update_modules.triggered.connect(self.update_modules)
+        settings_menu.addAction(action_update_modules)
+
+        # Action: update program
+        action_update_program = QtWidgets.QAction("Update Program", self)
+        action_update_program.triggered.connect(self.update_program)
+        settings_menu.addAction(action_update_program)
+
+    def load_config(self):
+        """Loads configuration from config.json if exists."""
+        return load_config()
+
+    def save_config(self):
+        """Saves current configuration to config.json."""
+        save_config(self.config)
+
+    def choose_log_directory(self):
+        """Lets the user choose a folder for log files."""
+        directory = QtWidgets.QFileDialog.getExistingDirectory(
+            self, "Select Log Folder", self.config.get("log_directory", "logs"))
+        if directory:
+            self.config["log_directory"] = directory
+            self.save_config()
+            self.update_file_list()
+
+    def watch_log_directory(self, directory):
+        """Makes sure that only the given log directory is watched for changes."""
+        watched = self.dir_watcher.directories()
+        if watched == [directory]:
+            return
+        if watched:
+            self.dir_watcher.removePaths(watched)
+        self.dir_watcher.addPath(directory)
+
+    def load_modules(self):
+        """Dynamically loads analysis modules from the 'modules' folder."""
+        self.modules_info.extend(self.plugins.scan())
+
+    def populate_modules_tree(self):
+        """Creates a tree structure for modules, grouped if necessary."""
+        self.modules_tree.blockSignals(True)
+        self.modules_tree.clear()
+
+        # Each group will have a top-level item
+        groups = {}
+        for info in self.modules_info:
+            group_name = info.get("group", "Ungrouped")
+            if group_name not in groups:
+                group_item = QtWidgets.QTreeWidgetItem(self.modules_tree)
+                group_item.setText(0, group_name)
+                # Enable tristate so that checking/unchecking group affects children
+                group_item.setFlags(group_item.flags() | QtCore.Qt.ItemIsTristate | QtCore.Qt.ItemIsUserCheckable)
+                groups[group_name] = group_item
+
+            mod_item = QtWidgets.QTreeWidgetItem(groups[group_name])
+            mod_item.setText(0, info.get("name", "Unknown Module"))
+            mod_item.setFlags(mod_item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            mod_item.setCheckState(0, QtCore.Qt.Checked)
+            # Set default icon (empty circle before analysis)
+            mod_item.setIcon(0, self.get_default_icon())
+            info["tree_item"] = mod_item
+            mod_item.setData(0, QtCore.Qt.UserRole, info)
+
+        self.modules_tree.blockSignals(False)
+        self.modules_tree.expandAll()
+        self.rebuild_matcher(force=True)
+
+    def get_selected_modules(self):
+        """Returns the info dicts of the checked modules in tree order."""
+        selected_modules = []
+        root = self.modules_tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            group_item = root.child(i)
+            for j in range(group_item.childCount()):
+                mod_item = group_item.child(j)
+                if mod_item.checkState(0) == QtCore.Qt.Checked:
+                    info = mod_item.data(0, QtCore.Qt.UserRole)
+                    if info:
+                        selected_modules.append(info)
+        return selected_modules
+
+    def rebuild_matcher(self, force=False):
+        """
+        Compiles the patterns of the checked modules into a single matcher.
+        Returns True if the selection changed (or force is set).
+        """
+        matcher = ModuleMatcher(self.get_selected_modules())
+        if not force and self.matcher is not None and matcher.key == self.matcher.key:
+            return False
+        self.matcher = matcher
+        return True
+
+    def on_module_item_changed(self, item, column):
+        """Recompiles the matcher when a module is checked or unchecked (icon changes are ignored)."""
+        if self.rebuild_matcher():
+            self.update_file_list()
+
+    def select_all_modules(self):
+        """Checks all modules in the tree."""
+        root = self.modules_tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            group_item = root.child(i)
+            for j in range(group_item.childCount()):
+                child = group_item.child(j)
+                child.setCheckState(0, QtCore.Qt.Checked)
+
+    def deselect_all_modules(self):
+        """Unchecks all modules in the tree."""
+        root = self.modules_tree.invisibleRootItem()
+        for i in range(root.childCount()):
+            group_item = root.child(i)
+            for j in range(group_item.childCount()):
+                child = group_item.child(j)
+                child.setCheckState(0, QtCore.Qt.Unchecked)
+
+    def update_file_list(self):
+        """
+        Schedules a refresh of the file list.
+        Rapid date and checkbox changes restart the timer, so only the last one is processed.
+        """
+        self.file_list_pending = True
+        self.update_analyze_button()
+        self.file_list_timer.start()
+
+    def request_file_list(self):
+        """Asks the worker thread for the files matching the selected modules and date range."""
+        directory = self.config.get("log_directory", "logs")
+        # Results of any earlier request are ignored from now on
+        self.file_list_generation += 1
+        self.file_list_worker.latest_generation = self.file_list_generation
+        self.file_model.clear()
+        self.file_list_pending = True
+        self.update_analyze_button()
+        if not os.path.isdir(directory):
+            self.set_file_list_complete()
+            return
+
+        # Update the "Files for analysis" label with the current log directory
+        if hasattr(self, "file_list_label"):
+            self.file_list_label.setText("<b>Files for analysis:</b> " + directory)
+        self.watch_log_directory(directory)
+
+        # Get selected date range
+        start_date = self.start_date.date().toPyDate()
+        end_date = self.end_date.date().toPyDate()
+
+        # The matcher holds the compiled patterns of the checked modules
+        if not self.matcher:
+            self.set_file_list_complete()
+            return
+
+        self.file_list_requested.emit(self.file_list_generation, directory, start_date, end_date, self.matcher)
+
+    def on_file_list_chunk(self, generation, entries, spans):
+        """Appends a chunk of matching files and their spans coming from the worker thread."""
+        if generation == self.file_list_generation:
+            self.file_model.append_entries(entries, spans)
+
+    def on_file_list_finished(self, generation, count):
+        """Called by the worker thread once all matching files have been sent."""
+        if generation == self.file_list_generation:
+            directory = self.config.get("log_directory", "logs")
+            self.file_list_label.setText(f"<b>Files for analysis:</b> {directory} ({count} files)")
+            self.set_file_list_complete()
+
+    def set_file_list_complete(self):
+        """The file list matches the current selection; the analysis may use it."""
+        self.file_list_pending = False
+        self.update_analyze_button()
+
+    def get_default_icon(self):
+        """Returns an icon with an empty circle (before analysis)."""
+        return status_icon(None)
+
+    def get_status_icon(self, status):
+        """Returns the (cached) icon for the given status."""
+        return status_icon(status)
+
+    def run_analysis(self):
+        """Runs the analysis using selected modules and displays results."""
+        # Get date range
+        start_date = self.start_date.date().toPyDate()
+        end_date = self.end_date.date().toPyDate()
+
+        # The file list is still being built for the current selection
+        if self.file_list_pending:
+            return
+
+        # Collect file paths from the file list model (modules may need to open them)
+        files = [entry.path for entry in self.file_model.entries]
+
+        # Clear previous results
+        self.results_model.clear()
+        now_str = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.result_status.setText(f"Analysis started at: {now_str}")
+        
+        # Which modules are checked? The matcher always follows the checked modules.
+        self.rebuild_matcher()
+        selected_modules = self.matcher.modules
+
+        if not selected_modules:
+            QtWidgets.QMessageBox.warning(self, "Warning", "Select at least one analysis module.")
+            return
+
+        # Import modules on first use; reload only those whose source changed
+        self.plugins.load(selected_modules)
+
+        # One pass over the files tells which module wants which file
+        files_per_module = self.matcher.dispatch(files)
+
+        # Run the selected modules in parallel on the analysis worker thread;
+        # results come back one by one through on_module_finished
+        jobs = [AnalysisJob(info, module_files) for info, module_files in zip(selected_modules, files_per_module)]
+        self.analysis_started_at = datetime.datetime.now()
+        # Cleared here, not on the worker thread, so a cancel right after the start is kept
+        self.analysis_engine.reset()
+        self.set_analysis_running(True)
+        self.analysis_requested.emit(jobs, start_date, end_date)
+
+    def on_analyze_button_clicked(self):
+        """The Run Analysis button doubles as a Cancel button while an analysis is running."""
+        if self.analysis_running:
+            self.analysis_engine.cancel()
+            self.analyze_button.setEnabled(False)
+        else:
+            self.run_analysis()
+
+    def set_analysis_running(self, running):
+        """Switches the Run Analysis button between its run and cancel states."""
+        self.analysis_running = running
+        self.update_analyze_button()
+
+    def update_analyze_button(self):
+        """
+        Cancel Analysis while an analysis runs; Run Analysis otherwise, enabled
+        only once the file list of the current selection is complete.
+        """
+        if self.analysis_running:
+            self.analyze_button.setEnabled(True)
+            self.analyze_button.setText("Cancel Analysis")
+        else:
+            self.analyze_button.setEnabled(not self.file_list_pending)
+            self.analyze_button.setText("Run Analysis" if not self.file_list_pending else "Listing files...")
+
+    def on_analysis_finished(self):
+        """Called by the analysis worker thread when every module has been reported."""
+        elapsed = (datetime.datetime.now() - self.analysis_started_at).total_seconds()
+        if self.analysis_engine.cancelled:
+            self.result_status.setText(f"Analysis cancelled after {elapsed:.1f} s")
+        else:
+            self.result_status.setText(f"Analysis finished in {elapsed:.1f} s")
+        self.set_analysis_running(False)
+
+    def on_module_finished(self, job, result, status):
+        """Shows the result of one module as soon as it is available."""
+        info = job.info
+
+        # Update icon in the tree
+        tree_item = info.get("tree_item")
+        if tree_item:
+            tree_item.setIcon(0, self.get_status_icon(status))
+
+        # Add a row to the results view (the icon is cached, nothing is rendered here)
+        directory = self.config.get("log_directory", "logs")
+        self.results_model.add_result(result_from_job(job, result, status, directory, machine_name(directory)))
+
+    def on_module_progress(self, job, progress):
+        """Shows the progress a running module reports."""
+        if not self.analysis_running:
+            return
+        text = job.name
+        if progress.fraction is not None:
+            text += f": {progress.fraction:.0%}"
+        if progress.text:
+            text += f" - {progress.text}"
+        self.result_status.setText(text)
+
+    def set_metrics_option(self, key, enabled):
+        """Turns per-file metrics or peak memory recording on or off (from the next analysis)."""
+        self.config[key] = enabled
+        self.save_config()
+        self.analysis_engine.file_metrics = bool(self.config.get("metrics_per_file", False))
+        self.analysis_engine.memory_metrics = bool(self.config.get("metrics_memory", False))
+
+    def choose_profile_module(self):
+        """Selects a module to run under cProfile; its profiles are written to the profiles folder."""
+        names = ["(none)"] + [info["id"] for info in self.modules_info]
+        current = self.config.get("profile_module") or "(none)"
+        name, ok = QtWidgets.QInputDialog.getItem(
+            self, "Profile Module", "Run this module under cProfile:", names,
+            names.index(current) if current in names else 0, False)
+        if not ok:
+            return
+        self.config["profile_module"] = None if name == "(none)" else name
+        self.save_config()
+        self.analysis_engine.profile = self.config["profile_module"]
+
+    def search_scope(self):
+        """Files of the file list and the selected date range, used by the search and timeline windows."""
+        return ([entry.path for entry in self.file_model.entries],
+                self.start_date.date().toPyDate(), self.end_date.date().toPyDate())
+
+    def show_search_window(self):
+        """Opens the search window for the files of the file list."""
+        if self.search_window is None:
+            self.search_index = open_search_index(self.config)
+            self.search_window = SearchWindow(self.search_index, self.search_scope)
+        self.search_window.show()
+        self.search_window.raise_()
+        self.search_window.activateWindow()
+
+    def show_timeline_window(self):
+        """Opens the merged timeline of the files of the file list."""
+        if self.timeline_window is None:
+            self.timeline_window = TimelineWindow(self.search_scope)
+        self.timeline_window.reload()
+        self.timeline_window.show()
+        self.timeline_window.raise_()
+        self.timeline_window.activateWindow()
+
+    def manage_machines(self):
+        """Edits the machines (log folders) used by the fleet analysis."""
+        if edit_machines(self.config, self):
+            self.save_config()
+
+    def run_fleet_analysis(self):
+        """Runs the checked modules over every registered machine and shows the status matrix."""
+        machines = configured_machines(self.config)
+        if not machines:
+            QtWidgets.QMessageBox.information(
+                self, "Fleet Analysis", "Register the log folders of your machines with Fleet > Manage Machines.")
+            return
+        self.rebuild_matcher()
+        selected_modules = self.matcher.modules
+        if not selected_modules:
+            QtWidgets.QMessageBox.warning(self, "Warning", "Select at least one analysis module.")
+            return
+        if self.fleet_window is not None and self.fleet_window.running:
+            self.fleet_window.show()
+            self.fleet_window.raise_()
+            return
+        self.plugins.load(selected_modules)
+
+        if self.fleet_window is None:
+            runner = create_fleet_runner(self.config, self.parse_cache, self.result_cache)
+            self.fleet_window = FleetWindow(runner, self)
+        self.fleet_window.show()
+        self.fleet_window.raise_()
+        self.fleet_window.start(machines, selected_modules,
+                                self.start_date.date().toPyDate(), self.end_date.date().toPyDate())
+
+    def export_results(self):
+        """Saves the results of the last analysis as an HTML, CSV or JSON report."""
+        if not len(self.results_model.store):
+            QtWidgets.QMessageBox.information(self, "Export Results", "There are no results to export.")
+            return
+        filters = {"HTML report (*.html)": "html", "CSV file (*.csv)": "csv", "JSON file (*.json)": "json"}
+        path, selected = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Results", "results.html", ";;".join(filters))
+        if not path:
+            return
+        fmt = os.path.splitext(path)[1].lower().lstrip(".")
+        if fmt not in EXPORT_FORMATS:
+            fmt = filters.get(selected, "html")
+            path += "." + fmt
+        try:
+            self.results_model.store.export(path, fmt)
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to export results: {e}")
+
+    def check_module_updates(self):
+        """
+        Checks for module updates.
+        Instead of simply showing the last commit date, this function:
+          - Converts the commit time from UTC to local time.
+          - Determines the last modification time of local module files.
+          - Displays comparative information to show how up-to-date the local modules are relative to GitHub updates.
+        """
+        if not requests:
+            QtWidgets.QMessageBox.warning(self, "Error", "The requests library is not installed.")
+            return
+
+        url = f"{api_url(self.config)}/commits?path=modules"
+        try:
+            response = requests.get(url)
+            if response.status_code == 200:
+                commits = response.json()
+                if commits:
+                    latest_commit_date = commits[0]["commit"]["committer"]["date"]
+                    remote_dt = datetime.datetime.strptime(latest_commit_date, "%Y-%m-%dT%H:%M:%SZ")
+                    remote_dt = remote_dt.replace(tzinfo=datetime.timezone.utc).astimezone(tz=None)
+                    remote_str = remote_dt.strftime('%Y-%m-%d %H:%M')
+                else:
+                    remote_str = "No commit data found."
+            else:
+                QtWidgets.QMessageBox.warning(self, "Error", f"GitHub API error: {response.status_code}")
+                return
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to check updates: {e}")
+            return
+
+        # Compare to local modules' modification time
+        local_modules_dir = os.path.join(os.getcwd(), "modules")
+        if os.path.isdir(local_modules_dir):
+            local_mtimes = []
+            for root_dir, dirs, files in os.walk(local_modules_dir):
+                for file in files:
+                    if file.endswith(".py"):
+                        full_path = os.path.join(root_dir, file)
+                        local_mtimes.append(os.path.getmtime(full_path))
+            if local_mtimes:
+                latest_local_mtime = max(local_mtimes)
+                local_dt = datetime.datetime.fromtimestamp(latest_local_mtime)
+                local_str = local_dt.strftime('%Y-%m-%d %H:%M')
+            else:
+                local_str = "No modification info"
+        else:
+            local_str = "Modules folder not found"
+
+        msg = (
+            f"GitHub modules update: {remote_str}\n"
+            f"Your local modules version: {local_str}\n\n"
+        )
+        try:
+            if local_str not in ["No modification info", "Modules folder not found"]:
+                local_dt = datetime.datetime.strptime(local_str, '%Y-%m-%d %H:%M')
+                if remote_dt > local_dt:
+                    msg += "Module updates are available!"
+                else:
+                    msg += "Your modules are up-to-date."
+        except Exception:
+            pass
+
+        QtWidgets.QMessageBox.information(self, "Module Updates", msg)
+
+    def update_modules(self):
+        """
+        Updates modules from the modules folder of the GitHub repository (API /contents).
+        Unchanged modules (same git blob SHA, or a 304 answer to a conditional request) are
+        not downloaded; the others are fetched in parallel. A remote module replaces the
+        local file only if its version is newer; a newer local version is kept as a
+        development version. The summary is shown and appended to update_modules.log.
+        """
+        if not requests:
+            QtWidgets.QMessageBox.warning(self, "Error", "The requests library is not installed.")
+            return
+
+        print("=== Starting module update via API /contents ===")
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            updater = ModuleUpdater(api_url(self.config), os.path.join(os.getcwd(), "modules"),
+                                    workers=self.config.get("update_workers", DEFAULT_UPDATE_WORKERS))
+            report = updater.update()
+        except Exception as e:
+            QtWidgets.QApplication.restoreOverrideCursor()
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to update modules: {e}")
+            return
+        QtWidgets.QApplication.restoreOverrideCursor()
+
+        summary = format_report(report)
+        print("=== Module update summary ===")
+        print(summary)
+
+        log_filename = "update_modules.log"
+        try:
+            with open(log_filename, "a", encoding="utf-8") as log_file:
+                log_file.write(f"{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                log_file.write(summary + "\n")
+                log_file.write("=" * 40 + "\n")
+            print(f"Update result saved in {log_filename}")
+        except Exception as e:
+            print(f"Error saving log: {e}")
+
+        QtWidgets.QMessageBox.information(self, "Module Updates", summary)
+        self.modules_info = []   # reset modules list
+        self.load_modules()
+        self.populate_modules_tree()
+        self.update_file_list()
+
+    def update_program(self):
+        """
+        Updates the program.
+        Checks for a new version by comparing LOCAL_VERSION with the release version from GitHub.
+        If the local version is newer, it indicates a development version.
+        If the GitHub version is newer, it offers to update.
+        """
+        if not requests:
+            QtWidgets.QMessageBox.warning(self, "Error", "The requests library is not installed.")
+            return
+
+        url = f"{api_url(self.config)}/releases/latest"
+        try:
+            response = requests.get(url, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                release = response.json()
+                latest_version = release.get("tag_name", "0.0")
+                cmp_result = compare_versions(LOCAL_VERSION, latest_version)
+                if cmp_result == 0:
+                    QtWidgets.QMessageBox.information(self, "Program Update", "You are using the latest version.")
+                    return
+                elif cmp_result > 0:
+                    QtWidgets.QMessageBox.information(self, "Program Update", "You are using a development version. No update required.")
+                    return
+                else:
+                    reply = QtWidgets.QMessageBox.question(
+                        self,
+                        "Program Update",
+                        f"A new version is available: {latest_version}. Update program?",
+                        QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
+                    )
+                    if reply == QtWidgets.QMessageBox.Yes:
+                        self.perform_update(release)
+            else:
+                QtWidgets.QMessageBox.warning(self, "Error", f"GitHub API returned error: {response.status_code}")
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to check updates: {e}")
+
+    def perform_update(self, release):
+        """
+        Updates the program from the release tarball. The tarball is unpacked while
+        it downloads; only files that differ from the installed ones are written,
+        and they are swapped in together (rolled back on failure). config.json is
+        never touched.
+        """
+        tarball_url = release.get("tarball_url")
+        if not tarball_url:
+            QtWidgets.QMessageBox.warning(self, "Error", "Failed to get update URL.")
+            return
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        try:
+            with requests.get(tarball_url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                if response.status_code != 200:
+                    QtWidgets.QApplication.restoreOverrideCursor()
+                    QtWidgets.QMessageBox.warning(self, "Error", f"Error downloading update: {response.status_code}")
+                    return
+                # Undo any HTTP content encoding; the tarball itself is gunzipped by tarfile
+                response.raw.decode_content = True
+                update = apply_release(response.raw, os.getcwd(), protected=(CONFIG_FILE,))
+        except Exception as e:
+            QtWidgets.QApplication.restoreOverrideCursor()
+            QtWidgets.QMessageBox.warning(self, "Error", f"Failed to perform update: {e}")
+            return
+        QtWidgets.QApplication.restoreOverrideCursor()
+
+        print(f"Program update: {len(update.written)} files written ({update.bytes_written} bytes), "
+              f"{update.unchanged} unchanged")
+        QtWidgets.QMessageBox.information(
+            self, "Program Update",
+            f"Program successfully updated ({len(update.written)} files changed). Please restart the application.")
+
+def run(argv):
+    """Shows the main window and runs the Qt event loop; returns the exit code."""
+    app = QtWidgets.QApplication(argv)
+    # Minimal stylesheet for a cleaner look
+    app.setStyleSheet("""
+        QMainWindow { background-color: #f7f7f7; }
+        QPushButton {
+            font-family: 'Segoe UI', sans-serif;
+        }
+        QLabel { font-family: 'Segoe UI', sans-serif; color: #333333; }
+        QTreeWidget, QTableView, QTextEdit {
+            background-color: white;
+            border: 1px solid #e0e0e0;
+            font-family: 'Segoe UI', sans-serif;
+            font-size: 13px;
+        }
+        QDateEdit {
+            background-color: white;
+            border: 1px solid #e0e0e0;
+            font-family: 'Segoe UI', sans-serif;
+            font-size: 13px;
+        }
+    """)
+    window = MainWindow()
+    window.show()
+    return app.exec_()
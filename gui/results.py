@@ -0,0 +1,156 @@
+"""
+Results pane of the main window: status icons that are painted once and a
+virtual tree model over the ResultStore (one row per module, its per-file
+findings as child rows). The view only asks for the rows it shows, so
+thousands of findings cost no rendering time until they are scrolled to.
+"""
+from PyQt5 import QtCore, QtGui
+
+from core.archives import display_name
+from core.results import ResultStore
+from core.metrics import format_metrics, format_file_metrics
+
+# status -> QIcon; None is the empty circle shown before an analysis
+_icons = {}
+
+
+def _paint_icon(status):
+    """
+    Paints the icon for a status:
+      - None -> empty circle (before analysis)
+      - "Green" -> green circle with check
+      - "Red" -> red circle with cross
+      - "Yellow" -> yellow circle with exclamation
+    """
+    pixmap = QtGui.QPixmap(16, 16)
+    pixmap.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(pixmap)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+
+    if status is None:
+        painter.setBrush(QtCore.Qt.NoBrush)
+    elif status == "Green":
+        painter.setBrush(QtGui.QBrush(QtGui.QColor("green")))
+    elif status == "Red":
+        painter.setBrush(QtGui.QBrush(QtGui.QColor("red")))
+    elif status == "Yellow":
+        painter.setBrush(QtGui.QBrush(QtGui.QColor("yellow")))
+    else:
+        painter.setBrush(QtGui.QBrush(QtGui.QColor("white")))
+    painter.setPen(QtGui.QPen(QtGui.QColor("black"), 2))
+    painter.drawEllipse(1, 1, 14, 14)
+
+    # Draw symbol inside
+    if status == "Green":
+        painter.setPen(QtGui.QPen(QtGui.QColor("white"), 2))
+        painter.drawLine(4, 9, 7, 12)
+        painter.drawLine(7, 12, 12, 5)
+    elif status == "Red":
+        painter.drawLine(4, 4, 12, 12)
+        painter.drawLine(12, 4, 4, 12)
+    elif status == "Yellow":
+        painter.drawLine(8, 4, 8, 10)
+        painter.drawPoint(8, 12)
+
+    painter.end()
+    return QtGui.QIcon(pixmap)
+
+
+def status_icon(status):
+    """Returns the icon for a status; every icon is painted only once."""
+    icon = _icons.get(status)
+    if icon is None:
+        icon = _icons[status] = _paint_icon(status)
+    return icon
+
+
+class ResultsModel(QtCore.QAbstractItemModel):
+    """
+    Two-level tree over a ResultStore. Top-level rows have internal id 0;
+    a finding row stores the row of its module plus one.
+    """
+    HEADERS = ["Module", "Status", "Performance", "Result"]
+
+    def __init__(self, parent=None):
+        super(ResultsModel, self).__init__(parent)
+        self.store = ResultStore()
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        return self.createIndex(row, column, parent.row() + 1)
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QtCore.QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if not parent.isValid():
+            return len(self.store)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return len(self.store[parent.row()].findings)
+        return 0
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if index.internalId() == 0:
+            result = self.store[index.row()]
+            if role == QtCore.Qt.DisplayRole:
+                if column == 0:
+                    return result.module
+                if column == 1:
+                    return result.status
+                if column == 2:
+                    return format_metrics(result.metrics)
+                return result.message + (" (cached)" if result.cached else "")
+            if role == QtCore.Qt.DecorationRole and column == 0:
+                return status_icon(result.status)
+            if role == QtCore.Qt.ToolTipRole:
+                if column == 2 and result.metrics:
+                    slowest = format_file_metrics(result.metrics)
+                    return format_metrics(result.metrics) + ("\n\nSlowest files:\n" + slowest if slowest else "")
+                return result.message
+            if role == QtCore.Qt.ForegroundRole and result.cached:
+                return QtGui.QBrush(QtGui.QColor("#888888"))
+            return None
+
+        finding = self.store[index.internalId() - 1].findings[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return display_name(finding.path)
+            if column == 1:
+                return finding.status
+            if column == 2:
+                return None
+            return finding.message
+        if role == QtCore.Qt.DecorationRole and column == 0:
+            return status_icon(finding.status)
+        if role == QtCore.Qt.ToolTipRole:
+            return finding.path
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def add_result(self, result):
+        """Appends one module result (with its findings) as a single row insert."""
+        row = len(self.store)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.store.add(result)
+        self.endInsertRows()
+
+    def clear(self):
+        """Removes all results."""
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
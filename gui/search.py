@@ -0,0 +1,256 @@
+"""
+Search window: full-text or regex search over the files of the main
+window's file list. Hits stream in while the files are searched; selecting
+one shows the log around that line.
+"""
+import re
+import time
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from core.archives import display_name
+from core.parsers import window_keys
+from core.search import search, read_context
+
+
+class SearchWorker(QtCore.QObject):
+    """Runs searches on a worker thread; a newer request stops the running one."""
+    hits_found = QtCore.pyqtSignal(int, object)      # generation, list of SearchHit
+    progress = QtCore.pyqtSignal(int, str)           # generation, status text
+    finished = QtCore.pyqtSignal(int, object, float)  # generation, SearchStats or error text, seconds
+
+    def __init__(self, index=None):
+        super(SearchWorker, self).__init__()
+        self.index = index
+        # Set from the GUI thread; requests with an older generation stop early
+        self.latest_generation = 0
+
+    @QtCore.pyqtSlot(int, object, str, bool, bool, object)
+    def run(self, generation, files, query, regex, case_sensitive, window):
+        if generation != self.latest_generation:
+            return
+        started = time.perf_counter()
+
+        def cancelled():
+            return generation != self.latest_generation
+
+        def indexing(done, total):
+            self.progress.emit(generation, f"Indexing {done} of {total} files...")
+
+        try:
+            outcome = search(files, query, regex, case_sensitive, window, self.index,
+                             callback=lambda hits: self.hits_found.emit(generation, hits),
+                             progress=indexing, cancelled=cancelled)
+        except re.error as e:
+            outcome = f"Invalid regular expression: {e}"
+        except Exception as e:
+            outcome = f"Search failed: {e}"
+        self.finished.emit(generation, outcome, time.perf_counter() - started)
+
+
+class SearchResultsModel(QtCore.QAbstractTableModel):
+    """Virtual table of search hits."""
+    HEADERS = ["Time", "File", "Line", "Text"]
+
+    def __init__(self, parent=None):
+        super(SearchResultsModel, self).__init__(parent)
+        self.hits = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.hits)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        hit = self.hits[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            return (hit.timestamp, display_name(hit.path), hit.line, hit.text)[column]
+        if role == QtCore.Qt.UserRole:
+            # Sort keys are strings so that the proxy can compare them; ties go by file and line
+            location = f"{display_name(hit.path)}\0{hit.line:012d}"
+            return (f"{hit.timestamp}\0{location}", location, hit.line, hit.text)[column]
+        if role == QtCore.Qt.ToolTipRole and column == 1:
+            return hit.path
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.hits = []
+        self.endResetModel()
+
+    def append_hits(self, hits):
+        if not hits:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), len(self.hits), len(self.hits) + len(hits) - 1)
+        self.hits.extend(hits)
+        self.endInsertRows()
+
+
+class SearchWindow(QtWidgets.QWidget):
+    """
+    Search panel. get_scope() returns (files, start_date, end_date): the files
+    of the main window's file list and its date range.
+    """
+    search_requested = QtCore.pyqtSignal(int, object, str, bool, bool, object)
+
+    def __init__(self, index, get_scope, parent=None):
+        super(SearchWindow, self).__init__(parent, QtCore.Qt.Window)
+        self.setWindowTitle("Search Logs")
+        self.resize(1000, 650)
+        self.get_scope = get_scope
+        self.generation = 0
+        self.running = False
+
+        layout = QtWidgets.QVBoxLayout(self)
+        query_layout = QtWidgets.QHBoxLayout()
+        self.query_edit = QtWidgets.QLineEdit()
+        self.query_edit.setPlaceholderText("Text or regular expression")
+        self.query_edit.returnPressed.connect(self.start_search)
+        self.regex_box = QtWidgets.QCheckBox("Regex")
+        self.case_box = QtWidgets.QCheckBox("Match case")
+        self.search_button = QtWidgets.QPushButton("Search")
+        self.search_button.clicked.connect(self.on_search_button_clicked)
+        query_layout.addWidget(self.query_edit, 1)
+        query_layout.addWidget(self.regex_box)
+        query_layout.addWidget(self.case_box)
+        query_layout.addWidget(self.search_button)
+        layout.addLayout(query_layout)
+
+        self.status_label = QtWidgets.QLabel("Searches the files of the file list in the selected date range.")
+        layout.addWidget(self.status_label)
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        self.model = SearchResultsModel(self)
+        self.proxy = QtCore.QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(QtCore.Qt.UserRole)
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.proxy)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.view.verticalHeader().setVisible(False)
+        self.view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(18)
+        self.view.setColumnWidth(0, 170)
+        self.view.setColumnWidth(1, 180)
+        self.view.setColumnWidth(2, 60)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.setSortingEnabled(True)
+        self.view.sortByColumn(0, QtCore.Qt.AscendingOrder)
+        self.view.selectionModel().currentRowChanged.connect(self.show_hit)
+        splitter.addWidget(self.view)
+
+        # Log text around the selected hit
+        viewer_container = QtWidgets.QWidget()
+        viewer_layout = QtWidgets.QVBoxLayout(viewer_container)
+        viewer_layout.setContentsMargins(0, 0, 0, 0)
+        self.location_label = QtWidgets.QLabel()
+        viewer_layout.addWidget(self.location_label)
+        self.viewer = QtWidgets.QPlainTextEdit()
+        self.viewer.setReadOnly(True)
+        self.viewer.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.viewer.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        viewer_layout.addWidget(self.viewer, 1)
+        splitter.addWidget(viewer_container)
+        splitter.setSizes([400, 250])
+        layout.addWidget(splitter, 1)
+
+        self.thread = QtCore.QThread(self)
+        self.worker = SearchWorker(index)
+        self.worker.moveToThread(self.thread)
+        self.search_requested.connect(self.worker.run)
+        self.worker.hits_found.connect(self.on_hits)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.finished.connect(self.on_finished)
+        self.thread.start()
+
+    def on_search_button_clicked(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start_search()
+
+    def start_search(self):
+        """Searches the current file list for the query; hits stream into the table."""
+        query = self.query_edit.text()
+        if not query:
+            return
+        files, start_date, end_date = self.get_scope()
+        self.generation += 1
+        self.worker.latest_generation = self.generation
+        self.model.clear()
+        self.viewer.clear()
+        self.location_label.clear()
+        if not files:
+            self.status_label.setText("No files to search: check the modules and dates in the main window.")
+            return
+        self.running = True
+        self.search_button.setText("Stop")
+        self.status_label.setText(f"Searching {len(files)} files...")
+        self.search_requested.emit(self.generation, files, query, self.regex_box.isChecked(),
+                                   self.case_box.isChecked(), window_keys(start_date, end_date))
+
+    def stop(self):
+        # The worker stops at the next file once the generation moved on
+        self.generation += 1
+        self.worker.latest_generation = self.generation
+        self.set_idle("Search stopped.")
+
+    def set_idle(self, text):
+        self.running = False
+        self.search_button.setText("Search")
+        self.status_label.setText(text)
+
+    def on_hits(self, generation, hits):
+        if generation == self.generation:
+            self.model.append_hits(hits)
+
+    def on_progress(self, generation, text):
+        if generation == self.generation:
+            self.status_label.setText(text)
+
+    def on_finished(self, generation, outcome, seconds):
+        if generation != self.generation:
+            return
+        if isinstance(outcome, str):
+            self.set_idle(outcome)
+            return
+        text = f"{outcome.hits} hits in {outcome.files} files ({seconds:.2f} s"
+        text += ", indexed)" if outcome.indexed else ")"
+        if outcome.truncated:
+            text += f" - stopped after {outcome.hits} hits, refine the query to see all"
+        self.set_idle(text)
+
+    def show_hit(self, current, previous=None):
+        """Shows the log around the selected hit, with its line selected and centered."""
+        if not current.isValid():
+            return
+        hit = self.model.hits[self.proxy.mapToSource(current).row()]
+        self.location_label.setText(f"<b>{display_name(hit.path)}</b>, line {hit.line}")
+        try:
+            text, position = read_context(hit.path, hit.offset)
+        except Exception as e:
+            self.viewer.setPlainText(f"Cannot read {hit.path}: {e}")
+            return
+        self.viewer.setPlainText(text)
+        cursor = self.viewer.textCursor()
+        cursor.setPosition(position)
+        cursor.movePosition(QtGui.QTextCursor.EndOfBlock, QtGui.QTextCursor.KeepAnchor)
+        self.viewer.setTextCursor(cursor)
+        self.viewer.centerCursor()
+
+    def closeEvent(self, event):
+        self.stop()
+        self.thread.quit()
+        self.thread.wait()
+        super(SearchWindow, self).closeEvent(event)
@@ -0,0 +1,168 @@
+"""
+Timeline window: the events of the listed KVPanel and SedecalSerial logs
+merged into one chronological table. Rows are read page by page while the
+table is scrolled, so opening a year of logs costs no more than a screenful.
+"""
+import itertools
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+from core.archives import display_name
+from core.timeline import Timeline, LOG_TYPES, describe
+
+PAGE_SIZE = 500
+# Events shown with a red background
+ERROR_EVENTS = ("timeout", "disconnect")
+FAULT_STATES = ("error", "fault")
+
+
+def event_name(event):
+    """Kind of an event: the serial event or the panel state."""
+    if event.source == "SedecalSerial":
+        return event.record.event
+    if event.source == "KVPanel":
+        return event.record.state or ""
+    return ""
+
+
+class TimelineModel(QtCore.QAbstractTableModel):
+    """Table over a merged event stream; more rows are pulled as the view asks for them."""
+    HEADERS = ["Time", "Source", "Event", "Detail", "File", "Line"]
+
+    def __init__(self, parent=None):
+        super(TimelineModel, self).__init__(parent)
+        self.events = []
+        self._stream = None
+
+    def set_stream(self, stream):
+        self.beginResetModel()
+        self.events = []
+        self._stream = stream
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.events)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._stream is not None
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self._stream is None:
+            return
+        try:
+            page = list(itertools.islice(self._stream, PAGE_SIZE))
+        except Exception as e:
+            print(f"Error reading the timeline: {e}")
+            page = []
+        if len(page) < PAGE_SIZE:
+            self._stream = None
+        if page:
+            self.beginInsertRows(QtCore.QModelIndex(), len(self.events), len(self.events) + len(page) - 1)
+            self.events.extend(page)
+            self.endInsertRows()
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        event = self.events[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return event.timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            return (None, event.source, event_name(event), describe(event),
+                    display_name(event.path), event.line)[column]
+        if role == QtCore.Qt.ToolTipRole and column == 4:
+            return event.path
+        if role == QtCore.Qt.BackgroundRole:
+            name = event_name(event).lower()
+            if name in ERROR_EVENTS or (event.source == "KVPanel" and name.startswith(FAULT_STATES)):
+                return QtGui.QBrush(QtGui.QColor("#ffd6d6"))
+        return None
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+
+class TimelineWindow(QtWidgets.QWidget):
+    """
+    Merged timeline of the files of the main window's file list. get_scope()
+    returns (files, start_date, end_date).
+    """
+
+    def __init__(self, get_scope, parent=None):
+        super(TimelineWindow, self).__init__(parent, QtCore.Qt.Window)
+        self.setWindowTitle("Timeline")
+        self.resize(1100, 650)
+        self.get_scope = get_scope
+        self.timeline = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+        controls = QtWidgets.QHBoxLayout()
+        self.source_boxes = {}
+        for source in LOG_TYPES:
+            box = QtWidgets.QCheckBox(source)
+            box.setChecked(True)
+            box.toggled.connect(self.reload)
+            self.source_boxes[source] = box
+            controls.addWidget(box)
+        controls.addStretch(1)
+        controls.addWidget(QtWidgets.QLabel("Go to:"))
+        self.since_edit = QtWidgets.QDateTimeEdit(calendarPopup=True)
+        self.since_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        controls.addWidget(self.since_edit)
+        go_button = QtWidgets.QPushButton("Go")
+        go_button.clicked.connect(self.go_to)
+        controls.addWidget(go_button)
+        refresh_button = QtWidgets.QPushButton("Reload")
+        refresh_button.clicked.connect(self.reload)
+        controls.addWidget(refresh_button)
+        layout.addLayout(controls)
+
+        self.status_label = QtWidgets.QLabel()
+        layout.addWidget(self.status_label)
+
+        self.model = TimelineModel(self)
+        self.model.rowsInserted.connect(self.update_status)
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.view.verticalHeader().setVisible(False)
+        self.view.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(18)
+        for column, width in enumerate((170, 100, 90, 420, 160)):
+            self.view.setColumnWidth(column, width)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.view, 1)
+
+    def sources(self):
+        return {source for source, box in self.source_boxes.items() if box.isChecked()}
+
+    def reload(self):
+        """Rebuilds the timeline from the current file list and starts at its beginning."""
+        files, start_date, end_date = self.get_scope()
+        self.timeline = Timeline(files, start_date, end_date, self.sources())
+        self.since_edit.setDateTime(QtCore.QDateTime(QtCore.QDate(start_date), QtCore.QTime(0, 0)))
+        self.show_from(None)
+
+    def go_to(self):
+        if self.timeline is None:
+            self.reload()
+        self.show_from(self.since_edit.dateTime().toPyDateTime())
+
+    def show_from(self, since):
+        self.model.set_stream(self.timeline.events(since))
+        self.model.fetchMore()
+        self.view.scrollToTop()
+        self.update_status()
+
+    def update_status(self, *args):
+        if self.timeline is None:
+            return
+        more = " (scroll for more)" if self.model.canFetchMore() else ""
+        self.status_label.setText(f"{len(self.timeline.files)} files, {len(self.model.events)} events loaded{more}")
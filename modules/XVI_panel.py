@@ -1,42 +1,231 @@
 import os
 import fnmatch
-from datetime import datetime
+import datetime
+
+from core.parsers import POT_RE, STATE_RE, window_keys, line_date_key
+from core.reader import SharedLogReader
+from core.trends import daily_mean_drift
 
 MODULE_INFO = {
     "name": "XVI panel: pots",
     "group": "XVI panels",
     "pattern": "KVPanel*.log",
-    "version": "0.4"
+    "version": "0.6"
 }
 
-# Determine the log file path (one level up)
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.join(current_dir, "..")
-log_file = os.path.join(parent_dir, "output.log")
+# Valid range of a pot reading (V)
+POT_MIN = 0.0
+POT_MAX = 10.0
+# Allowed drift of a pot over the period (V): the change of a line fitted through the daily
+# means of its valid readings (core.trends.daily_mean_drift, shared with "Trends: pots and kV")
+DRIFT_WARNING = 0.05
+DRIFT_ALARM = 0.10
+# Share of out-of-range readings that turns the status Red (any at all is Yellow)
+OUT_OF_RANGE_ALARM_RATIO = 0.01
+# Panel states that are counted as faults
+FAULT_STATES = ("error", "fault")
+
+
+class PotConsumer:
+    """
+    Streams KVPanel lines and keeps per-day statistics for every pot.
+    Memory depends on the number of days and pots, not on the log size.
+    Statistics are collected per file first, so a file's summary can be
+    cached and reused by later runs.
+    """
+    # A cached summary of the live KVPanel.log can be continued with its new lines
+    resumable = True
+
+    def __init__(self, start_date, end_date):
+        self.first_key, self.after_key = window_keys(start_date, end_date)
+        # date key -> [{pot name: [count, total, minimum, maximum, out_of_range, out_of_range_total]},
+        #               {panel state: number of records}, last state of the day]
+        self.days = {}
+        self.files = 0
+        # (path, message, status) for files with out-of-range readings or fault states
+        self.findings = []
+        # Statistics of the file being read
+        self.file_days = {}
+        self._day_key = None
+        self._day = None
+
+    def begin_file(self, path):
+        self.files += 1
+        self.file_days = {}
+        self._day_key = None
+        self._day = None
+
+    def end_file(self, path):
+        out = faults = 0
+        for pots, states, last in self.file_days.values():
+            out += sum(stats[4] for stats in pots.values())
+            faults += sum(n for state, n in states.items() if state.lower().startswith(FAULT_STATES))
+        if out or faults:
+            self.findings.append((path, f"Out of range: {out}. Fault states: {faults}.", "Yellow"))
+        merge_days(self.days, self.file_days)
+        self.file_days = {}
+
+    def file_summary(self):
+        """JSON-serializable statistics of the current file."""
+        return {key.decode("ascii"): [{name.decode("ascii", "replace"): stats for name, stats in pots.items()},
+                                      states, last]
+                for key, (pots, states, last) in self.file_days.items()}
+
+    def load_summary(self, path, summary):
+        """Takes the cached statistics of a file, limited to the current date window."""
+        first_key = self.first_key.decode("ascii")
+        after_key = self.after_key.decode("ascii")
+        self.file_days = {key.encode("ascii"): [{name.encode("ascii"): list(stats) for name, stats in pots.items()},
+                                                dict(states), last]
+                          for key, (pots, states, last) in summary.items() if first_key <= key < after_key}
+
+    def feed(self, line):
+        key = line_date_key(line)
+        # Lines outside the window are rejected by their date prefix only
+        if key is None or key < self.first_key:
+            return None
+        if key >= self.after_key:
+            return True    # the rest of this file is after end_date
+
+        if key != self._day_key:
+            day = self.file_days.get(key)
+            if day is None:
+                day = self.file_days[key] = [{}, {}, None]
+            self._day_key, self._day = key, day
+        day = self._day
+
+        pots = POT_RE.findall(line)
+        if pots:
+            day_pots = day[0]
+            for name, value in pots:
+                value = float(value)
+                out = 0 if POT_MIN <= value <= POT_MAX else 1
+                stats = day_pots.get(name)
+                if stats is None:
+                    day_pots[name] = [1, value, value, value, out, value if out else 0.0]
+                else:
+                    stats[0] += 1
+                    stats[1] += value
+                    if value < stats[2]:
+                        stats[2] = value
+                    if value > stats[3]:
+                        stats[3] = value
+                    if out:
+                        stats[4] += 1
+                        stats[5] += value
+
+        if b"tate" in line:
+            match = STATE_RE.search(line)
+            if match:
+                state = match.group(1).decode("ascii", "replace")
+                day[1][state] = day[1].get(state, 0) + 1
+                day[2] = state
+        return None
+
+    def pot_summary(self):
+        """
+        Combines the daily statistics into one summary per pot:
+        {name: (count, minimum, maximum, out_of_range, drift)}.
+        Out-of-range readings are left out of the drift.
+        """
+        totals = {}
+        for key in sorted(self.days):
+            day = datetime.date.fromisoformat(key.decode("ascii")).toordinal()
+            for name, (count, total, minimum, maximum, out, out_total) in self.days[key][0].items():
+                entry = totals.get(name)
+                if entry is None:
+                    entry = totals[name] = [0, minimum, maximum, 0, []]
+                entry[0] += count
+                entry[1] = min(entry[1], minimum)
+                entry[2] = max(entry[2], maximum)
+                entry[3] += out
+                if count > out:
+                    entry[4].append((day, (total - out_total) / (count - out), count - out))
+        return {name.decode("ascii", "replace"): (count, minimum, maximum, out, daily_mean_drift(days))
+                for name, (count, minimum, maximum, out, days) in totals.items()}
+
+    def result(self):
+        pots = self.pot_summary()
+        if not pots:
+            status = "Red"
+            if self.files:
+                result = f"No pot readings in {self.files} files for the selected period."
+            else:
+                result = "Files not found."
+        else:
+            status = "Green"
+            readings = sum(p[0] for p in pots.values())
+            out_total = sum(p[3] for p in pots.values())
+            parts = []
+            for name in sorted(pots):
+                count, minimum, maximum, out, drift = pots[name]
+                parts.append(f"{name} drift {drift:+.3f} ({minimum:.3f}..{maximum:.3f})")
+                if abs(drift) >= DRIFT_ALARM:
+                    status = "Red"
+                elif abs(drift) >= DRIFT_WARNING and status == "Green":
+                    status = "Yellow"
+            if out_total:
+                if out_total / readings >= OUT_OF_RANGE_ALARM_RATIO:
+                    status = "Red"
+                elif status == "Green":
+                    status = "Yellow"
+            faults = 0
+            last_state = None
+            for key in sorted(self.days):
+                pots_of_day, states, last = self.days[key]
+                faults += sum(n for state, n in states.items() if state.lower().startswith(FAULT_STATES))
+                last_state = last or last_state
+            if faults and status == "Green":
+                status = "Yellow"
+            result = (f"{readings} readings in {self.files} files, {len(self.days)} days. "
+                      + "; ".join(parts)
+                      + f". Out of range: {out_total}. Fault states: {faults}.")
+            if last_state:
+                result += f" Last state: {last_state}."
+
+        return result, status, self.findings
+
+
+def merge_days(target, source):
+    """Adds the per-day statistics of one file to the totals."""
+    for key, (pots, states, last) in source.items():
+        day = target.get(key)
+        if day is None:
+            target[key] = [pots, states, last]
+            continue
+        target_pots, target_states = day[0], day[1]
+        for name, stats in pots.items():
+            total = target_pots.get(name)
+            if total is None:
+                target_pots[name] = stats
+            else:
+                total[0] += stats[0]
+                total[1] += stats[1]
+                total[2] = min(total[2], stats[2])
+                total[3] = max(total[3], stats[3])
+                total[4] += stats[4]
+                total[5] += stats[5]
+        for state, count in states.items():
+            target_states[state] = target_states.get(state, 0) + count
+        if last:
+            day[2] = last    # files are read in order, so the later file wins
+
+
+def create_consumer(start_date, end_date):
+    """Returns a consumer for the host's shared log reader."""
+    return PotConsumer(start_date, end_date)
+
 
 def analyze(files, start_date, end_date):
     #print("files>: ",files)
     """
-    Filter files by the specified pattern and count them.
+    Reads the KVPanel logs itself (hosts without a shared reader call this).
     """
     relevant_files = []
     for file in files:
         if fnmatch.fnmatch(os.path.basename(file), MODULE_INFO["pattern"]):
             relevant_files.append(file)
-    count = len(relevant_files)
-    if count > 0:
-        status = "Green"
-        result = f"Found {count} files."
-    else:
-        status = "Red"
-        result = "Files not found."
-
-    # Format the start date (if it's a date object, convert it to a string)
-    start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Log the information to the file (the file is created if it doesn't exist)
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(f"=== {MODULE_INFO['name']} | Start: {start_time} |\n {result}\n")
-
-    return result, status
-# NOTE: All comments and messages in the code must be in US English only. No other languages are permitted.
\ No newline at end of file
+    consumer = create_consumer(start_date, end_date)
+    SharedLogReader().run([(consumer, relevant_files)])
+    return consumer.result()
+# NOTE: All comments and messages in the code must be in US English only. No other languages are permitted.
@@ -0,0 +1,94 @@
+import os
+import datetime
+
+from core.timeline import correlate, serial_event_is, describe
+
+MODULE_INFO = {
+    "name": "Beam-on: panel faults vs. generator",
+    "group": "Correlation",
+    "pattern": ["KVPanel*.log", "SedecalSerial.log*"],
+    "version": "0.2",
+    "api": 2,
+    "input": "records",
+    "window": "host"
+}
+
+# A panel fault this close (s) to a generator communication error is reported as related
+CORRELATION_SECONDS = 2.0
+# Panel states that count as a fault (prefixes, lowercase)
+FAULT_STATES = ("error", "fault")
+# Serial events that count as a generator communication error
+GENERATOR_ERRORS = ("timeout", "disconnect")
+# Related faults listed in the findings
+MAX_FINDINGS = 50
+# Events between two progress reports
+PROGRESS_EVENTS = 50000
+
+
+def fault_onsets():
+    """Predicate for the first KVPanel record of every fault (the state changes into a fault state)."""
+    last_state = {}
+
+    def is_onset(event):
+        if event.source != "KVPanel" or event.record.state is None:
+            return False
+        state = event.record.state.lower()
+        previous = last_state.get(event.path)
+        last_state[event.path] = state
+        return state.startswith(FAULT_STATES) and not (previous or "").startswith(FAULT_STATES)
+    return is_onset
+
+
+def tracked(events, context, seen):
+    """Passes the events on, noting their sources and files and reporting how far the period is read."""
+    start = datetime.datetime.combine(context.start_date, datetime.time.min)
+    seconds = ((context.end_date - context.start_date).days + 1) * 86400
+    for count, event in enumerate(events, 1):
+        seen.add((event.source, event.path))
+        if not count % PROGRESS_EVENTS:
+            context.report((event.timestamp - start).total_seconds() / seconds)
+        yield event
+
+
+def run(context):
+    """
+    Gets the KVPanel and SedecalSerial records merged into one timeline and
+    looks for panel faults that start within CORRELATION_SECONDS of a
+    generator timeout or disconnect.
+    """
+    seen = set()
+    onset = fault_onsets()
+    faults = [0]
+
+    def is_fault(event):
+        if onset(event):
+            faults[0] += 1
+            return True
+        return False
+
+    related = []
+    findings = []
+    for fault, errors in correlate(tracked(context.records(), context, seen), is_fault,
+                                   serial_event_is(*GENERATOR_ERRORS), CORRELATION_SECONDS):
+        related.append(fault)
+        if len(findings) < MAX_FINDINGS:
+            error = min(errors, key=lambda e: abs((e.timestamp - fault.timestamp).total_seconds()))
+            offset = (error.timestamp - fault.timestamp).total_seconds()
+            findings.append((fault.path, f"{fault.timestamp:%Y-%m-%d %H:%M:%S} line {fault.line}: "
+                                         f"{describe(fault)}; generator {error.record.event} {offset:+.2f} s "
+                                         f"({os.path.basename(error.path)} line {error.line})", "Red"))
+
+    files = len({path for _, path in seen})
+    if len({source for source, _ in seen}) < 2:
+        return "Needs both KVPanel and SedecalSerial logs for the selected period.", "Red"
+    if related:
+        status = "Red"
+    elif faults[0]:
+        status = "Yellow"
+    else:
+        status = "Green"
+    result = (f"{faults[0]} panel faults in {files} files, {len(related)} within "
+              f"{CORRELATION_SECONDS:g} s of a generator {' or '.join(GENERATOR_ERRORS)}.")
+
+    return result, status, findings
+# NOTE: All comments and messages in the code must be in US English only. No other languages are permitted.
@@ -1,42 +1,286 @@
 import os
 import fnmatch
-from datetime import datetime
+import datetime
+
+from core.parsers import (window_keys, line_date_key, line_seconds, serial_event,
+                          chronological_rotation_order)
+from core.reader import SharedLogReader
 
 MODULE_INFO = {
     "name": "KV Generator: Connection Test",
     "group": "KV Generator",
     "pattern": "SedecalSerial.log*",
-    "version": "0.4"
+    "version": "0.6"
 }
 
-# Determine the log file path (one level up)
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.join(current_dir, "..")
-log_file = os.path.join(parent_dir, "output.log")
+# Share of requests that ended in a timeout
+TIMEOUT_WARNING_RATIO = 0.001
+TIMEOUT_ALARM_RATIO = 0.01
+# 95th percentile of the request/response round trip (ms)
+RTT_WARNING_MS = 200
+RTT_ALARM_MS = 1000
+# Number of disconnects in the period
+DISCONNECT_WARNING = 1
+DISCONNECT_ALARM = 5
+# Round trips are counted in 10 ms bins up to this limit; slower ones go to the last bin
+RTT_BIN_MS = 10
+RTT_MAX_MS = 10000
+
+
+def new_day():
+    """Statistics of one day: event counts, round trips and the longest outage (s)."""
+    return {"tx": 0, "rx": 0, "timeout": 0, "retry": 0, "disconnect": 0, "connect": 0,
+            "rtt_count": 0, "rtt_total": 0.0, "rtt_max": 0.0, "outage": 0.0, "bins": {}}
+
+
+def merge_day(target, source):
+    """Adds the statistics of one day to another."""
+    for name in ("tx", "rx", "timeout", "retry", "disconnect", "connect", "rtt_count", "rtt_total"):
+        target[name] += source[name]
+    target["rtt_max"] = max(target["rtt_max"], source["rtt_max"])
+    target["outage"] = max(target["outage"], source["outage"])
+    bins = target["bins"]
+    for index, count in source["bins"].items():
+        bins[index] = bins.get(index, 0) + count
+
+
+def elapsed_seconds(since, until):
+    """Seconds between two (date key, seconds of day) marks, or None if they are out of order."""
+    if since[1] is None or until[1] is None:
+        return None
+    elapsed = until[1] - since[1]
+    if since[0] != until[0]:
+        try:
+            days = (datetime.date.fromisoformat(until[0].decode("ascii")) -
+                    datetime.date.fromisoformat(since[0].decode("ascii"))).days
+        except ValueError:
+            return None
+        elapsed += days * 86400
+    return elapsed if elapsed >= 0 else None
+
+
+class SerialConsumer:
+    """
+    Treats the rotation set (SedecalSerial.log.N ... SedecalSerial.log) as one
+    continuous stream, oldest file first, and stops reading once it is past end_date.
+    Statistics are kept per day and per file, so a file's summary can be cached;
+    disconnects that span two files are joined when the files are combined.
+    """
+    # A cached summary of the live SedecalSerial.log can be continued with its new lines
+    resumable = True
+
+    def __init__(self, start_date, end_date):
+        self.first_key, self.after_key = window_keys(start_date, end_date)
+        self.past_end = False
+        self.files_seen = 0
+        self.files = 0    # files actually read or taken from the cache
+        self.days = {}    # date key -> statistics (see new_day)
+        # (path, message, status) for files with timeouts, retries or disconnects
+        self.findings = []
+        # Disconnect (date key, seconds) still open at the end of the previous file
+        self.open_disconnect = None
+        self._reset_file()
+
+    def _reset_file(self):
+        self.file_days = {}
+        self._day_key = None
+        self._day = None
+        # Outstanding request: (date key, seconds of day) of the last TX line
+        self.pending_tx = None
+        # Disconnect in this file that has not been followed by a connect yet
+        self.disconnected_at = None
+        self.saw_disconnect = False
+        # First connect of the file before any disconnect (closes an outage of the previous file)
+        self.first_connect = None
+        self.file_past_end = False
+
+    def order_files(self, files):
+        return chronological_rotation_order(files)
+
+    def begin_file(self, path):
+        self.files_seen += 1
+        if self.past_end:
+            return True    # newer files only hold lines after end_date
+        self.files += 1
+        self._reset_file()
+        return None
+
+    def end_file(self, path):
+        timeouts = sum(day["timeout"] for day in self.file_days.values())
+        retries = sum(day["retry"] for day in self.file_days.values())
+        disconnects = sum(day["disconnect"] for day in self.file_days.values())
+        if timeouts or retries or disconnects:
+            self.findings.append((path, f"Timeouts: {timeouts}, retries: {retries}, disconnects: {disconnects}.",
+                                  "Red" if disconnects >= DISCONNECT_ALARM else "Yellow"))
+        for key, day in self.file_days.items():
+            if key in self.days:
+                merge_day(self.days[key], day)
+            else:
+                self.days[key] = day
+        if self.open_disconnect is not None and self.first_connect is not None:
+            outage = elapsed_seconds(self.open_disconnect, self.first_connect)
+            day = self.days.get(self.first_connect[0])
+            if outage is not None and day is not None and outage > day["outage"]:
+                day["outage"] = outage
+            self.open_disconnect = None
+        if self.disconnected_at is not None and self.open_disconnect is None:
+            self.open_disconnect = self.disconnected_at
+        if self.file_past_end:
+            self.past_end = True
+        self._reset_file()
+
+    def file_summary(self):
+        """JSON-serializable statistics of the current file."""
+        def mark(value):
+            return [value[0].decode("ascii"), value[1]] if value is not None else None
+        return {"days": {key.decode("ascii"): day for key, day in self.file_days.items()},
+                "first_connect": mark(self.first_connect),
+                "disconnected_at": mark(self.disconnected_at),
+                "saw_disconnect": self.saw_disconnect,
+                "pending_tx": mark(self.pending_tx),
+                "past_end": self.file_past_end}
+
+    def load_summary(self, path, summary):
+        """Takes the cached statistics of a file, limited to the current date window."""
+        first_key = self.first_key.decode("ascii")
+        after_key = self.after_key.decode("ascii")
+
+        def mark(value):
+            if value is None or not first_key <= value[0] < after_key:
+                return None
+            return value[0].encode("ascii"), value[1]
+        for key, day in summary["days"].items():
+            if first_key <= key < after_key:
+                day["bins"] = {int(index): count for index, count in day["bins"].items()}
+                self.file_days[key.encode("ascii")] = day
+        self.first_connect = mark(summary["first_connect"])
+        self.disconnected_at = mark(summary["disconnected_at"])
+        self.saw_disconnect = summary.get("saw_disconnect", self.disconnected_at is not None)
+        self.pending_tx = mark(summary.get("pending_tx"))
+        self.file_past_end = summary["past_end"] or any(key >= after_key for key in summary["days"])
+
+    def feed(self, line):
+        key = line_date_key(line)
+        if key is None or key < self.first_key:
+            return None
+        if key >= self.after_key:
+            self.file_past_end = True
+            return True
+
+        event = serial_event(line)
+        if event is None:
+            return None
+        if key != self._day_key:
+            day = self.file_days.get(key)
+            if day is None:
+                day = self.file_days[key] = new_day()
+            self._day_key, self._day = key, day
+        day = self._day
+        day[event] += 1
+        if event == "tx":
+            self.pending_tx = (key, line_seconds(line))
+        elif event == "rx":
+            if self.pending_tx is not None:
+                self._add_round_trip(day, elapsed_seconds(self.pending_tx, (key, line_seconds(line))))
+                self.pending_tx = None
+        elif event == "timeout":
+            self.pending_tx = None
+        elif event == "disconnect":
+            self.pending_tx = None
+            self.saw_disconnect = True
+            if self.disconnected_at is None:
+                self.disconnected_at = (key, line_seconds(line))
+        elif event == "connect":
+            if self.disconnected_at is not None:
+                outage = elapsed_seconds(self.disconnected_at, (key, line_seconds(line)))
+                if outage is not None and outage > day["outage"]:
+                    day["outage"] = outage
+                self.disconnected_at = None
+            elif not self.saw_disconnect and self.first_connect is None:
+                self.first_connect = (key, line_seconds(line))
+        return None
+
+    def _add_round_trip(self, day, elapsed):
+        if elapsed is None or elapsed > 86400:
+            return
+        ms = elapsed * 1000.0
+        day["rtt_count"] += 1
+        day["rtt_total"] += ms
+        if ms > day["rtt_max"]:
+            day["rtt_max"] = ms
+        index = min(int(ms // RTT_BIN_MS), RTT_MAX_MS // RTT_BIN_MS)
+        day["bins"][index] = day["bins"].get(index, 0) + 1
+
+    def totals(self):
+        """Statistics of the whole period."""
+        total = new_day()
+        for day in self.days.values():
+            merge_day(total, day)
+        return total
+
+    def result(self):
+        counts = self.totals()
+        requests = counts["tx"]
+        if not self.files_seen:
+            status = "Red"
+            result = "Files not found."
+        elif not requests and not counts["rx"]:
+            status = "Red"
+            result = f"No serial traffic in {self.files_seen} files for the selected period."
+        else:
+            timeout_ratio = counts["timeout"] / requests if requests else 0.0
+            p95 = rtt_percentile(counts, 0.95)
+            mean = counts["rtt_total"] / counts["rtt_count"] if counts["rtt_count"] else 0.0
+            still_disconnected = self.open_disconnect is not None
+            if (timeout_ratio >= TIMEOUT_ALARM_RATIO or p95 >= RTT_ALARM_MS
+                    or counts["disconnect"] >= DISCONNECT_ALARM or still_disconnected):
+                status = "Red"
+            elif (timeout_ratio >= TIMEOUT_WARNING_RATIO or p95 >= RTT_WARNING_MS
+                    or counts["disconnect"] >= DISCONNECT_WARNING or counts["retry"]):
+                status = "Yellow"
+            else:
+                status = "Green"
+            result = (f"{requests} requests in {self.files} files. "
+                      f"Round trip: mean {mean:.0f} ms, p95 {p95:.0f} ms, max {counts['rtt_max']:.0f} ms. "
+                      f"Timeouts: {counts['timeout']} ({timeout_ratio:.2%}), retries: {counts['retry']}, "
+                      f"disconnects: {counts['disconnect']}")
+            if counts["outage"]:
+                result += f" (longest outage {counts['outage']:.0f} s)"
+            result += "."
+            if still_disconnected:
+                result += " Still disconnected at the end of the period."
+
+        return result, status, self.findings
+
+
+def rtt_percentile(stats, fraction):
+    """Returns the upper edge (ms) of the histogram bin that holds the given percentile."""
+    if not stats["rtt_count"]:
+        return 0.0
+    target = fraction * stats["rtt_count"]
+    seen = 0
+    for index in sorted(stats["bins"]):
+        seen += stats["bins"][index]
+        if seen >= target:
+            return min((index + 1) * RTT_BIN_MS, stats["rtt_max"])
+    return stats["rtt_max"]
+
+
+def create_consumer(start_date, end_date):
+    """Returns a consumer for the host's shared log reader."""
+    return SerialConsumer(start_date, end_date)
+
 
 def analyze(files, start_date, end_date):
     #print("files>: ",files)
     """
-    Filter files by the specified pattern and count them.
+    Reads the SedecalSerial rotation set itself (hosts without a shared reader call this).
     """
     relevant_files = []
     for file in files:
         if fnmatch.fnmatch(os.path.basename(file), MODULE_INFO["pattern"]):
             relevant_files.append(file)
-    count = len(relevant_files)
-    if count > 0:
-        status = "Green"
-        result = f"Found {count} files."
-    else:
-        status = "Red"
-        result = "Files not found."
-
-    # Format the start date (if it's a date object, convert it to a string)
-    start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Log the information to the file (the file is created if it doesn't exist)
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(f"=== {MODULE_INFO['name']} | Start: {start_time} |\n {result}\n")
-
-    return result, status
-# NOTE: All comments and messages in the code must be in US English only. No other languages are permitted.
\ No newline at end of file
+    consumer = create_consumer(start_date, end_date)
+    SharedLogReader().run([(consumer, relevant_files)])
+    return consumer.result()
+# NOTE: All comments and messages in the code must be in US English only. No other languages are permitted.
@@ -0,0 +1,84 @@
+from core import trends
+
+MODULE_INFO = {
+    "name": "Trends: pots and kV",
+    "group": "Trends",
+    "pattern": ["KVPanel*.log", "SedecalSerial.log*"],
+    "version": "0.3"
+}
+
+# Pots that are trended
+POTS = ("PotA", "PotB")
+# Valid range of a pot reading (V), as in "XVI panel: pots"
+POT_MIN = 0.0
+POT_MAX = 10.0
+# Drift of a pot over the period (V), as in "XVI panel: pots" (see core.trends.daily_mean_drift)
+DRIFT_WARNING = 0.05
+DRIFT_ALARM = 0.10
+# 95th percentile of the pot's standard deviation over NOISE_WINDOW consecutive valid readings (V)
+NOISE_WINDOW = 30
+NOISE_WARNING = 0.05
+NOISE_ALARM = 0.20
+# Share of out-of-range readings that turns the status Red (any at all is Yellow)
+OUT_OF_RANGE_ALARM_RATIO = 0.01
+
+
+def pot_part(name, series):
+    """Returns (text, status) for one pot; drift and noise use only the readings in the valid range."""
+    stats = trends.trend_stats(series, POT_MIN, POT_MAX)
+    inside = trends.inside_limits(series.values, POT_MIN, POT_MAX)
+    valid = series.values[inside]
+    noise = trends.percentiles(trends.rolling_std(valid, NOISE_WINDOW), (95,))[0]
+    statuses = [trends.verdict(abs(stats.drift), DRIFT_WARNING, DRIFT_ALARM)]
+    if stats.outside:
+        statuses.append("Red" if stats.outside / stats.count >= OUT_OF_RANGE_ALARM_RATIO else "Yellow")
+    if noise == noise:    # not NaN: enough readings for one window
+        statuses.append(trends.verdict(noise, NOISE_WARNING, NOISE_ALARM))
+    text = (f"{name} median {stats.p50:.3f} V (p5 {stats.p5:.3f}, p95 {stats.p95:.3f}), "
+            f"drift {stats.drift:+.3f} V over {stats.days:.1f} days")
+    if len(valid):
+        days, means = trends.daily_means(series.times[inside], valid)
+        text += f" (daily mean {means[0]:.3f} on {days[0]} -> {means[-1]:.3f} on {days[-1]})"
+    if noise == noise:
+        text += f", noise {noise:.3f} V"
+    text += f", out of range {stats.outside} ({stats.crossings} excursions)"
+    return text, trends.worst(statuses)
+
+
+def kv_part(series):
+    """
+    Text for the kV requested from the generator. The value is read from the
+    byte after "02 4B 56" in TX frames, a layout that is not confirmed yet, so
+    it is shown for information and does not change the status.
+    """
+    stats = trends.trend_stats(series)
+    return (f"kV median {stats.p50:g} (p5 {stats.p5:g}, p95 {stats.p95:g}, {stats.count} requests, "
+            f"not rated)")
+
+
+def analyze(files, start_date, end_date):
+    """
+    Trends of the pot readings over the period: percentiles, drift, noise and
+    excursions out of the valid range, computed on NumPy arrays of all
+    readings. The requested kV is reported alongside (see kv_part).
+    """
+    if not trends.available():
+        return "NumPy is not installed (pip install numpy); trends are not available.", "Yellow"
+
+    series = trends.load_series(files, POTS + ("kv",), start_date, end_date)
+    parts = []
+    statuses = []
+    for name in POTS:
+        if len(series[name].values):
+            text, status = pot_part(name, series[name])
+            parts.append(text)
+            statuses.append(status)
+    if not parts:
+        result, status = "No pot readings for the selected period.", "Red"
+    else:
+        if len(series["kv"].values):
+            parts.append(kv_part(series["kv"]))
+        result, status = "; ".join(parts) + ".", trends.worst(statuses)
+
+    return result, status
+# NOTE: All comments and messages in the code must be in US English only. No other languages are permitted.
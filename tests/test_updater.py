@@ -0,0 +1,230 @@
+"""
+Tests of core.updater: program updates from a release tarball, and module
+updates against a local stand-in for the GitHub API.
+
+    python -m unittest discover -s tests -t .
+"""
+import io
+import os
+import json
+import shutil
+import tarfile
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from core import updater
+from core.updater import apply_release, git_blob_sha, ModuleUpdater
+
+ROOT = "XVI_logs-1234567"    # top-level folder of a GitHub tarball
+
+
+def make_tarball(files):
+    """A .tar.gz stream of (member name, bytes) pairs, in the given order."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        folder = tarfile.TarInfo(ROOT)
+        folder.type = tarfile.DIRTYPE
+        tar.addfile(folder)
+        for name, data in files:
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            member.mode = 0o644
+            member.mtime = 1700000000
+            tar.addfile(member, io.BytesIO(data))
+    buffer.seek(0)
+    return buffer
+
+
+def snapshot(directory):
+    """Every folder and file below directory, with the file contents."""
+    tree = {}
+    for folder, dirs, files in os.walk(directory):
+        tree[os.path.relpath(folder, directory)] = None
+        for name in files:
+            path = os.path.join(folder, name)
+            with open(path, "rb") as f:
+                tree[os.path.relpath(path, directory)] = f.read()
+    return tree
+
+
+class ApplyReleaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.install = os.path.join(self.base, "install")
+        self.write("config.json", b'{"log_directory": "D:/logs"}')
+        self.write("README.md", b"same\n")
+        self.write("core/a.py", b"a = 1\n")
+        self.write("core/b.py", b"b = 1\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.base, ignore_errors=True)
+
+    def write(self, rel_path, data):
+        path = os.path.join(self.install, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def release(self):
+        return make_tarball([
+            (f"{ROOT}/../../escaped.txt", b"outside\n"),
+            (f"{ROOT}/config.json", b'{"log_directory": "C:/other"}'),
+            (f"{ROOT}/README.md", b"same\n"),
+            (f"{ROOT}/extra/new.py", b"new = 1\n"),
+            (f"{ROOT}/core/a.py", b"a = 2\n"),
+            (f"{ROOT}/core/b.py", b"b = 2\n"),
+        ])
+
+    def test_writes_only_changed_files(self):
+        result = apply_release(self.release(), self.install)
+        self.assertEqual(sorted(result.written),
+                         sorted([os.path.join("extra", "new.py"), os.path.join("core", "a.py"),
+                                 os.path.join("core", "b.py")]))
+        self.assertEqual(result.unchanged, 1)
+        tree = snapshot(self.install)
+        self.assertEqual(tree["config.json"], b'{"log_directory": "D:/logs"}')
+        self.assertEqual(tree[os.path.join("core", "a.py")], b"a = 2\n")
+        self.assertEqual(tree[os.path.join("extra", "new.py")], b"new = 1\n")
+        # Neither the ../ member nor the staging and backup folders are left anywhere
+        self.assertEqual(sorted(os.listdir(self.base)), ["install"])
+        self.assertFalse([name for name in tree if ".update-" in name])
+
+    def test_failed_swap_leaves_installation_unchanged(self):
+        before = snapshot(self.install)
+        real_replace = os.replace
+        moved_in = []
+
+        def failing_replace(source, target):
+            # Fail when the third staged file is moved into the installation
+            if ".update-staging-" in str(source):
+                moved_in.append(target)
+                if len(moved_in) == 3:
+                    raise OSError("disk full")
+            return real_replace(source, target)
+
+        with mock.patch.object(updater.os, "replace", side_effect=failing_replace):
+            with self.assertRaises(OSError):
+                apply_release(self.release(), self.install)
+        self.assertEqual(len(moved_in), 3)
+        self.assertEqual(snapshot(self.install), before)
+        self.assertEqual(sorted(os.listdir(self.base)), ["install"])
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """The contents API and raw downloads of a modules folder, with ETags."""
+    files = {}          # name -> bytes
+    requests = []       # (path, status) of every request served
+
+    def do_GET(self):
+        if self.path == "/contents/modules":
+            body = json.dumps([{"name": name, "sha": git_blob_sha(data),
+                                "download_url": f"http://{self.headers['Host']}/raw/{name}"}
+                               for name, data in sorted(self.files.items())]).encode("utf-8")
+        elif self.path.startswith("/raw/") and self.path[5:] in self.files:
+            body = self.files[self.path[5:]]
+        else:
+            self.answer(404)
+            return
+        etag = '"' + git_blob_sha(body) + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.answer(304)
+            return
+        self.answer(200, body, etag)
+
+    def answer(self, status, body=b"", etag=None):
+        self.requests.append((self.path, status))
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+MODULE_A = b'MODULE_INFO = {"name": "A", "version": "1.2"}\n'
+MODULE_B = b'MODULE_INFO = {"name": "B", "version": "0.3"}\n'
+
+
+@unittest.skipIf(updater.requests is None, "the requests library is not installed")
+class ModuleUpdaterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.modules_dir = os.path.join(self.base, "modules")
+        self.state_path = os.path.join(self.base, "update_state.json")
+        FakeGitHub.files = {"a.py": MODULE_A, "b.py": MODULE_B}
+        FakeGitHub.requests = []
+
+    def tearDown(self):
+        shutil.rmtree(self.base, ignore_errors=True)
+
+    def update(self):
+        """One update run with a fresh updater, as after a restart of the program."""
+        FakeGitHub.requests = []
+        return ModuleUpdater(self.base_url, self.modules_dir, self.state_path).update()
+
+    def test_second_run_downloads_nothing(self):
+        report = self.update()
+        self.assertEqual(report.updated, [("a.py", "1.2"), ("b.py", "0.3")])
+        report = self.update()
+        self.assertEqual(report.updated, [])
+        self.assertEqual(report.up_to_date, [("a.py", "1.2"), ("b.py", "0.3")])
+        # The listing is answered with 304 and the modules are skipped by their blob SHA
+        self.assertEqual(FakeGitHub.requests, [("/contents/modules", 304)])
+
+    def test_identical_local_module_is_not_downloaded(self):
+        os.makedirs(self.modules_dir)
+        with open(os.path.join(self.modules_dir, "a.py"), "wb") as f:
+            f.write(MODULE_A)
+        report = self.update()
+        self.assertEqual(report.updated, [("b.py", "0.3")])
+        self.assertEqual(report.up_to_date, [("a.py", "1.2")])
+        self.assertEqual([path for path, _ in FakeGitHub.requests], ["/contents/modules", "/raw/b.py"])
+
+    def test_unchanged_download_is_not_modified(self):
+        self.update()
+        # A local edit makes the SHAs differ; without the stored SHA the module is
+        # requested again, with its ETag
+        path = os.path.join(self.modules_dir, "a.py")
+        with open(path, "ab") as f:
+            f.write(b"# local edit\n")
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        del state["modules"]["a.py"]["sha"]
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        report = self.update()
+        self.assertIn(("a.py", "1.2"), report.up_to_date)
+        self.assertIn(("/raw/a.py", 304), FakeGitHub.requests)
+        with open(path, "rb") as f:
+            self.assertTrue(f.read().endswith(b"# local edit\n"))
+
+    def test_changed_module_is_downloaded(self):
+        self.update()
+        FakeGitHub.files["b.py"] = MODULE_B.replace(b"0.3", b"0.4")
+        report = self.update()
+        self.assertEqual(report.updated, [("b.py", "0.4")])
+        self.assertEqual([path for path, _ in FakeGitHub.requests], ["/contents/modules", "/raw/b.py"])
+
+
+if __name__ == "__main__":
+    unittest.main()